@@ -1,35 +1,135 @@
 from __future__ import annotations
 
-import pathlib
+from datetime import datetime, timedelta
+
+import voluptuous as vol
 
 from homeassistant.components.frontend import async_register_built_in_panel
 from homeassistant.components.http import StaticPathConfig
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, SupportsResponse
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.start import async_at_started
 
 from custom_components.utility_manual_tracking.action import (
+    CLEANUP_ORPHANED_STATISTICS_SCHEMA,
+    EXPORT_METER_DATA_SCHEMA,
+    GET_METER_ROLLUPS_SCHEMA,
+    RESET_METER_STATISTICS_SCHEMA,
+    RESET_ALL_METER_STATISTICS_SCHEMA,
+    VERIFY_METER_STATISTICS_SCHEMA,
+    async_cleanup_orphaned_statistics,
+    handle_cancel_meter_statistics_rebuild,
+    handle_cleanup_orphaned_statistics,
+    handle_export_meter_data,
+    handle_get_meter_rollups,
+    handle_reset_all_meter_statistics,
     handle_reset_meter_statistics,
     handle_update_meter_value,
+    handle_verify_meter_statistics,
 )
+from custom_components.utility_manual_tracking.algorithms import INTERPOLATION_MEMO
 from custom_components.utility_manual_tracking.consts import (
+    CONF_CLEANUP_ORPHANED_STATISTICS,
     CONF_KNOWN_DEVICE_ENTITIES,
     DOMAIN,
     PLATFORMS,
 )
+from custom_components.utility_manual_tracking.memo import meter_budget_bytes
+from custom_components.utility_manual_tracking.panel import (
+    PANEL_FRONTEND_PATH,
+    PANEL_URL,
+    PanelBundleView,
+    load_panel_bundle,
+)
+from custom_components.utility_manual_tracking.sensor import (
+    UtilityManualTrackingSensor,
+    entry_entity_id,
+    retention_policy,
+)
+from custom_components.utility_manual_tracking.websocket_api import (
+    async_register_websocket_commands,
+)
+
+CLEANUP_INTERVAL = timedelta(days=1)
 
-PANEL_URL = "/utility_manual_tracking/panel"
-PANEL_FRONTEND_PATH = str(pathlib.Path(__file__).parent / "frontend")
+CONFIG_SCHEMA = vol.Schema(
+    {
+        DOMAIN: vol.Schema(
+            {vol.Optional(CONF_CLEANUP_ORPHANED_STATISTICS, default=False): cv.boolean}
+        )
+    },
+    extra=vol.ALLOW_EXTRA,
+)
 
 
 async def async_setup(hass: HomeAssistant, config: dict):
     """Setup the Utility Manual Tracking integration."""
     hass.data.setdefault(DOMAIN, {})
     hass.services.async_register(DOMAIN, "update_meter_value", handle_update_meter_value)
-    hass.services.async_register(DOMAIN, "reset_meter_statistics", handle_reset_meter_statistics)
+    hass.services.async_register(
+        DOMAIN,
+        "reset_meter_statistics",
+        handle_reset_meter_statistics,
+        schema=RESET_METER_STATISTICS_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        "reset_all_meter_statistics",
+        handle_reset_all_meter_statistics,
+        schema=RESET_ALL_METER_STATISTICS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN, "cancel_meter_statistics_rebuild", handle_cancel_meter_statistics_rebuild
+    )
+    hass.services.async_register(
+        DOMAIN,
+        "verify_meter_statistics",
+        handle_verify_meter_statistics,
+        schema=VERIFY_METER_STATISTICS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        "get_meter_rollups",
+        handle_get_meter_rollups,
+        schema=GET_METER_ROLLUPS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        "export_meter_data",
+        handle_export_meter_data,
+        schema=EXPORT_METER_DATA_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        "cleanup_orphaned_statistics",
+        handle_cleanup_orphaned_statistics,
+        schema=CLEANUP_ORPHANED_STATISTICS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    async_register_websocket_commands(hass)
+
+    if config.get(DOMAIN, {}).get(CONF_CLEANUP_ORPHANED_STATISTICS):
+        # Once every config entry is known, then daily
+        async def _async_sweep(_: HomeAssistant | datetime) -> None:
+            await async_cleanup_orphaned_statistics(hass)
 
-    # Serve built frontend files (no cache so updates apply immediately)
+        async_at_started(hass, _async_sweep)
+        async_track_time_interval(
+            hass, _async_sweep, CLEANUP_INTERVAL, name=f"{DOMAIN} statistics cleanup"
+        )
+
+    # Serve the bundle under its content hash so browsers can cache it forever;
+    # the plain path stays uncached for panels registered by older versions
+    bundle = await hass.async_add_executor_job(load_panel_bundle)
+    hass.http.register_view(PanelBundleView(bundle))
     await hass.http.async_register_static_paths(
-        [StaticPathConfig(PANEL_URL, PANEL_FRONTEND_PATH, cache_headers=False)]
+        [StaticPathConfig(PANEL_URL, str(PANEL_FRONTEND_PATH), cache_headers=False)]
     )
 
     # Register sidebar panel (cache-bust with file hash)
@@ -43,7 +143,7 @@ async def async_setup(hass: HomeAssistant, config: dict):
             config={
                 "_panel_custom": {
                     "name": "utility-dashboard-panel",
-                    "js_url": f"{PANEL_URL}/utility-dashboard-panel.js",
+                    "js_url": bundle.url,
                 }
             },
         )
@@ -53,6 +153,10 @@ async def async_setup(hass: HomeAssistant, config: dict):
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up the Utility Manual Tracking integration from a config entry."""
+    # The memo is shared, size it for a rebuild of every configured meter
+    INTERPOLATION_MEMO.resize(
+        meter_budget_bytes(len(hass.config_entries.async_entries(DOMAIN)))
+    )
     entry.async_on_unload(entry.add_update_listener(_async_update_options))
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     return True
@@ -72,5 +176,19 @@ async def async_migrate_entry(hass: HomeAssistant, config_entry: ConfigEntry) ->
 
 
 async def _async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Handle options update — reload the integration to pick up new device entities."""
-    await hass.config_entries.async_reload(entry.entry_id)
+    """Handle options update — apply new retention and devices to the live sensor.
+
+    Falls back to reloading the entry when its sensor is not loaded.
+    """
+    sensor = hass.data.get(DOMAIN, {}).get(entry_entity_id(entry))
+    if not isinstance(sensor, UtilityManualTrackingSensor):
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    sensor.async_set_retention(retention_policy(entry))
+    await sensor.async_update_known_devices(
+        entry.options.get(
+            CONF_KNOWN_DEVICE_ENTITIES,
+            entry.data.get(CONF_KNOWN_DEVICE_ENTITIES, []),
+        )
+    )
@@ -1,21 +1,79 @@
 """Actions for Utility Manual Tracking integration."""
 
 from __future__ import annotations
+import asyncio
 from datetime import datetime, timezone
+from itertools import chain
+import time
 
-from homeassistant.core import ServiceCall
-from homeassistant.helpers import service
+import voluptuous as vol
 
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv, service
+
+from custom_components.utility_manual_tracking.cleanup import orphaned_statistic_ids
 from custom_components.utility_manual_tracking.consts import DOMAIN, LOGGER
+from custom_components.utility_manual_tracking.device_data import (
+    DeviceConsumptionCache,
+)
+from custom_components.utility_manual_tracking.export import (
+    FORMAT_CSV,
+    FORMAT_JSONL,
+    write_records,
+)
+from custom_components.utility_manual_tracking.rollups import DAILY, MONTHLY
 from custom_components.utility_manual_tracking.sensor import (
     UtilityManualTrackingSensor,
+    live_statistic_ids,
+)
+from custom_components.utility_manual_tracking.statistics import (
+    async_list_domain_statistic_ids,
+    clear_statistics_batched,
 )
 
 
 DATE_FORMAT = "%Y-%m-%d %H"
+DEFAULT_MAX_PARALLEL = 2
+
+RESET_METER_STATISTICS_SCHEMA = cv.make_entity_service_schema(
+    {vol.Optional("since"): cv.datetime}
+)
+
+RESET_ALL_METER_STATISTICS_SCHEMA = cv.make_entity_service_schema(
+    {
+        vol.Optional("algorithm"): cv.string,
+        vol.Optional("max_parallel", default=DEFAULT_MAX_PARALLEL): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=16)
+        ),
+    }
+)
+
+VERIFY_METER_STATISTICS_SCHEMA = cv.make_entity_service_schema(
+    {vol.Optional("repair", default=True): cv.boolean}
+)
 
+GET_METER_ROLLUPS_SCHEMA = cv.make_entity_service_schema(
+    {
+        vol.Optional("period", default=DAILY): vol.In([DAILY, MONTHLY]),
+        vol.Optional("start"): cv.date,
+        vol.Optional("end"): cv.date,
+    }
+)
+
+EXPORT_METER_DATA_SCHEMA = cv.make_entity_service_schema(
+    {
+        vol.Required("path"): cv.string,
+        vol.Optional("format", default=FORMAT_CSV): vol.In([FORMAT_CSV, FORMAT_JSONL]),
+    }
+)
+
+CLEANUP_ORPHANED_STATISTICS_SCHEMA = vol.Schema(
+    {vol.Optional("dry_run", default=False): cv.boolean}
+)
 
-def handle_update_meter_value(call: ServiceCall):
+
+async def handle_update_meter_value(call: ServiceCall):
     entities = service.async_extract_referenced_entity_ids(call.hass, call)
     value = call.data.get("value")
     read_date_str = call.data.get("date")
@@ -27,7 +85,7 @@ def handle_update_meter_value(call: ServiceCall):
     for sensor_id in entities.referenced:
         sensor = call.hass.data.get(DOMAIN)[sensor_id]
         if isinstance(sensor, UtilityManualTrackingSensor):
-            sensor.set_value(value, read_date_utc)
+            await sensor.async_submit_reading(value, read_date_utc)
             LOGGER.info(f"Updated sensor {sensor_id} with value {value}")
         else:
             LOGGER.error(
@@ -35,15 +93,199 @@ def handle_update_meter_value(call: ServiceCall):
             )
 
 
-def handle_reset_meter_statistics(call: ServiceCall):
-    """Handle the reset_meter_statistics service call."""
+async def handle_reset_meter_statistics(call: ServiceCall):
+    """Handle the reset_meter_statistics service call.
+
+    Rebuilds run as background tasks; follow them through
+    `utility_manual_tracking_rebuild_progress` events. With `since` (local
+    time unless a zone is given), only the statistics after the last reading
+    before it are rebuilt.
+    """
+    since = call.data.get("since")
+    if since is not None:
+        since = since.astimezone(timezone.utc)
     entities = service.async_extract_referenced_entity_ids(call.hass, call)
     for sensor_id in entities.referenced:
         sensor = call.hass.data.get(DOMAIN)[sensor_id]
         if isinstance(sensor, UtilityManualTrackingSensor):
-            sensor.reset_statistics()
-            LOGGER.info(f"Reset statistics for sensor {sensor_id}")
+            sensor.async_start_rebuild(since=since)
+            LOGGER.info(f"Started resetting statistics for sensor {sensor_id}")
         else:
             LOGGER.error(
                 f"Entity {sensor_id} is not a UtilityManualTrackingSensor, unable to reset statistics."
             )
+
+
+async def handle_reset_all_meter_statistics(call: ServiceCall) -> ServiceResponse:
+    """Rebuild the statistics of all (or the targeted) meters.
+
+    Meters are rebuilt as background tasks, at most `max_parallel` at a time,
+    sharing device statistics between meters that use the same devices.
+    """
+    hass = call.hass
+    sensors: list[UtilityManualTrackingSensor] = [
+        sensor
+        for sensor in hass.data.get(DOMAIN, {}).values()
+        if isinstance(sensor, UtilityManualTrackingSensor)
+    ]
+    referenced = service.async_extract_referenced_entity_ids(hass, call).referenced
+    if referenced:
+        sensors = [sensor for sensor in sensors if sensor.entity_id in referenced]
+    if algorithm := call.data.get("algorithm"):
+        sensors = [sensor for sensor in sensors if sensor.algorithm == algorithm]
+
+    semaphore = asyncio.Semaphore(call.data["max_parallel"])
+    device_cache = DeviceConsumptionCache()
+    started = time.monotonic()
+
+    async def _reset(sensor: UtilityManualTrackingSensor) -> int:
+        async with semaphore:
+            return await sensor.async_start_rebuild(device_cache)
+
+    results = await asyncio.gather(
+        *(_reset(sensor) for sensor in sensors), return_exceptions=True
+    )
+
+    rows_written = 0
+    failed: list[str] = []
+    cancelled: list[str] = []
+    for sensor, result in zip(sensors, results):
+        if isinstance(result, asyncio.CancelledError):
+            cancelled.append(sensor.entity_id)
+        elif isinstance(result, BaseException):
+            LOGGER.error(
+                "Failed to reset statistics for sensor %s",
+                sensor.entity_id,
+                exc_info=result,
+            )
+            failed.append(sensor.entity_id)
+        else:
+            rows_written += result
+
+    elapsed = time.monotonic() - started
+    LOGGER.info(
+        f"Reset statistics for {len(sensors) - len(failed) - len(cancelled)} meters: "
+        f"{rows_written} rows in {elapsed:.1f}s"
+    )
+    return {
+        "meters": [sensor.entity_id for sensor in sensors],
+        "failed": failed,
+        "cancelled": cancelled,
+        "rows_written": rows_written,
+        "elapsed_seconds": round(elapsed, 3),
+        "device_queries": device_cache.queries,
+    }
+
+
+@callback
+def handle_cancel_meter_statistics_rebuild(call: ServiceCall):
+    """Handle the cancel_meter_statistics_rebuild service call."""
+    entities = service.async_extract_referenced_entity_ids(call.hass, call)
+    for sensor_id in entities.referenced:
+        sensor = call.hass.data.get(DOMAIN)[sensor_id]
+        if isinstance(sensor, UtilityManualTrackingSensor):
+            if sensor.async_cancel_rebuild():
+                LOGGER.info(f"Cancelled statistics rebuild for sensor {sensor_id}")
+            else:
+                LOGGER.info(f"No statistics rebuild running for sensor {sensor_id}")
+        else:
+            LOGGER.error(
+                f"Entity {sensor_id} is not a UtilityManualTrackingSensor, unable to cancel rebuild."
+            )
+
+
+async def handle_verify_meter_statistics(call: ServiceCall) -> ServiceResponse:
+    """Compare stored statistics with the readings and repair mismatched hours."""
+    entities = service.async_extract_referenced_entity_ids(call.hass, call)
+    reports: dict[str, dict] = {}
+    for sensor_id in entities.referenced:
+        sensor = call.hass.data.get(DOMAIN)[sensor_id]
+        if isinstance(sensor, UtilityManualTrackingSensor):
+            reports[sensor_id] = await sensor.async_verify_statistics(
+                call.data["repair"]
+            )
+            LOGGER.info(f"Verified statistics for sensor {sensor_id}: {reports[sensor_id]}")
+        else:
+            LOGGER.error(
+                f"Entity {sensor_id} is not a UtilityManualTrackingSensor, unable to verify statistics."
+            )
+    return reports
+
+
+@callback
+def handle_get_meter_rollups(call: ServiceCall) -> ServiceResponse:
+    """Return daily or monthly consumption totals from the meters' rollups."""
+    period = call.data["period"]
+    key_format = "%Y-%m-%d" if period == DAILY else "%Y-%m"
+    start = call.data["start"].strftime(key_format) if "start" in call.data else None
+    end = call.data["end"].strftime(key_format) if "end" in call.data else None
+
+    entities = service.async_extract_referenced_entity_ids(call.hass, call)
+    response: dict[str, list] = {}
+    for sensor_id in entities.referenced:
+        sensor = call.hass.data.get(DOMAIN)[sensor_id]
+        if isinstance(sensor, UtilityManualTrackingSensor):
+            response[sensor_id] = sensor.rollups.totals(period, start, end)
+        else:
+            LOGGER.error(
+                f"Entity {sensor_id} is not a UtilityManualTrackingSensor, unable to get rollups."
+            )
+    return response
+
+
+async def handle_export_meter_data(call: ServiceCall) -> ServiceResponse:
+    """Write the readings and interpolated hourly series of meters to a file.
+
+    Records are generated and written one reading gap at a time in the
+    executor, so memory use does not grow with the history.
+    """
+    hass = call.hass
+    path = call.data["path"]
+    if not hass.config.is_allowed_path(path):
+        raise HomeAssistantError(
+            f"Cannot write to {path}, add its directory to allowlist_external_dirs"
+        )
+
+    sensors: list[UtilityManualTrackingSensor] = []
+    entities = service.async_extract_referenced_entity_ids(hass, call)
+    for sensor_id in entities.referenced:
+        sensor = hass.data.get(DOMAIN)[sensor_id]
+        if isinstance(sensor, UtilityManualTrackingSensor):
+            sensors.append(sensor)
+        else:
+            LOGGER.error(
+                f"Entity {sensor_id} is not a UtilityManualTrackingSensor, unable to export data."
+            )
+
+    # Snapshot the readings on the loop, the generators run in the executor
+    records = chain.from_iterable(
+        [sensor.iter_export_records(sensor.datapoints()) for sensor in sensors]
+    )
+    rows = await hass.async_add_executor_job(
+        write_records, records, path, call.data["format"]
+    )
+    LOGGER.info(f"Exported {rows} rows of {len(sensors)} meters to {path}")
+    return {"path": path, "rows": rows}
+
+
+async def async_cleanup_orphaned_statistics(
+    hass: HomeAssistant, dry_run: bool = False
+) -> list[str]:
+    """Clear this integration's statistics no configured meter writes to.
+
+    Returns the orphaned statistic IDs, which are only listed with `dry_run`.
+    """
+    orphaned = orphaned_statistic_ids(
+        await async_list_domain_statistic_ids(hass), live_statistic_ids(hass)
+    )
+    if orphaned and not dry_run:
+        clear_statistics_batched(hass, orphaned)
+        LOGGER.info(f"Cleared {len(orphaned)} orphaned statistics: {', '.join(orphaned)}")
+    return orphaned
+
+
+async def handle_cleanup_orphaned_statistics(call: ServiceCall) -> ServiceResponse:
+    """Handle the cleanup_orphaned_statistics service call."""
+    dry_run = call.data["dry_run"]
+    orphaned = await async_cleanup_orphaned_statistics(call.hass, dry_run)
+    return {"orphaned": orphaned, "cleared": 0 if dry_run else len(orphaned)}
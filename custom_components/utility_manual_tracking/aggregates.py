@@ -0,0 +1,90 @@
+"""Aggregations served to the Utilities dashboard panel.
+
+These replace the helpers the panel used to run in the browser
+(`statsToDaily`, `statsToHourlyHeatmap`, `currentMonthTotal`) so the
+websocket API can hand out the small aggregated result instead of every
+hourly row. Daily and monthly totals come from the meter's rollups; only
+the hour x weekday heatmap needs the hourly statistics.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, timezone, tzinfo
+from typing import Any, Iterable
+
+from custom_components.utility_manual_tracking.rollups import (
+    DAILY,
+    MONTHLY,
+    MeterRollups,
+)
+
+
+@dataclass(frozen=True)
+class HourlyChange:
+    """Consumption within a single hour."""
+
+    start: datetime
+    change: float
+
+
+def hourly_changes_from_rows(rows: Iterable[dict[str, Any]]) -> list[HourlyChange]:
+    """Convert recorder statistic rows (with `change`) to hourly changes."""
+    changes: list[HourlyChange] = []
+    for row in rows:
+        start = row["start"]
+        if not isinstance(start, datetime):
+            start = datetime.fromtimestamp(start, tz=timezone.utc)
+        changes.append(HourlyChange(start, row.get("change") or 0.0))
+    return changes
+
+
+def hourly_heatmap(
+    changes: Iterable[HourlyChange], tz: tzinfo
+) -> list[dict[str, float | int]]:
+    """Average consumption per (day of week, hour of day) cell.
+
+    Day of week follows the JavaScript convention (0 = Sunday) so the panel
+    can use the result as is.
+    """
+    grid: dict[tuple[int, int], list[float]] = {}
+    for item in changes:
+        local = item.start.astimezone(tz)
+        key = ((local.weekday() + 1) % 7, local.hour)
+        cell = grid.setdefault(key, [0.0, 0])
+        cell[0] += item.change
+        cell[1] += 1
+    return [
+        {"dayOfWeek": dow, "hour": hour, "value": round(total / count, 2)}
+        for (dow, hour), (total, count) in sorted(grid.items())
+    ]
+
+
+def _first_month(today: date, months: int) -> str:
+    """Key of the month `months - 1` months before the one `today` falls in."""
+    index = today.year * 12 + today.month - months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def compute_aggregates(
+    rollups: MeterRollups, start: datetime, months: int, tz: tzinfo, now: datetime
+) -> dict[str, Any]:
+    """Daily totals from `start`, the last `months` monthly totals and the month total.
+
+    Periods are local calendar days and months in `tz`; the day `start`
+    falls in is included.
+    """
+    today = now.astimezone(tz).date()
+    this_month = today.strftime("%Y-%m")
+    current = rollups.totals(MONTHLY, this_month, this_month)
+    return {
+        "daily": [
+            {"date": total["period"], "value": total["value"]}
+            for total in rollups.totals(DAILY, start.astimezone(tz).date().isoformat())
+        ],
+        "monthly": [
+            {"date": f"{total['period']}-01", "value": total["value"]}
+            for total in rollups.totals(MONTHLY, _first_month(today, months))
+        ],
+        "month_total": current[0]["value"] if current else 0.0,
+    }
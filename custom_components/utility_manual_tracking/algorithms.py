@@ -8,6 +8,8 @@ from dataclasses import dataclass
 from custom_components.utility_manual_tracking.fitter import (
     Datapoint,
     Extrapolate,
+    ExtrapolationFit,
+    IncrementalExtrapolate,
     Interpolate,
 )
 from custom_components.utility_manual_tracking.linear_fitter import (
@@ -18,6 +20,15 @@ from custom_components.utility_manual_tracking.device_aware_fitter import (
     DeviceAwareExtrapolate,
     DeviceAwareInterpolate,
 )
+from custom_components.utility_manual_tracking.least_squares_fitter import (
+    LeastSquaresExtrapolate,
+)
+from custom_components.utility_manual_tracking.pchip_fitter import PchipInterpolate
+from custom_components.utility_manual_tracking.memo import (
+    InterpolationMemo,
+    device_digest,
+)
+from custom_components.utility_manual_tracking.timebase import hour_range
 
 
 @dataclass(frozen=True)
@@ -31,26 +42,76 @@ class Algorithm:
 ALGORITHMS: dict[str, Algorithm] = {
     "linear": Algorithm(LinearInterpolate(), LinearExtrapolate()),
     "device_aware": Algorithm(DeviceAwareInterpolate(), DeviceAwareExtrapolate()),
+    # Statistics still go through the readings, only the sensor state uses the fit
+    "least_squares": Algorithm(
+        LinearInterpolate(),
+        LeastSquaresExtrapolate(half_life=datetime.timedelta(days=30)),
+    ),
+    # The sensor state keeps extrapolating from the last two readings
+    "pchip": Algorithm(PchipInterpolate(), LinearExtrapolate()),
 }
 
 DEFAULT_ALGORITHM = "linear"
 
+# Shared by every meter, see `memo`
+INTERPOLATION_MEMO = InterpolationMemo()
+
 
 def interpolate(
     algorithm: str,
     old_datapoints: list[Datapoint],
     new_datapoint: Datapoint,
-    device_hourly_consumption: dict[datetime.datetime, float] | None = None,
+    device_hourly_consumption: dict[int, float] | None = None,
+    following: Datapoint | None = None,
 ) -> list[Datapoint]:
-    """Interpolate a new datapoint based on old datapoints."""
+    """Interpolate a new datapoint based on old datapoints.
+
+    `following` is the reading after the new one, for interpolating a gap
+    inside the history (only used by algorithms that look ahead).
+    """
     if algorithm not in ALGORITHMS:
         algorithm = DEFAULT_ALGORITHM
+    if not old_datapoints:
+        return []
 
-    if algorithm == "device_aware" and device_hourly_consumption is not None:
+    fitter = ALGORITHMS[algorithm].interpolate
+    if algorithm != "device_aware":
+        device_hourly_consumption = None
+    if not fitter.LOOKAHEAD:
+        following = None
+    key = (
+        algorithm,
+        tuple(old_datapoints[-fitter.CONTEXT_READINGS :]),
+        new_datapoint,
+        following,
+        device_digest(
+            device_hourly_consumption,
+            hour_range(old_datapoints[-1].timestamp, new_datapoint.timestamp),
+        ),
+    )
+    missing_data = INTERPOLATION_MEMO.get(key)
+    if missing_data is not None:
+        return missing_data
+
+    if device_hourly_consumption is not None:
         fitter = DeviceAwareInterpolate(device_hourly_consumption)
-        return fitter.guesstimate(old_datapoints, new_datapoint)
+    missing_data = fitter.guesstimate(old_datapoints, new_datapoint, following)
+    INTERPOLATION_MEMO.put(key, missing_data)
+    return missing_data
+
+
+def looks_ahead(algorithm: str | None) -> bool:
+    """Whether a gap's rows change when a reading is added after it."""
+    if algorithm not in ALGORITHMS:
+        algorithm = DEFAULT_ALGORITHM
+    return ALGORITHMS[algorithm].interpolate.LOOKAHEAD
+
 
-    return ALGORITHMS[algorithm].interpolate.guesstimate(old_datapoints, new_datapoint)
+def context_readings(algorithm: str | None) -> int:
+    """Readings before a gap that its rows depend on."""
+    if algorithm not in ALGORITHMS:
+        algorithm = DEFAULT_ALGORITHM
+    return ALGORITHMS[algorithm].interpolate.CONTEXT_READINGS
 
 
 def extrapolate(
@@ -60,3 +121,19 @@ def extrapolate(
     if algorithm not in ALGORITHMS:
         algorithm = DEFAULT_ALGORITHM
     return ALGORITHMS[algorithm].extrapolate.guesstimate(datapoints, now)
+
+
+def extrapolation_fit(
+    algorithm: str | None,
+    datapoints: list[Datapoint],
+    stored: dict | None = None,
+) -> ExtrapolationFit | None:
+    """Build (or restore) the incremental fit of an algorithm, if it has one."""
+    if algorithm not in ALGORITHMS:
+        algorithm = DEFAULT_ALGORITHM
+    extrapolator = ALGORITHMS[algorithm].extrapolate
+    if not isinstance(extrapolator, IncrementalExtrapolate):
+        return None
+    if stored:
+        return extrapolator.restore(stored)
+    return extrapolator.fit(datapoints)
@@ -0,0 +1,142 @@
+"""Incremental forecast and anomaly detection for a meter.
+
+Every reading turns the gap since the previous reading into a consumption
+rate (per day). A sliding window of those rates keeps running sums for a
+least-squares regression (forecast) and for the mean/variance of the rates
+(z-score anomaly detection), so each new reading costs O(1) work.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+import math
+from typing import Any
+
+from custom_components.utility_manual_tracking.fitter import Datapoint
+
+SECONDS_PER_DAY = 86400.0
+DAYS_PER_MONTH = 30.44
+DAYS_PER_YEAR = 365.25
+
+
+class MeterAnalytics:
+    """Running regression and rolling statistics over consumption rates."""
+
+    WINDOW_SIZE = 30
+    ANOMALY_MIN_SAMPLES = 7
+
+    def __init__(
+        self,
+        origin: float | None = None,
+        window: list[list[float]] | None = None,
+        anomaly_zscore: float | None = None,
+    ) -> None:
+        # Regression x values are days since `origin` to keep the sums small
+        self._origin: float | None = origin
+        self._window: deque[tuple[float, float]] = deque(
+            (x, y) for x, y in (window or [])
+        )
+        self._anomaly_zscore: float | None = anomaly_zscore
+        self._n = 0
+        self._sum_x = 0.0
+        self._sum_y = 0.0
+        self._sum_xx = 0.0
+        self._sum_xy = 0.0
+        self._sum_yy = 0.0
+        for x, y in self._window:
+            self._accumulate(x, y, 1)
+
+    def _accumulate(self, x: float, y: float, sign: int) -> None:
+        self._n += sign
+        self._sum_x += sign * x
+        self._sum_y += sign * y
+        self._sum_xx += sign * x * x
+        self._sum_xy += sign * x * y
+        self._sum_yy += sign * y * y
+
+    def add_reading(self, previous: Datapoint, new: Datapoint) -> None:
+        """Account for the consumption between two consecutive readings."""
+        days = (new.timestamp - previous.timestamp).total_seconds() / SECONDS_PER_DAY
+        if days <= 0:
+            return
+        rate = (new.value - previous.value) / days
+
+        if self._origin is None:
+            self._origin = previous.timestamp.timestamp()
+        # Place the rate at the middle of the gap it was measured over
+        x = (previous.timestamp.timestamp() - self._origin) / SECONDS_PER_DAY + days / 2
+
+        # Score the new rate against the window before it joins it
+        self._anomaly_zscore = self._zscore(rate)
+
+        self._window.append((x, rate))
+        self._accumulate(x, rate, 1)
+        if len(self._window) > self.WINDOW_SIZE:
+            old_x, old_y = self._window.popleft()
+            self._accumulate(old_x, old_y, -1)
+
+    def _zscore(self, rate: float) -> float | None:
+        if self._n < self.ANOMALY_MIN_SAMPLES:
+            return None
+        mean = self._sum_y / self._n
+        variance = (self._sum_yy - self._n * mean * mean) / (self._n - 1)
+        if variance <= 0:
+            return 0.0
+        return (rate - mean) / math.sqrt(variance)
+
+    @property
+    def anomaly_zscore(self) -> float | None:
+        """Z-score of the latest consumption rate against the previous ones."""
+        return self._anomaly_zscore
+
+    def forecast(self) -> dict[str, float] | None:
+        """Return the regression forecast, or None without any data."""
+        if self._n == 0:
+            return None
+
+        latest_x = self._window[-1][0]
+        denominator = self._n * self._sum_xx - self._sum_x * self._sum_x
+        if self._n < 2 or denominator <= 0:
+            slope, intercept, r2 = 0.0, self._sum_y / self._n, 0.0
+        else:
+            slope = (self._n * self._sum_xy - self._sum_x * self._sum_y) / denominator
+            intercept = (self._sum_y - slope * self._sum_x) / self._n
+            spread_y = self._n * self._sum_yy - self._sum_y * self._sum_y
+            r2 = (
+                (self._n * self._sum_xy - self._sum_x * self._sum_y) ** 2
+                / (denominator * spread_y)
+                if spread_y > 0
+                else 0.0
+            )
+
+        daily_rate = max(0.0, slope * latest_x + intercept)
+        return {
+            "daily_rate": daily_rate,
+            "monthly": daily_rate * DAYS_PER_MONTH,
+            "annual": daily_rate * DAYS_PER_YEAR,
+            "trend_per_day": slope,
+            "confidence": min(1.0, max(0.0, r2)),
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        """Convert to dict."""
+        return {
+            "origin": self._origin,
+            "window": [list(point) for point in self._window],
+            "anomaly_zscore": self._anomaly_zscore,
+        }
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> MeterAnalytics:
+        """Convert from dict."""
+        return MeterAnalytics(
+            data.get("origin"), data.get("window"), data.get("anomaly_zscore")
+        )
+
+    @staticmethod
+    def from_datapoints(datapoints: list[Datapoint]) -> MeterAnalytics:
+        """Replay a list of readings, oldest first."""
+        analytics = MeterAnalytics()
+        for previous, new in zip(datapoints, datapoints[1:]):
+            analytics.add_reading(previous, new)
+        return analytics
@@ -0,0 +1,30 @@
+"""Finding statistics no meter writes to anymore.
+
+Statistic IDs embed the meter's unique ID and algorithm, so renaming a meter,
+switching its algorithm or removing it leaves its old statistic (and every
+hourly row of it) behind in the recorder.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+
+from custom_components.utility_manual_tracking.consts import DOMAIN
+
+CLEAR_BATCH_SIZE = 20
+
+
+def orphaned_statistic_ids(existing: Iterable[str], live: set[str]) -> list[str]:
+    """This domain's statistic IDs that are not live, sorted."""
+    prefix = f"{DOMAIN}:"
+    return sorted(
+        statistic_id
+        for statistic_id in existing
+        if statistic_id.startswith(prefix) and statistic_id not in live
+    )
+
+
+def batched(items: list[str], size: int = CLEAR_BATCH_SIZE) -> Iterator[list[str]]:
+    """Consecutive slices of at most `size` items."""
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
@@ -19,10 +19,19 @@ from homeassistant.helpers.selector import (
 from custom_components.utility_manual_tracking.consts import (
     CONF_ALGORITHM,
     CONF_KNOWN_DEVICE_ENTITIES,
+    CONF_MEMBER_ENTITIES,
     CONF_METER_CLASS,
     CONF_METER_NAME,
+    CONF_METER_TYPE,
     CONF_METER_UNIT,
+    CONF_RETENTION_DAILY_DAYS,
+    CONF_RETENTION_FULL_DAYS,
     DOMAIN,
+    METER_TYPE_VIRTUAL,
+)
+from custom_components.utility_manual_tracking.retention import (
+    DEFAULT_DAILY_DAYS,
+    DEFAULT_FULL_DAYS,
 )
 
 
@@ -39,6 +48,10 @@ class UtilityManualTrackingConfigFlow(ConfigFlow, domain=DOMAIN):
         return UtilityManualTrackingOptionsFlow(config_entry)
 
     async def async_step_user(self, user_input: dict[str, Any] | None = None):
+        """First step: a manually read meter or a virtual sum of meters."""
+        return self.async_show_menu(step_id="user", menu_options=["meter", "virtual"])
+
+    async def async_step_meter(self, user_input: dict[str, Any] | None = None):
         errors: dict[str, str] = {}
 
         if user_input is not None:
@@ -65,7 +78,7 @@ class UtilityManualTrackingConfigFlow(ConfigFlow, domain=DOMAIN):
                 )
 
         return self.async_show_form(
-            step_id="user",
+            step_id="meter",
             data_schema=vol.Schema(
                 {
                     vol.Required(CONF_METER_NAME): str,
@@ -73,7 +86,7 @@ class UtilityManualTrackingConfigFlow(ConfigFlow, domain=DOMAIN):
                     vol.Required(CONF_METER_CLASS): str,
                     vol.Optional(CONF_ALGORITHM, default="linear"): SelectSelector(
                         SelectSelectorConfig(
-                            options=["linear", "device_aware"],
+                            options=["linear", "device_aware", "least_squares", "pchip"],
                             mode=SelectSelectorMode.DROPDOWN,
                         )
                     ),
@@ -111,39 +124,81 @@ class UtilityManualTrackingConfigFlow(ConfigFlow, domain=DOMAIN):
             ),
         )
 
-
-class UtilityManualTrackingOptionsFlow(OptionsFlowWithConfigEntry):
-    """Options flow for reconfiguring known device entities."""
-
-    async def async_step_init(self, user_input: dict[str, Any] | None = None):
-        algorithm = self.config_entry.data.get(CONF_ALGORITHM, "linear")
-
-        if algorithm != "device_aware":
-            # No options to configure for linear algorithm
-            return self.async_create_entry(data={})
+    async def async_step_virtual(self, user_input: dict[str, Any] | None = None):
+        """Virtual meter summing existing meters."""
+        errors: dict[str, str] = {}
 
         if user_input is not None:
-            return self.async_create_entry(data=user_input)
-
-        current_entities = self.config_entry.options.get(
-            CONF_KNOWN_DEVICE_ENTITIES,
-            self.config_entry.data.get(CONF_KNOWN_DEVICE_ENTITIES, []),
-        )
+            if not user_input.get(CONF_MEMBER_ENTITIES):
+                errors["base"] = "virtual_members_required"
+            else:
+                return self.async_create_entry(
+                    title=user_input[CONF_METER_NAME],
+                    data={
+                        CONF_METER_TYPE: METER_TYPE_VIRTUAL,
+                        CONF_METER_NAME: user_input[CONF_METER_NAME],
+                        CONF_METER_UNIT: user_input[CONF_METER_UNIT],
+                        CONF_METER_CLASS: user_input[CONF_METER_CLASS],
+                        CONF_MEMBER_ENTITIES: user_input[CONF_MEMBER_ENTITIES],
+                    },
+                )
 
         return self.async_show_form(
-            step_id="init",
+            step_id="virtual",
             data_schema=vol.Schema(
                 {
-                    vol.Optional(
-                        CONF_KNOWN_DEVICE_ENTITIES,
-                        default=current_entities,
-                    ): EntitySelector(
+                    vol.Required(CONF_METER_NAME): str,
+                    vol.Required(CONF_METER_UNIT): str,
+                    vol.Required(CONF_METER_CLASS): str,
+                    vol.Required(CONF_MEMBER_ENTITIES): EntitySelector(
                         EntitySelectorConfig(
                             domain="sensor",
-                            device_class="energy",
+                            integration=DOMAIN,
                             multiple=True,
                         )
                     ),
                 }
             ),
+            errors=errors,
         )
+
+
+class UtilityManualTrackingOptionsFlow(OptionsFlowWithConfigEntry):
+    """Options flow for reading retention and known device entities."""
+
+    async def async_step_init(self, user_input: dict[str, Any] | None = None):
+        if self.config_entry.data.get(CONF_METER_TYPE) == METER_TYPE_VIRTUAL:
+            # Virtual meters keep no readings of their own
+            return self.async_create_entry(data={})
+
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        options = self.config_entry.options
+        schema: dict[Any, Any] = {
+            vol.Optional(
+                CONF_RETENTION_FULL_DAYS,
+                default=options.get(CONF_RETENTION_FULL_DAYS, DEFAULT_FULL_DAYS),
+            ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+            vol.Optional(
+                CONF_RETENTION_DAILY_DAYS,
+                default=options.get(CONF_RETENTION_DAILY_DAYS, DEFAULT_DAILY_DAYS),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+        }
+
+        if self.config_entry.data.get(CONF_ALGORITHM, "linear") == "device_aware":
+            current_entities = options.get(
+                CONF_KNOWN_DEVICE_ENTITIES,
+                self.config_entry.data.get(CONF_KNOWN_DEVICE_ENTITIES, []),
+            )
+            schema[
+                vol.Optional(CONF_KNOWN_DEVICE_ENTITIES, default=current_entities)
+            ] = EntitySelector(
+                EntitySelectorConfig(
+                    domain="sensor",
+                    device_class="energy",
+                    multiple=True,
+                )
+            )
+
+        return self.async_show_form(step_id="init", data_schema=vol.Schema(schema))
@@ -11,6 +11,18 @@ CONF_METER_UNIT = "meter_unit"
 CONF_METER_CLASS = "meter_class"
 CONF_ALGORITHM = "algorithm"
 CONF_KNOWN_DEVICE_ENTITIES = "known_device_entities"
+CONF_METER_TYPE = "meter_type"
+CONF_MEMBER_ENTITIES = "member_entities"
+CONF_RETENTION_FULL_DAYS = "retention_full_days"
+CONF_RETENTION_DAILY_DAYS = "retention_daily_days"
+# YAML option, sweeps orphaned statistics at startup and then daily
+CONF_CLEANUP_ORPHANED_STATISTICS = "cleanup_orphaned_statistics"
+
+METER_TYPE_VIRTUAL = "virtual"
+
+EVENT_REBUILD_PROGRESS = f"{DOMAIN}_rebuild_progress"
+# Dispatched with (entity_id, previous reading, rows) after a batch of readings is written
+SIGNAL_METER_ROWS_WRITTEN = f"{DOMAIN}_meter_rows_written"
 
 ATTRIBUTION = "Data provided by Amber Electric"
 
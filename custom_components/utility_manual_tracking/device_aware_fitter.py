@@ -11,11 +11,15 @@ from __future__ import annotations
 import datetime
 
 from custom_components.utility_manual_tracking.fitter import (
-    GRANULAR_DELTA,
     Datapoint,
     Extrapolate,
     Interpolate,
 )
+from custom_components.utility_manual_tracking.timebase import (
+    hour_datetime,
+    hour_index,
+    hour_range,
+)
 
 
 class DeviceAwareInterpolate(Interpolate):
@@ -25,17 +29,27 @@ class DeviceAwareInterpolate(Interpolate):
       consumption[h] = known_device[h] + base_load_per_hour
 
     Where base_load_per_hour = max(0, meter_delta - total_known) / num_hours.
+
+    Device consumption is keyed by hour index (see `timebase`); hour-aligned
+    datetime keys are accepted too and converted once.
     """
 
     def __init__(
-        self, device_hourly_consumption: dict[datetime.datetime, float] | None = None
+        self,
+        device_hourly_consumption: dict[int, float]
+        | dict[datetime.datetime, float]
+        | None = None,
     ) -> None:
-        self._device_hourly_consumption: dict[datetime.datetime, float] = (
-            device_hourly_consumption or {}
-        )
+        self._device_hourly_consumption: dict[int, float] = {
+            hour if isinstance(hour, int) else hour_index(hour): consumption
+            for hour, consumption in (device_hourly_consumption or {}).items()
+        }
 
     def guesstimate(
-        self, old_datapoints: list[Datapoint], new_datapoint: Datapoint
+        self,
+        old_datapoints: list[Datapoint],
+        new_datapoint: Datapoint,
+        following: Datapoint | None = None,
     ) -> list[Datapoint]:
         if len(old_datapoints) == 0:
             return []
@@ -43,13 +57,8 @@ class DeviceAwareInterpolate(Interpolate):
         latest_old = old_datapoints[-1]
         delta_v = new_datapoint.value - latest_old.value
 
-        # Build hour-aligned timestamps between latest_old and new_datapoint
-        hours: list[datetime.datetime] = []
-        current = latest_old.timestamp + GRANULAR_DELTA
-        while current < new_datapoint.timestamp:
-            hour_key = current.replace(minute=0, second=0, microsecond=0)
-            hours.append(hour_key)
-            current += GRANULAR_DELTA
+        # Hours between latest_old and new_datapoint
+        hours = hour_range(latest_old.timestamp, new_datapoint.timestamp)
 
         if not hours:
             return []
@@ -76,7 +85,7 @@ class DeviceAwareInterpolate(Interpolate):
         for i, h in enumerate(hours):
             consumption = known_per_hour[i] + base_per_hour
             cumulative += consumption
-            result.append(Datapoint(cumulative, h))
+            result.append(Datapoint(cumulative, hour_datetime(h, latest_old.timestamp)))
 
         return result
 
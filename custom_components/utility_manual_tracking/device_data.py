@@ -0,0 +1,110 @@
+"""Shared cache of known device consumption for statistics rebuilds."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from datetime import datetime
+import threading
+from typing import Callable, Iterable
+
+from custom_components.utility_manual_tracking.fitter import Datapoint
+from custom_components.utility_manual_tracking.memory import deep_sizeof
+from custom_components.utility_manual_tracking.timebase import hour_index, hour_range
+
+DeviceQuery = Callable[[datetime, datetime], dict[int, float]]
+
+
+class DeviceConsumptionCache:
+    """Hourly device consumption shared between meters and reading gaps.
+
+    Meters configured with the same device entities (and unit) share one
+    entry. Each entry covers a time span; a request inside it is answered
+    from memory, a request outside it refetches the union of both spans once.
+    Rebuilds run in executor threads, so entries are guarded by a lock.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: dict[
+            tuple[frozenset[str], str], tuple[datetime, datetime, dict[int, float]]
+        ] = {}
+        self._key_locks: dict[tuple[frozenset[str], str], threading.Lock] = {}
+        # Bytes of every entry, updated as entries are stored
+        self._entry_bytes: dict[tuple[frozenset[str], str], int] = {}
+        self._bytes = 0
+        self.queries = 0
+        self.hits = 0
+
+    def hourly_consumption(
+        self,
+        entities: list[str],
+        unit: str,
+        start: datetime,
+        end: datetime,
+        query: DeviceQuery,
+    ) -> dict[int, float]:
+        """Return hourly totals (by hour index) covering at least [start, end].
+
+        The returned dict may hold hours outside the requested span; fitters
+        only look up the hours of the gap they fill.
+        """
+        key = (frozenset(entities), unit)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Only one thread fetches a given device set, the others wait for it
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] <= start and end <= entry[1]:
+                    self.hits += 1
+                    return entry[2]
+
+            if entry is not None:
+                start, end = min(start, entry[0]), max(end, entry[1])
+            hourly = query(start, end)
+            # Sized here, in the querying thread, so reading the total is O(1)
+            size = deep_sizeof(hourly)
+            with self._lock:
+                self.queries += 1
+                self._entries[key] = (start, end, hourly)
+                self._bytes += size - self._entry_bytes.get(key, 0)
+                self._entry_bytes[key] = size
+            return hourly
+
+    def approximate_bytes(self) -> int:
+        """Memory held by the cached device data."""
+        with self._lock:
+            return self._bytes
+
+
+def gaps_with_device_data(
+    datapoints: list[Datapoint], hours: Iterable[int]
+) -> list[int]:
+    """Indices of the readings whose gap contains any of the given hours.
+
+    The gap of `datapoints[index]` is the run of hours interpolated between
+    it and the previous reading.
+    """
+    sorted_hours = sorted(hours)
+    gaps: list[int] = []
+    for index in range(1, len(datapoints)):
+        gap = hour_range(datapoints[index - 1].timestamp, datapoints[index].timestamp)
+        position = bisect_left(sorted_hours, gap.start)
+        if position < len(sorted_hours) and sorted_hours[position] < gap.stop:
+            gaps.append(index)
+    return gaps
+
+
+def uncompiled_hours(previous: Datapoint, reading: Datapoint, now: datetime) -> list[int]:
+    """Hours of a gap the recorder may not have compiled statistics for yet.
+
+    Hourly statistics are compiled shortly after an hour ends; the previous
+    hour is included too in case that has not happened yet at `now`.
+    """
+    first_uncompiled = hour_index(now) - 1
+    return [
+        hour
+        for hour in hour_range(previous.timestamp, reading.timestamp)
+        if hour >= first_uncompiled
+    ]
@@ -0,0 +1,35 @@
+"""Diagnostics support for Utility Manual Tracking."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from custom_components.utility_manual_tracking.algorithms import INTERPOLATION_MEMO
+from custom_components.utility_manual_tracking.consts import DOMAIN
+from custom_components.utility_manual_tracking.sensor import entry_entity_id
+from custom_components.utility_manual_tracking.statistics import RECORDER_PACER
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry, including the meter's memory use."""
+    entity_id = entry_entity_id(entry)
+    sensor = hass.data.get(DOMAIN, {}).get(entity_id)
+    if sensor is None:
+        return {"entity_id": entity_id, "loaded": False}
+
+    memory = sensor.memory_usage()
+    return {
+        "entity_id": entity_id,
+        "loaded": True,
+        "data": dict(entry.data),
+        "options": dict(entry.options),
+        "memory_bytes": {**memory, "total": sum(memory.values())},
+        # Shared by every meter
+        "interpolation_memo": INTERPOLATION_MEMO.stats(),
+        "recorder_pacing": RECORDER_PACER.as_dict(),
+    }
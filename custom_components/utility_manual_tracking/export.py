@@ -0,0 +1,73 @@
+"""Streaming export of readings and the hourly series interpolated between them.
+
+Records are produced one reading gap at a time and written as they come, so
+an export holds at most one gap in memory whatever the length of the history.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+from typing import Any, Iterable, Iterator
+
+from custom_components.utility_manual_tracking.fitter import Datapoint
+from custom_components.utility_manual_tracking.timebase import hour_index
+
+FORMAT_CSV = "csv"
+FORMAT_JSONL = "jsonl"
+EXPORT_FIELDS = ["entity_id", "timestamp", "kind", "value", "device", "base"]
+
+
+def gap_records(
+    entity_id: str,
+    previous: Datapoint | None,
+    interpolated: list[Datapoint],
+    reading: Datapoint,
+    device_hourly_consumption: dict[int, float] | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Records for the interpolated hours of a gap, followed by its reading.
+
+    With device consumption, each hour's consumption is split into the part
+    reported by known devices and the remaining base load.
+    """
+    last_value = previous.value if previous is not None else None
+    for datapoint in interpolated:
+        device = base = None
+        if device_hourly_consumption is not None and last_value is not None:
+            device = device_hourly_consumption.get(hour_index(datapoint.timestamp), 0.0)
+            base = max(0.0, datapoint.value - last_value - device)
+        yield {
+            "entity_id": entity_id,
+            "timestamp": datapoint.timestamp.isoformat(),
+            "kind": "interpolated",
+            "value": datapoint.value,
+            "device": device,
+            "base": base,
+        }
+        last_value = datapoint.value
+
+    yield {
+        "entity_id": entity_id,
+        "timestamp": reading.timestamp.isoformat(),
+        "kind": "reading",
+        "value": reading.value,
+        "device": None,
+        "base": None,
+    }
+
+
+def write_records(records: Iterable[dict[str, Any]], path: str, fmt: str) -> int:
+    """Write records to `path` as CSV or JSON lines, returns how many (blocking)."""
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        if fmt == FORMAT_CSV:
+            writer = csv.DictWriter(file, fieldnames=EXPORT_FIELDS)
+            writer.writeheader()
+            for record in records:
+                writer.writerow(record)
+                count += 1
+        else:
+            for record in records:
+                file.write(json.dumps(record) + "\n")
+                count += 1
+    return count
@@ -11,7 +11,7 @@ from datetime import datetime, timedelta
 GRANULAR_DELTA = timedelta(hours=1)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Datapoint:
     """Datapoint class."""
 
@@ -35,11 +35,22 @@ class Datapoint:
 
 
 class Interpolate(ABC):
+    # How many of the latest old datapoints the guess depends on
+    CONTEXT_READINGS = 1
+    # Whether the guess also depends on the datapoint following the new one
+    LOOKAHEAD = False
+
     @abstractmethod
     def guesstimate(
-        self, old_datapoints: list[Datapoint], new_datapoint: Datapoint
+        self,
+        old_datapoints: list[Datapoint],
+        new_datapoint: Datapoint,
+        following: Datapoint | None = None,
     ) -> Datapoint:
-        """Guess the values between new and old datapoints."""
+        """Guess the values between new and old datapoints.
+
+        `following` is the datapoint after the new one, if there already is one.
+        """
         pass
 
 
@@ -50,3 +61,41 @@ class Extrapolate(ABC):
     ) -> Datapoint:
         """Guess the value of now based on datapoints."""
         pass
+
+
+class ExtrapolationFit(ABC):
+    """Extrapolation state that is updated one datapoint at a time."""
+
+    @abstractmethod
+    def add(self, datapoint: Datapoint) -> None:
+        """Account for a new datapoint, newer than all previous ones."""
+        pass
+
+    @abstractmethod
+    def evaluate(self, now: datetime) -> Datapoint | None:
+        """Guess the value of now from the datapoints added so far."""
+        pass
+
+    @abstractmethod
+    def as_dict(self) -> dict:
+        """Convert to dict."""
+        pass
+
+
+class IncrementalExtrapolate(Extrapolate):
+    """Extrapolation backed by an `ExtrapolationFit` kept between readings."""
+
+    @abstractmethod
+    def fit(self, datapoints: list[Datapoint]) -> ExtrapolationFit:
+        """Build the fit from scratch."""
+        pass
+
+    @abstractmethod
+    def restore(self, data: dict) -> ExtrapolationFit:
+        """Restore a fit from its dict form."""
+        pass
+
+    def guesstimate(
+        self, datapoints: list[Datapoint], now: datetime
+    ) -> Datapoint:
+        return self.fit(datapoints).evaluate(now)
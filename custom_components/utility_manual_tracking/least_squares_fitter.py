@@ -0,0 +1,134 @@
+"""Least-squares extrapolation for the utility manual tracking component.
+
+Rather than the slope between the last two readings, this fitter uses the
+least-squares slope over all readings seen so far. The fit keeps running
+sums (Σw, Σwt, Σwv, Σwt², Σwtv) so adding a reading is O(1), and older
+readings can be faded out with an exponential decay. The line is anchored
+at the latest reading so the extrapolated value never jumps below it, which
+makes evaluating at `now` a single multiply-add.
+"""
+
+from __future__ import annotations
+
+import datetime
+from typing import Any
+
+from custom_components.utility_manual_tracking.fitter import (
+    GRANULAR_DELTA,
+    Datapoint,
+    ExtrapolationFit,
+    IncrementalExtrapolate,
+)
+
+_SECONDS_PER_HOUR = GRANULAR_DELTA.total_seconds()
+
+
+class LeastSquaresFit(ExtrapolationFit):
+    """Running (optionally decayed) least-squares fit of value over time."""
+
+    def __init__(self, half_life_hours: float | None = None) -> None:
+        self._half_life_hours = half_life_hours
+        # Hours are measured from the first reading to keep the sums small
+        self._origin: datetime.datetime | None = None
+        self._latest: Datapoint | None = None
+        self._sum_w = 0.0
+        self._sum_t = 0.0
+        self._sum_v = 0.0
+        self._sum_tt = 0.0
+        self._sum_tv = 0.0
+        self._slope = 0.0
+        self._intercept = 0.0
+
+    def _hours(self, timestamp: datetime.datetime) -> float:
+        return (timestamp - self._origin).total_seconds() / _SECONDS_PER_HOUR
+
+    def add(self, datapoint: Datapoint) -> None:
+        if self._origin is None:
+            self._origin = datapoint.timestamp
+        t = self._hours(datapoint.timestamp)
+
+        if self._half_life_hours and self._latest is not None:
+            elapsed = t - self._hours(self._latest.timestamp)
+            factor = 0.5 ** (elapsed / self._half_life_hours)
+            self._sum_w *= factor
+            self._sum_t *= factor
+            self._sum_v *= factor
+            self._sum_tt *= factor
+            self._sum_tv *= factor
+
+        self._sum_w += 1.0
+        self._sum_t += t
+        self._sum_v += datapoint.value
+        self._sum_tt += t * t
+        self._sum_tv += t * datapoint.value
+        self._latest = datapoint
+
+        denominator = self._sum_w * self._sum_tt - self._sum_t * self._sum_t
+        if denominator > 0:
+            self._slope = (
+                self._sum_w * self._sum_tv - self._sum_t * self._sum_v
+            ) / denominator
+        # Anchor the line at the latest reading
+        self._intercept = datapoint.value - self._slope * t
+
+    @property
+    def slope_per_hour(self) -> float:
+        """Fitted consumption per hour."""
+        return self._slope
+
+    def evaluate(self, now: datetime.datetime) -> Datapoint | None:
+        if self._latest is None:
+            return None
+        return Datapoint(self._intercept + self._slope * self._hours(now), now)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Convert to dict."""
+        return {
+            "half_life_hours": self._half_life_hours,
+            "origin": self._origin.isoformat() if self._origin else None,
+            "latest": self._latest.as_dict() if self._latest else None,
+            "sums": [
+                self._sum_w,
+                self._sum_t,
+                self._sum_v,
+                self._sum_tt,
+                self._sum_tv,
+            ],
+            "slope": self._slope,
+            "intercept": self._intercept,
+        }
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> LeastSquaresFit:
+        """Convert from dict."""
+        fit = LeastSquaresFit(data.get("half_life_hours"))
+        if data.get("origin"):
+            fit._origin = datetime.datetime.fromisoformat(data["origin"])
+        if data.get("latest"):
+            fit._latest = Datapoint.from_dict(data["latest"])
+        (
+            fit._sum_w,
+            fit._sum_t,
+            fit._sum_v,
+            fit._sum_tt,
+            fit._sum_tv,
+        ) = data["sums"]
+        fit._slope = data["slope"]
+        fit._intercept = data["intercept"]
+        return fit
+
+
+class LeastSquaresExtrapolate(IncrementalExtrapolate):
+    def __init__(self, half_life: datetime.timedelta | None = None) -> None:
+        self._half_life_hours = (
+            half_life.total_seconds() / _SECONDS_PER_HOUR if half_life else None
+        )
+
+    def fit(self, datapoints: list[Datapoint]) -> LeastSquaresFit:
+        fit = LeastSquaresFit(self._half_life_hours)
+        for datapoint in datapoints:
+            fit.add(datapoint)
+        return fit
+
+    def restore(self, data: dict[str, Any]) -> LeastSquaresFit:
+        return LeastSquaresFit.from_dict(data)
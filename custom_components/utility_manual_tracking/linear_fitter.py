@@ -9,11 +9,15 @@ from custom_components.utility_manual_tracking.fitter import (
     Extrapolate,
     Interpolate,
 )
+from custom_components.utility_manual_tracking.timebase import hours_between
 
 
 class LinearInterpolate(Interpolate):
     def guesstimate(
-        self, old_datapoints: list[Datapoint], new_datapoint: Datapoint
+        self,
+        old_datapoints: list[Datapoint],
+        new_datapoint: Datapoint,
+        following: Datapoint | None = None,
     ) -> list[Datapoint]:
         # Implement linear interpolation logic here
         if len(old_datapoints) == 0:
@@ -27,14 +31,17 @@ class LinearInterpolate(Interpolate):
         difference = new_datapoint.value - latest_old_datapoint.value
         slope = difference / difference_time
 
-        missing_datapoints: list[Datapoint] = []
-        missing_timestamp = latest_old_datapoint.timestamp + GRANULAR_DELTA
-        missing_value = latest_old_datapoint.value + slope
-        while missing_timestamp < new_datapoint.timestamp:
-            missing_datapoints.append(Datapoint(missing_value, missing_timestamp))
-            missing_timestamp += GRANULAR_DELTA
-            missing_value += slope
-        return missing_datapoints
+        return [
+            Datapoint(
+                latest_old_datapoint.value + slope * step,
+                latest_old_datapoint.timestamp + step * GRANULAR_DELTA,
+            )
+            for step in range(
+                1,
+                hours_between(latest_old_datapoint.timestamp, new_datapoint.timestamp)
+                + 1,
+            )
+        ]
 
 
 class LinearExtrapolate(Extrapolate):
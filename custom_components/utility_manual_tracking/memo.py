@@ -0,0 +1,135 @@
+"""Memo of interpolated gaps.
+
+Rebuilds, verification and exports interpolate the same gaps over and over
+while their inputs rarely change. A gap's rows only depend on the readings
+around it, the algorithm and the device consumption over its hours, so
+they are memoized under those. Rows are kept as the timestamp of the first
+one and an `array` of hourly values, and the least recently used gaps are
+evicted once the memo holds more than its byte budget. The memo is shared
+by every meter, so the budget grows with the number of meters (see
+`meter_budget_bytes`): a rebuild of the whole fleet then stays in it.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+import hashlib
+import sys
+import threading
+from typing import Any, Hashable
+
+from custom_components.utility_manual_tracking.fitter import (
+    GRANULAR_DELTA,
+    Datapoint,
+)
+
+DEFAULT_BUDGET_BYTES = 4 * 1024 * 1024
+# Two years of hourly rows take about 140 KB, with room for longer histories
+BUDGET_BYTES_PER_METER = 256 * 1024
+# Key, entry and bookkeeping of the ordered dict, besides the values
+_ENTRY_OVERHEAD = 256
+
+
+def device_digest(
+    device_hourly_consumption: dict[int, float] | None, hours: range
+) -> bytes | None:
+    """Digest of the device consumption over the hours of a gap."""
+    if device_hourly_consumption is None:
+        return None
+    values = array("d", (device_hourly_consumption.get(hour, 0.0) for hour in hours))
+    return hashlib.blake2b(values.tobytes(), digest_size=16).digest()
+
+
+def meter_budget_bytes(meters: int) -> int:
+    """Budget holding the gaps of `meters` meters, never under the default."""
+    return max(DEFAULT_BUDGET_BYTES, meters * BUDGET_BYTES_PER_METER)
+
+
+@dataclass(slots=True)
+class _Entry:
+    first: datetime
+    values: array
+    size: int
+
+
+class InterpolationMemo:
+    """Bounded LRU of interpolated gaps, with hit and miss counters."""
+
+    def __init__(self, budget_bytes: int = DEFAULT_BUDGET_BYTES) -> None:
+        self.budget_bytes = budget_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        # Gaps are interpolated on the event loop and in executor jobs
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> list[Datapoint] | None:
+        """Rows memoized under a key, None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return [
+            Datapoint(value, entry.first + step * GRANULAR_DELTA)
+            for step, value in enumerate(entry.values)
+        ]
+
+    def put(self, key: Hashable, rows: list[Datapoint]) -> None:
+        """Memoize rows, unless they are not one hour apart or too big to keep."""
+        if any(
+            rows[index].timestamp - rows[index - 1].timestamp != GRANULAR_DELTA
+            for index in range(1, len(rows))
+        ):
+            return
+        values = array("d", (row.value for row in rows))
+        size = sys.getsizeof(values) + _ENTRY_OVERHEAD
+        if size > self.budget_bytes:
+            return
+        first = rows[0].timestamp if rows else datetime.min
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[key] = _Entry(first, values, size)
+            self._bytes += size
+            self._evict()
+
+    def resize(self, budget_bytes: int) -> None:
+        """Change the byte budget, evicting what no longer fits."""
+        with self._lock:
+            self.budget_bytes = budget_bytes
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._bytes > self.budget_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every memoized gap, the counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Counters and size, for diagnostics."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "budget_bytes": self.budget_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
@@ -0,0 +1,36 @@
+"""Approximate memory accounting of meter state."""
+
+from __future__ import annotations
+
+from collections import deque
+import sys
+from typing import Any
+
+# Immutable singletons shared by everything, not worth attributing to a meter
+_SHARED = (type(None), bool, type)
+
+
+def deep_sizeof(obj: Any, seen: set[int] | None = None) -> int:
+    """Bytes held by an object and everything it references, counted once."""
+    if seen is None:
+        seen = set()
+    if isinstance(obj, _SHARED) or id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += deep_sizeof(key, seen) + deep_sizeof(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        for item in obj:
+            size += deep_sizeof(item, seen)
+    elif not isinstance(obj, (str, bytes, int, float)):
+        if hasattr(obj, "__dict__"):
+            size += deep_sizeof(vars(obj), seen)
+        for cls in type(obj).__mro__:
+            slots = getattr(cls, "__slots__", ())
+            for slot in (slots,) if isinstance(slots, str) else slots:
+                if hasattr(obj, slot):
+                    size += deep_sizeof(getattr(obj, slot), seen)
+    return size
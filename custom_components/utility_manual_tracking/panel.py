@@ -0,0 +1,96 @@
+"""Serving of the dashboard panel bundle under a content-hashed URL."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import hashlib
+import pathlib
+
+from aiohttp import hdrs, web
+
+from homeassistant.components.http import HomeAssistantView
+
+PANEL_URL = "/utility_manual_tracking/panel"
+PANEL_FRONTEND_PATH = pathlib.Path(__file__).parent / "frontend"
+PANEL_BUNDLE = "utility-dashboard-panel.js"
+
+# Precompressed siblings of the bundle, in order of preference
+COMPRESSED_VARIANTS = {"br": ".br", "gzip": ".gz"}
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@dataclass(frozen=True)
+class PanelBundle:
+    """The panel bundle, its content hash and precompressed variants."""
+
+    path: pathlib.Path
+    digest: str
+    variants: dict[str, pathlib.Path] = field(default_factory=dict)
+
+    @property
+    def url(self) -> str:
+        """Hashed URL of the bundle, changes whenever its content does."""
+        return f"{PANEL_URL}/{self.digest}/{self.path.name}"
+
+
+def load_panel_bundle(
+    directory: pathlib.Path = PANEL_FRONTEND_PATH, name: str = PANEL_BUNDLE
+) -> PanelBundle:
+    """Hash the bundle and look up its precompressed variants (blocking I/O)."""
+    path = directory / name
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()[:16]
+    variants = {
+        encoding: path.with_name(path.name + suffix)
+        for encoding, suffix in COMPRESSED_VARIANTS.items()
+        if path.with_name(path.name + suffix).is_file()
+    }
+    return PanelBundle(path, digest, variants)
+
+
+def accepted_encodings(accept_encoding: str) -> set[str]:
+    """Parse an Accept-Encoding header, ignoring encodings with q=0."""
+    encodings: set[str] = set()
+    for part in accept_encoding.split(","):
+        encoding, _, params = part.partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if encoding.strip():
+            encodings.add(encoding.strip().lower())
+    return encodings
+
+
+class PanelBundleView(HomeAssistantView):
+    """Serve the bundle with immutable cache headers under its hashed URL."""
+
+    url = PANEL_URL + "/{digest}/{filename}"
+    name = "utility_manual_tracking:panel_bundle"
+    requires_auth = False
+
+    def __init__(self, bundle: PanelBundle) -> None:
+        self._bundle = bundle
+
+    async def get(
+        self, request: web.Request, digest: str, filename: str
+    ) -> web.StreamResponse:
+        """Serve the best precompressed variant the client accepts."""
+        if digest != self._bundle.digest or filename != self._bundle.path.name:
+            raise web.HTTPNotFound
+
+        headers = {
+            hdrs.CACHE_CONTROL: IMMUTABLE_CACHE_CONTROL,
+            hdrs.CONTENT_TYPE: "text/javascript",
+            hdrs.VARY: hdrs.ACCEPT_ENCODING,
+        }
+        accepted = accepted_encodings(request.headers.get(hdrs.ACCEPT_ENCODING, ""))
+        for encoding in COMPRESSED_VARIANTS:
+            if encoding in accepted and encoding in self._bundle.variants:
+                headers[hdrs.CONTENT_ENCODING] = encoding
+                return web.FileResponse(
+                    self._bundle.variants[encoding], headers=headers
+                )
+        return web.FileResponse(self._bundle.path, headers=headers)
@@ -0,0 +1,122 @@
+"""Monotone piecewise cubic (PCHIP) fitter.
+
+Linear interpolation changes slope abruptly at every reading. Here every
+gap is a cubic Hermite curve through its two readings, with the slope at
+each reading chosen from its neighbouring gaps (Fritsch-Carlson): the
+weighted harmonic mean of the two secants, zero where the secants change
+sign. The curve is then monotone in every gap, as `total_increasing`
+statistics need, and has no slope jumps at readings.
+
+A reading's slope only depends on its two neighbours, so the curve of a
+gap depends on the readings before and after it, and appending a reading
+re-fits the gap before it and nothing else.
+"""
+
+from __future__ import annotations
+
+from custom_components.utility_manual_tracking.fitter import (
+    GRANULAR_DELTA,
+    Datapoint,
+    Interpolate,
+)
+from custom_components.utility_manual_tracking.timebase import hours_between
+
+
+def _seconds(start: Datapoint, end: Datapoint) -> float:
+    return (end.timestamp - start.timestamp).total_seconds()
+
+
+def _end_slope(width: float, secant: float, next_width: float, next_secant: float) -> float:
+    """Slope at an end reading, three-point estimate kept shape-preserving."""
+    slope = ((2 * width + next_width) * secant - width * next_secant) / (
+        width + next_width
+    )
+    if slope * secant <= 0:
+        return 0.0
+    if secant * next_secant < 0 and abs(slope) > 3 * abs(secant):
+        return 3 * secant
+    return slope
+
+
+def pchip_slopes(datapoints: list[Datapoint]) -> list[float]:
+    """Slope (per second) at every reading, in one pass over the readings."""
+    if len(datapoints) < 2:
+        return [0.0] * len(datapoints)
+
+    widths = [
+        _seconds(datapoints[index - 1], datapoints[index])
+        for index in range(1, len(datapoints))
+    ]
+    secants = [
+        (datapoints[index + 1].value - datapoints[index].value) / widths[index]
+        for index in range(len(widths))
+    ]
+    if len(secants) == 1:
+        return [secants[0], secants[0]]
+
+    slopes = [_end_slope(widths[0], secants[0], widths[1], secants[1])]
+    for index in range(1, len(secants)):
+        before, after = secants[index - 1], secants[index]
+        if before * after <= 0:
+            slopes.append(0.0)
+            continue
+        # Weighted harmonic mean, favouring the shorter gap
+        weight_before = 2 * widths[index] + widths[index - 1]
+        weight_after = widths[index] + 2 * widths[index - 1]
+        slopes.append(
+            (weight_before + weight_after)
+            / (weight_before / before + weight_after / after)
+        )
+    slopes.append(_end_slope(widths[-1], secants[-1], widths[-2], secants[-2]))
+    return slopes
+
+
+def hermite(start: Datapoint, end: Datapoint, slopes: tuple[float, float], at: float) -> float:
+    """Value of the gap's cubic `at` seconds after its start reading."""
+    width = _seconds(start, end)
+    t = at / width
+    t2, t3 = t * t, t * t * t
+    return (
+        (2 * t3 - 3 * t2 + 1) * start.value
+        + (t3 - 2 * t2 + t) * width * slopes[0]
+        + (-2 * t3 + 3 * t2) * end.value
+        + (t3 - t2) * width * slopes[1]
+    )
+
+
+class PchipInterpolate(Interpolate):
+    """Interpolate a gap with the monotone cubic through its neighbourhood."""
+
+    CONTEXT_READINGS = 2
+    LOOKAHEAD = True
+
+    def guesstimate(
+        self,
+        old_datapoints: list[Datapoint],
+        new_datapoint: Datapoint,
+        following: Datapoint | None = None,
+    ) -> list[Datapoint]:
+        if len(old_datapoints) == 0:
+            return []
+
+        start = old_datapoints[-1]
+        window = old_datapoints[-2:] + [new_datapoint]
+        if following is not None:
+            window.append(following)
+        slopes = pchip_slopes(window)
+        first = len(old_datapoints[-2:]) - 1
+
+        return [
+            Datapoint(
+                hermite(
+                    start,
+                    new_datapoint,
+                    (slopes[first], slopes[first + 1]),
+                    (step * GRANULAR_DELTA).total_seconds(),
+                ),
+                start.timestamp + step * GRANULAR_DELTA,
+            )
+            for step in range(
+                1, hours_between(start.timestamp, new_datapoint.timestamp) + 1
+            )
+        ]
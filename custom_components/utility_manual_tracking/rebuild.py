@@ -0,0 +1,129 @@
+"""Progress tracking and pacing of statistics rebuilds."""
+
+from __future__ import annotations
+
+import asyncio
+from bisect import bisect_right
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import datetime
+
+from custom_components.utility_manual_tracking.fitter import Datapoint
+
+
+@dataclass
+class RebuildProgress:
+    """Progress of a statistics rebuild, published as an event."""
+
+    entity_id: str
+    gaps_total: int
+    gaps_done: int = 0
+    rows_written: int = 0
+    state: str = "running"
+    max_loop_block_ms: float = 0.0
+
+    def as_dict(self) -> dict[str, str | int | float]:
+        """Convert to dict."""
+        return asdict(self)
+
+
+class ChunkPacer:
+    """Size statistics chunks so writing one blocks the event loop briefly.
+
+    After each chunk the time it held the loop is recorded; the next chunk
+    shrinks when over budget and grows (up to `max_rows`) when well under.
+    """
+
+    def __init__(
+        self,
+        budget_seconds: float = 0.02,
+        chunk_rows: int = 500,
+        min_rows: int = 24,
+        max_rows: int = 5000,
+    ) -> None:
+        self.budget_seconds = budget_seconds
+        self.chunk_rows = chunk_rows
+        self.min_rows = min_rows
+        self.max_rows = max_rows
+        self.max_block_seconds = 0.0
+
+    def record(self, elapsed: float, rows: int) -> None:
+        """Account for a chunk of `rows` that held the loop for `elapsed` seconds."""
+        self.max_block_seconds = max(self.max_block_seconds, elapsed)
+        if elapsed > self.budget_seconds:
+            # Aim a bit below the budget to avoid oscillating around it
+            target = int(rows * self.budget_seconds / elapsed * 0.8)
+            self.chunk_rows = max(self.min_rows, target)
+        elif elapsed < self.budget_seconds / 2 and rows >= self.chunk_rows:
+            self.chunk_rows = min(self.max_rows, self.chunk_rows * 2)
+
+
+class BacklogPacer:
+    """Delay statistics writes while the recorder queue is backed up.
+
+    Every write first checks the backlog: above `threshold` the delay doubles
+    (from `min_delay`, up to `max_delay`) and the write waits until the
+    backlog is back under it, below half the threshold the delay halves and
+    drops to zero once under `min_delay`. Writers thus settle on the rate the
+    recorder keeps up with, and write right away when it is idle.
+    """
+
+    def __init__(
+        self,
+        threshold: int = 1000,
+        min_delay: float = 0.05,
+        max_delay: float = 5.0,
+        max_wait: float = 60.0,
+    ) -> None:
+        self.threshold = threshold
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.max_wait = max_wait
+        self.delay = 0.0
+        self.backlog = 0
+        self.waited_seconds = 0.0
+
+    def record(self, backlog: int) -> float:
+        """Account for the current backlog, returns the delay before writing."""
+        self.backlog = backlog
+        if backlog > self.threshold:
+            self.delay = min(self.max_delay, max(self.min_delay, self.delay * 2))
+        elif backlog < self.threshold / 2:
+            self.delay /= 2
+            if self.delay < self.min_delay:
+                self.delay = 0.0
+        return self.delay
+
+    async def async_wait(self, backlog: Callable[[], int]) -> float:
+        """Wait before a write, returns the seconds waited.
+
+        Gives up after `max_wait` seconds so a stuck recorder does not stall
+        writers forever; the write is then queued anyway.
+        """
+        waited = 0.0
+        while (delay := self.record(backlog())) > 0:
+            await asyncio.sleep(delay)
+            waited += delay
+            if self.backlog <= self.threshold or waited >= self.max_wait:
+                break
+        self.waited_seconds += waited
+        return waited
+
+    def as_dict(self) -> dict[str, float | int]:
+        """Current pacing, for diagnostics."""
+        return {
+            "delay_seconds": self.delay,
+            "backlog": self.backlog,
+            "threshold": self.threshold,
+            "waited_seconds": round(self.waited_seconds, 3),
+        }
+
+
+def checkpoint_index(datapoints: list[Datapoint], since: datetime) -> int | None:
+    """Index of the last reading at or before `since`, None if there is none.
+
+    Statistics up to that reading's hour do not depend on later readings, so
+    a rebuild from `since` can start there and keep everything before it.
+    """
+    index = bisect_right([datapoint.timestamp for datapoint in datapoints], since) - 1
+    return index if index >= 0 else None
@@ -0,0 +1,71 @@
+"""Tiered retention of meter readings.
+
+Recent readings are all kept. Older ones are compacted to one anchor per
+local day, and past that to one anchor per week. An anchor is the last
+reading of its period, so the cumulative value at every period boundary
+(what daily/weekly totals and the statistics sums there depend on) survives
+compaction; only readings inside a period are dropped.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, tzinfo
+
+from custom_components.utility_manual_tracking.fitter import Datapoint
+
+DEFAULT_FULL_DAYS = 30
+DEFAULT_DAILY_DAYS = 365
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """Days of full history, then of daily anchors; weekly anchors after that."""
+
+    full_days: int = DEFAULT_FULL_DAYS
+    daily_days: int = DEFAULT_DAILY_DAYS
+
+    def period(
+        self, timestamp: datetime, now: datetime, tz: tzinfo
+    ) -> tuple[int, int, int] | None:
+        """Period a reading is compacted into, None while it is kept as is."""
+        age = now - timestamp
+        if age <= timedelta(days=self.full_days):
+            return None
+        local = timestamp.astimezone(tz)
+        if age <= timedelta(days=self.full_days + self.daily_days):
+            return (0, local.toordinal(), 0)
+        year, week, _ = local.isocalendar()
+        return (1, year, week)
+
+
+def compact(
+    datapoints: list[Datapoint], now: datetime, policy: RetentionPolicy, tz: tzinfo
+) -> list[Datapoint]:
+    """Readings kept by the policy, oldest first. The latest one is always kept."""
+    kept: list[Datapoint] = []
+    previous_period: tuple[int, int, int] | None = None
+    # Newest first, so the first reading seen in a period is its last one
+    for index, datapoint in enumerate(reversed(datapoints)):
+        period = policy.period(datapoint.timestamp, now, tz)
+        if index == 0 or period is None or period != previous_period:
+            kept.append(datapoint)
+        previous_period = period
+    kept.reverse()
+    return kept
+
+
+def compaction_boundary(
+    datapoints: list[Datapoint], kept: list[Datapoint]
+) -> datetime | None:
+    """Timestamp of the first kept reading after the last dropped one.
+
+    Statistics up to it were interpolated from readings that are gone, so
+    they can no longer be rebuilt (or checked) from the kept anchors. None
+    when nothing was dropped.
+    """
+    kept_timestamps = {datapoint.timestamp for datapoint in kept}
+    for index in range(len(datapoints) - 1, -1, -1):
+        if datapoints[index].timestamp not in kept_timestamps:
+            return datapoints[index + 1].timestamp
+    return None
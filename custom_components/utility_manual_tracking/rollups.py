@@ -0,0 +1,104 @@
+"""Daily and monthly rollups of a meter, maintained as statistics are written.
+
+Statistics sums are the cumulative meter value, so a period's consumption is
+the difference between its last sum and the last sum of the period before.
+Rollups keep only that last (hour, sum) per local day and month; every
+statistics batch updates the periods its hours fall in, and totals for long
+ranges are read from a few hundred entries instead of every hourly row.
+"""
+
+from __future__ import annotations
+
+from datetime import date, tzinfo
+from typing import Any, Iterable
+
+from custom_components.utility_manual_tracking.fitter import Datapoint
+from custom_components.utility_manual_tracking.timebase import (
+    hour_datetime,
+    hour_index,
+)
+
+DAILY = "daily"
+MONTHLY = "monthly"
+
+
+class MeterRollups:
+    """Last cumulative sum per local day and month, plus the earliest sum."""
+
+    def __init__(self) -> None:
+        # Period key -> (hour index, sum) of the latest hour written in it
+        self.days: dict[str, tuple[int, float]] = {}
+        self.months: dict[str, tuple[int, float]] = {}
+        # Earliest hour written, the baseline of the first period
+        self.origin: tuple[int, float] | None = None
+
+    def clear(self) -> None:
+        """Forget everything, e.g. before the statistics are rebuilt."""
+        self.days = {}
+        self.months = {}
+        self.origin = None
+
+    def add_rows(self, rows: Iterable[Datapoint], tz: tzinfo) -> None:
+        """Account for statistics rows written, in local time `tz`.
+
+        Like the recorder, a later write of an hour replaces the earlier one.
+        """
+        day_of_hour: dict[int, date] = {}
+        for row in rows:
+            hour = hour_index(row.timestamp)
+            day = day_of_hour.get(hour)
+            if day is None:
+                day = day_of_hour[hour] = hour_datetime(hour).astimezone(tz).date()
+            entry = (hour, row.value)
+            _keep_latest(self.days, day.isoformat(), entry)
+            _keep_latest(self.months, day.strftime("%Y-%m"), entry)
+            if self.origin is None or hour <= self.origin[0]:
+                self.origin = entry
+
+    def totals(
+        self, period: str, start: str | None = None, end: str | None = None
+    ) -> list[dict[str, float | str]]:
+        """Consumption per period (`daily` or `monthly`), oldest first.
+
+        `start` and `end` are inclusive period keys (`YYYY-MM-DD` or `YYYY-MM`).
+        """
+        entries = self.days if period == DAILY else self.months
+        if self.origin is None:
+            return []
+        previous = self.origin[1]
+        totals: list[dict[str, float | str]] = []
+        for key in sorted(entries):
+            value = entries[key][1]
+            if (start is None or key >= start) and (end is None or key <= end):
+                totals.append({"period": key, "value": round(value - previous, 3)})
+            previous = value
+        return totals
+
+    def as_dict(self) -> dict[str, Any]:
+        """Convert to dict."""
+        return {
+            "days": {key: list(entry) for key, entry in self.days.items()},
+            "months": {key: list(entry) for key, entry in self.months.items()},
+            "origin": list(self.origin) if self.origin is not None else None,
+        }
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> MeterRollups:
+        """Create from dict."""
+        rollups = MeterRollups()
+        rollups.days = {key: (int(h), float(v)) for key, (h, v) in data["days"].items()}
+        rollups.months = {
+            key: (int(h), float(v)) for key, (h, v) in data["months"].items()
+        }
+        if data.get("origin") is not None:
+            hour, value = data["origin"]
+            rollups.origin = (int(hour), float(value))
+        return rollups
+
+
+def _keep_latest(
+    entries: dict[str, tuple[int, float]], key: str, entry: tuple[int, float]
+) -> None:
+    current = entries.get(key)
+    if current is None or entry[0] >= current[0]:
+        entries[key] = entry
@@ -6,31 +6,87 @@ import asyncio
 
 from datetime import datetime, timezone
 import json
+import time
+from typing import Any, Iterator
+
+from homeassistant.components.recorder.const import (
+    EVENT_RECORDER_HOURLY_STATISTICS_GENERATED,
+)
 from homeassistant.components.sensor import SensorEntity, SensorStateClass
-from homeassistant.core import HomeAssistant
+from homeassistant.core import Event, HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.dispatcher import (
+    async_dispatcher_connect,
+    async_dispatcher_send,
+)
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
 
 from custom_components.utility_manual_tracking.algorithms import (
     DEFAULT_ALGORITHM,
+    context_readings,
     extrapolate,
+    extrapolation_fit,
     interpolate,
+    looks_ahead,
 )
+from custom_components.utility_manual_tracking.analytics import MeterAnalytics
 from custom_components.utility_manual_tracking.consts import (
     CONF_ALGORITHM,
     CONF_KNOWN_DEVICE_ENTITIES,
+    CONF_MEMBER_ENTITIES,
     CONF_METER_CLASS,
     CONF_METER_NAME,
+    CONF_METER_TYPE,
     CONF_METER_UNIT,
+    CONF_RETENTION_DAILY_DAYS,
+    CONF_RETENTION_FULL_DAYS,
     DOMAIN,
+    EVENT_REBUILD_PROGRESS,
     LOGGER,
+    METER_TYPE_VIRTUAL,
+    SIGNAL_METER_ROWS_WRITTEN,
+)
+from custom_components.utility_manual_tracking.device_data import (
+    DeviceConsumptionCache,
+    gaps_with_device_data,
+    uncompiled_hours,
+)
+from custom_components.utility_manual_tracking.export import gap_records
+from custom_components.utility_manual_tracking.fitter import (
+    Datapoint,
+    ExtrapolationFit,
+)
+from custom_components.utility_manual_tracking.memory import deep_sizeof
+from custom_components.utility_manual_tracking.rebuild import (
+    ChunkPacer,
+    RebuildProgress,
+    checkpoint_index,
+)
+from custom_components.utility_manual_tracking.retention import (
+    RetentionPolicy,
+    compact,
+    compaction_boundary,
 )
-from custom_components.utility_manual_tracking.fitter import Datapoint
+from custom_components.utility_manual_tracking.rollups import MeterRollups
 from custom_components.utility_manual_tracking.statistics import (
-    backfill_statistics,
-    reset_statistics,
+    RecorderStatistics,
+    get_statistics_id,
 )
+from custom_components.utility_manual_tracking.statistics_backend import (
+    StatisticsBackend,
+)
+from custom_components.utility_manual_tracking.timebase import (
+    hour_datetime,
+    hour_index,
+)
+from custom_components.utility_manual_tracking.verify import (
+    expected_sums,
+    find_mismatches,
+    group_ranges,
+)
+from custom_components.utility_manual_tracking.virtual import VirtualMeterWindow
 
 
 async def async_setup_entry(
@@ -38,6 +94,22 @@ async def async_setup_entry(
     entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
+    if entry.data.get(CONF_METER_TYPE) == METER_TYPE_VIRTUAL:
+        virtual = VirtualMeterSensor(
+            hass,
+            entry.data[CONF_METER_NAME],
+            entry.data[CONF_METER_UNIT],
+            entry.data[CONF_METER_CLASS],
+            entry.data[CONF_MEMBER_ENTITIES],
+        )
+        await virtual._load_attributes()
+        hass.data.get(DOMAIN)[virtual.entity_id] = virtual
+        LOGGER.info(
+            f"Setting up virtual meter: {virtual.entity_id} summing {virtual.member_entities}"
+        )
+        async_add_entities([virtual])
+        return
+
     # Options override data for known devices (allows reconfiguration)
     known_devices = entry.options.get(
         CONF_KNOWN_DEVICE_ENTITIES,
@@ -51,6 +123,7 @@ async def async_setup_entry(
         entry.data[CONF_METER_CLASS],
         entry.data.get(CONF_ALGORITHM),
         known_devices,
+        retention_policy(entry),
     )
     await sensor._load_attributes()
     hass.data.get(DOMAIN)[sensor.entity_id] = sensor
@@ -61,8 +134,53 @@ async def async_setup_entry(
     async_add_entities([sensor])
 
 
+def meter_unique_id(meter_name: str, meter_class: str) -> str:
+    """Unique ID of the sensor created for a meter."""
+    return f"{DOMAIN}_{meter_name.lower().replace(' ', '_')}_{meter_class.lower()}"
+
+
+def retention_policy(entry: ConfigEntry) -> RetentionPolicy:
+    """Retention of a meter's readings, from the entry options."""
+    return RetentionPolicy(
+        entry.options.get(CONF_RETENTION_FULL_DAYS, RetentionPolicy.full_days),
+        entry.options.get(CONF_RETENTION_DAILY_DAYS, RetentionPolicy.daily_days),
+    )
+
+
+def entry_entity_id(entry: ConfigEntry) -> str:
+    """Entity ID of the sensor created for a config entry."""
+    return f"sensor.{meter_unique_id(entry.data[CONF_METER_NAME], entry.data[CONF_METER_CLASS])}"
+
+
+def live_statistic_ids(hass: HomeAssistant) -> set[str]:
+    """Statistic IDs of every configured meter, loaded or not."""
+    live: set[str] = set()
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        # Ignored discoveries have no meter
+        if CONF_METER_NAME not in entry.data:
+            continue
+        unique_id = meter_unique_id(entry.data[CONF_METER_NAME], entry.data[CONF_METER_CLASS])
+        if entry.data.get(CONF_METER_TYPE) == METER_TYPE_VIRTUAL:
+            live.add(get_statistics_id(unique_id, VirtualMeterSensor.ALGORITHM))
+        else:
+            algorithm = entry.data.get(CONF_ALGORITHM)
+            live.add(
+                get_statistics_id(
+                    unique_id, algorithm.lower() if algorithm else DEFAULT_ALGORITHM
+                )
+            )
+    # A loaded meter keeps the algorithm it was first set up with
+    for sensor in hass.data.get(DOMAIN, {}).values():
+        if isinstance(sensor, UtilityManualTrackingSensor):
+            live.add(get_statistics_id(sensor.unique_id, sensor.algorithm))
+    return live
+
+
 class UtilityManualTrackingSensor(SensorEntity):
+    # Readings exposed in the `previous_reads` attribute, the store keeps the history
     MAX_PREVIOUS_READS = 10
+    # New readings between two compactions of the history
+    COMPACT_EVERY = 24
 
     def __init__(
         self,
@@ -72,11 +190,11 @@ class UtilityManualTrackingSensor(SensorEntity):
         meter_class: str,
         algorithm: str | None,
         known_device_entities: list[str] | None = None,
+        retention: RetentionPolicy | None = None,
+        statistics: StatisticsBackend | None = None,
     ) -> None:
         super().__init__()
-        self._attr_unique_id = (
-            f"{DOMAIN}_{meter_name.lower().replace(' ', '_')}_{meter_class.lower()}"
-        )
+        self._attr_unique_id = meter_unique_id(meter_name, meter_class)
         self._attr_name = meter_name
         self._attr_device_class = meter_class
         self._attr_native_unit_of_measurement = meter_unit
@@ -88,138 +206,423 @@ class UtilityManualTrackingSensor(SensorEntity):
         self._last_updated: datetime | None = None
         self._previous_reads: list[dict[str, float | str]] = []
         self._known_device_entities: list[str] = known_device_entities or []
+        # device_aware hours estimated before the recorder compiled device statistics
+        self._uncompiled_hours: set[int] = set()
+        self._retention = retention or RetentionPolicy()
+        self._readings_since_compaction = 0
+        # Statistics up to this reading came from readings dropped by compaction
+        self._compacted_until: datetime | None = None
+        self._analytics = MeterAnalytics()
+        # Only set for algorithms that extrapolate from an incremental fit
+        self._extrapolation_fit: ExtrapolationFit | None = extrapolation_fit(
+            self._algorithm, []
+        )
+        # Dashboard aggregates served over the websocket API, dropped on every write
+        self.aggregates_cache: dict[tuple[int, str, int, bool], dict[str, Any]] = {}
+        # Daily/monthly totals, updated with every statistics write
+        self._rollups = MeterRollups()
+        self._rebuild_task: asyncio.Task[int] | None = None
+        # Readings waiting for the writer, and the lock serializing writes/rebuilds
+        self._pending_readings: list[tuple[Datapoint, asyncio.Future[None]]] = []
+        self._writer_task: asyncio.Task[None] | None = None
+        self._write_lock = asyncio.Lock()
+        # Device data held by the last rebuild, released when it finished
+        self._device_cache_bytes = 0
+        self._statistics = statistics or RecorderStatistics(hass)
         self._store = Store[dict](
             hass, 1, self._attr_unique_id, private=True, atomic_writes=True
         )
 
+    @property
+    def algorithm(self) -> str:
+        """Return the algorithm used to fill in the statistics."""
+        return self._algorithm
+
+    @property
+    def rollups(self) -> MeterRollups:
+        """Return the daily and monthly rollups of the statistics."""
+        return self._rollups
+
+    def _invalidate_aggregates(self) -> None:
+        """Drop cached dashboard aggregates after the statistics changed."""
+        self.aggregates_cache = {}
+
+    async def _async_backfill(
+        self, rows: list[Datapoint], previous: Datapoint | None = None
+    ) -> int:
+        """Write rows to the statistics and roll them up, returns the row count.
+
+        `previous` is the reading before new rows, for virtual meters.
+        """
+        await self._statistics.async_wait_ready()
+        return await self._async_write_rows(rows, previous)
+
+    async def _async_write_rows(
+        self, rows: list[Datapoint], previous: Datapoint | None = None
+    ) -> int:
+        """`_async_backfill` without waiting for the statistics backend first."""
+        written = await self._statistics.async_write(
+            self.unique_id,
+            self._attr_name,
+            self._attr_native_unit_of_measurement,
+            self._algorithm,
+            rows,
+        )
+        self._rollups.add_rows(rows, dt_util.get_default_time_zone())
+        self._invalidate_aggregates()
+        # Virtual meters summing this one apply new and rewritten hours alike
+        async_dispatcher_send(
+            self.hass, SIGNAL_METER_ROWS_WRITTEN, self.entity_id, previous, rows
+        )
+        return written
+
     def _query_device_consumption(
-        self, start_time: datetime, end_time: datetime
-    ) -> dict[datetime, float]:
-        """Query HA recorder for hourly consumption of known device entities.
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        entities: list[str] | None = None,
+    ) -> dict[int, float]:
+        """Query the statistics backend for hourly consumption of known device entities.
 
-        Returns a dict mapping hour-aligned UTC datetimes to total consumption
-        (kWh) across all known device entities for that hour.
+        Returns a dict mapping hour indices (see `timebase`) to total
+        consumption (kWh) across all known device entities (or the given
+        `entities`) for that hour.
         """
-        if not self._known_device_entities:
+        if entities is None:
+            entities = self._known_device_entities
+        if not entities:
             return {}
 
         try:
-            from homeassistant.components.recorder.statistics import (
-                statistics_during_period,
-            )
-
-            stats = statistics_during_period(
-                self.hass,
-                start_time,
-                end_time,
-                set(self._known_device_entities),
-                "hour",
-                {"energy": self._attr_native_unit_of_measurement},
-                {"change"},
+            return self._statistics.device_consumption(
+                entities, self._attr_native_unit_of_measurement, start_time, end_time
             )
-
-            # Aggregate per-hour consumption across all devices
-            hourly_totals: dict[datetime, float] = {}
-            for entity_id, rows in stats.items():
-                for row in rows:
-                    start = row["start"]
-                    if isinstance(start, datetime):
-                        hour_dt = start
-                    else:
-                        hour_dt = datetime.fromtimestamp(start, tz=timezone.utc)
-                    hour_key = hour_dt.replace(minute=0, second=0, microsecond=0)
-                    change = row.get("change")
-                    if change is not None and change > 0:
-                        hourly_totals[hour_key] = hourly_totals.get(hour_key, 0.0) + change
-
-            return hourly_totals
         except Exception:
             LOGGER.warning(
                 "Failed to query device statistics for %s, falling back to even distribution",
-                self._known_device_entities,
+                entities,
                 exc_info=True,
             )
             return {}
 
-    def set_value(self, value, date_utc) -> None:
-        """Update the sensor state."""
-        if self._last_read_value:
-            if self._last_updated >= date_utc:
-                raise ValueError(
-                    f"New reading {date_utc} cannot be earlier than the last read {self._last_updated}"
-                )
+    def datapoints(self) -> list[Datapoint]:
+        """All stored readings, oldest first."""
+        if self._last_read_value is None:
+            return []
+        return [Datapoint.from_dict(read) for read in self._previous_reads] + [
+            Datapoint(self._last_read_value, self._last_updated)
+        ]
 
-            self._previous_reads.append(
-                Datapoint(self._last_read_value, self._last_updated).as_dict()
+    async def async_submit_reading(self, value: float, date_utc: datetime) -> None:
+        """Queue a new reading and wait until it has been applied.
+
+        Readings for a meter are applied one batch at a time. Readings that
+        arrive while a batch is being written are coalesced into the next
+        one: a single interpolation pass, recorder write and store save.
+        """
+        future: asyncio.Future[None] = self.hass.loop.create_future()
+        self._pending_readings.append((Datapoint(value, date_utc), future))
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = self.hass.async_create_task(
+                self._async_process_readings()
             )
-            # Limit the number of previous reads to MAX_PREVIOUS_READS
-            self._previous_reads = self._previous_reads[-self.MAX_PREVIOUS_READS :]
-
-        self._last_read_value = value
-        self._last_updated = date_utc
-
-        # Query known device consumption for device_aware algorithm
-        device_hourly_consumption = None
-        if self._algorithm == "device_aware" and self._known_device_entities:
-            prev_time = (
-                Datapoint.from_dict(self._previous_reads[-1]).timestamp
-                if self._previous_reads
-                else None
+        await future
+
+    async def _async_process_readings(self) -> None:
+        while self._pending_readings:
+            batch, self._pending_readings = self._pending_readings, []
+            try:
+                async with self._write_lock:
+                    errors = await self._async_apply_readings(
+                        [reading for reading, _ in batch]
+                    )
+            except Exception as err:  # noqa: BLE001 - handed to the callers
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(err)
+                continue
+
+            for reading, future in batch:
+                if future.done():
+                    continue
+                if reading in errors:
+                    future.set_exception(errors[reading])
+                else:
+                    future.set_result(None)
+
+    def _accept_readings(
+        self, readings: list[Datapoint]
+    ) -> tuple[list[Datapoint], dict[Datapoint, Exception]]:
+        """Add readings to the history, returns the accepted ones and errors.
+
+        Identical readings (e.g. a double-submitted form) are applied once.
+        """
+        accepted: list[Datapoint] = []
+        errors: dict[Datapoint, Exception] = {}
+        for reading in sorted(set(readings), key=lambda read: read.timestamp):
+            if self._last_updated is not None and reading.timestamp <= self._last_updated:
+                if reading != Datapoint(self._last_read_value, self._last_updated):
+                    errors[reading] = ValueError(
+                        f"New reading {reading.timestamp} cannot be earlier than the last read {self._last_updated}"
+                    )
+                continue
+
+            if self._last_read_value is not None:
+                previous = Datapoint(self._last_read_value, self._last_updated)
+                self._previous_reads.append(previous.as_dict())
+                self._analytics.add_reading(previous, reading)
+            self._last_read_value = reading.value
+            self._last_updated = reading.timestamp
+            if self._extrapolation_fit is not None:
+                self._extrapolation_fit.add(reading)
+            accepted.append(reading)
+
+        self._readings_since_compaction += len(accepted)
+        return accepted, errors
+
+    def _interpolate_readings(
+        self, history: list[Datapoint], accepted: list[Datapoint]
+    ) -> list[Datapoint]:
+        """Rows for every gap closed by the accepted readings, readings included."""
+        datapoints = history + accepted
+        device_cache = DeviceConsumptionCache()
+        if history:
+            # One device query for the whole batch, the gaps are then cache hits
+            self._device_consumption(
+                history[-1].timestamp, accepted[-1].timestamp, device_cache
             )
-            if prev_time is not None:
-                device_hourly_consumption = self._query_device_consumption(
-                    prev_time, date_utc
-                )
 
-        missing_data = interpolate(
-            self._algorithm,
-            [Datapoint.from_dict(read) for read in self._previous_reads],
-            Datapoint(self._last_read_value, self._last_updated),
-            device_hourly_consumption=device_hourly_consumption,
-        )
+        first_gap = len(history)
+        if looks_ahead(self._algorithm) and len(history) >= 2:
+            # The gap before the batch is re-fit now that readings follow it
+            first_gap -= 1
+        rows: list[Datapoint] = []
+        for index in range(first_gap, len(datapoints)):
+            if index == 0:
+                rows.append(datapoints[0])
+            else:
+                rows.extend(self._interpolate_gap(datapoints, index, device_cache))
+        return rows
+
+    async def _async_apply_readings(
+        self, readings: list[Datapoint]
+    ) -> dict[Datapoint, Exception]:
+        """Apply a batch of readings, returns the readings that were rejected."""
+        history = self.datapoints()
+        accepted, errors = self._accept_readings(readings)
+        if not accepted:
+            return errors
+
+        if self._algorithm == "device_aware" and self._known_device_entities and history:
+            now = dt_util.utcnow()
+            for previous, reading in zip(history[-1:] + accepted, accepted):
+                self._uncompiled_hours.update(uncompiled_hours(previous, reading, now))
 
+        rows = await self.hass.async_add_executor_job(
+            self._interpolate_readings, history, accepted
+        )
         LOGGER.debug(
-            f"Interpolating missing data with algorithm {self._algorithm}: {missing_data}"
+            f"Backfilling statistics for {self.entity_id} with algorithm {self._algorithm}: "
+            f"{len(accepted)} readings, {len(rows)} rows"
+        )
+        await self._async_backfill(rows, history[-1] if history else None)
+        LOGGER.debug("Persisting attributes to storage")
+        await self._async_save_attributes()
+        if self._readings_since_compaction >= self.COMPACT_EVERY:
+            self.async_start_compaction()
+        return errors
+
+    @callback
+    def async_start_compaction(self) -> None:
+        """Compact the reading history in a background task."""
+        self._readings_since_compaction = 0
+        self.hass.async_create_background_task(
+            self._async_compact(), f"{DOMAIN} compact {self.entity_id}"
+        )
+
+    async def _async_compact(self) -> None:
+        async with self._write_lock:
+            datapoints = self.datapoints()
+            kept = await self.hass.async_add_executor_job(
+                compact,
+                datapoints,
+                dt_util.utcnow(),
+                self._retention,
+                dt_util.get_default_time_zone(),
+            )
+            if len(kept) == len(datapoints):
+                return
+            self._previous_reads = [datapoint.as_dict() for datapoint in kept[:-1]]
+            boundary = compaction_boundary(datapoints, kept)
+            if self._compacted_until is None or boundary > self._compacted_until:
+                self._compacted_until = boundary
+            await self._async_save_attributes()
+        LOGGER.info(
+            f"Compacted the history of {self.entity_id} from {len(datapoints)} to {len(kept)} readings"
         )
 
+    @callback
+    def async_set_retention(self, retention: RetentionPolicy) -> None:
+        """Apply new retention tiers, compacting right away when they changed."""
+        if retention != self._retention:
+            self._retention = retention
+            self.async_start_compaction()
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # Histories stored before compaction existed (or under older tiers)
+        self.async_start_compaction()
+        self.async_on_remove(
+            self.hass.bus.async_listen(
+                EVENT_RECORDER_HOURLY_STATISTICS_GENERATED,
+                self._async_hourly_statistics_generated,
+            )
+        )
+
+    @callback
+    def _async_hourly_statistics_generated(self, event: Event) -> None:
+        """Refine the hours estimated without device data once they are compiled."""
+        if not self._uncompiled_hours:
+            return
+        current_hour = hour_index(dt_util.utcnow())
+        compiled = {hour for hour in self._uncompiled_hours if hour < current_hour}
+        if compiled:
+            self._uncompiled_hours -= compiled
+            self.hass.async_create_background_task(
+                self._async_refine_hours(compiled), f"{DOMAIN} refine {self.entity_id}"
+            )
+
+    async def _async_refine_hours(self, hours: set[int]) -> None:
+        """Interpolate the gaps holding `hours` again, now with device data."""
+        async with self._write_lock:
+            datapoints = self.datapoints()
+            gaps = gaps_with_device_data(datapoints, hours)
+            if gaps:
+                rows = await self.hass.async_add_executor_job(
+                    self._interpolate_gaps, datapoints, gaps
+                )
+                await self._async_backfill(rows)
+            await self._async_save_attributes()
         LOGGER.debug(
-            f"Backfilling statistics for {self.entity_id} with algorithm {self._algorithm}"
+            f"Refined {len(hours)} hours of {self.entity_id} with compiled device statistics"
         )
-        asyncio.run_coroutine_threadsafe(
-            backfill_statistics(
-                self.hass,
-                self.unique_id,
-                self._attr_name,
-                self._attr_native_unit_of_measurement,
-                self._algorithm,
-                missing_data + [Datapoint(self._last_read_value, self._last_updated)],
+
+    def _device_consumption(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        device_cache: DeviceConsumptionCache,
+    ) -> dict[int, float] | None:
+        """Device consumption for a gap, or None when the algorithm does not use it."""
+        if self._algorithm != "device_aware" or not self._known_device_entities:
+            return None
+        return device_cache.hourly_consumption(
+            self._known_device_entities,
+            self._attr_native_unit_of_measurement,
+            start_time,
+            end_time,
+            self._query_device_consumption,
+        )
+
+    def _interpolate_gap(
+        self,
+        datapoints: list[Datapoint],
+        index: int,
+        device_cache: DeviceConsumptionCache,
+    ) -> list[Datapoint]:
+        """Rows for the gap ending at `datapoints[index]`, the reading included."""
+        missing_data = interpolate(
+            self._algorithm,
+            datapoints[:index],
+            datapoints[index],
+            device_hourly_consumption=self._device_consumption(
+                datapoints[index - 1].timestamp,
+                datapoints[index].timestamp,
+                device_cache,
             ),
-            self.hass.loop,
-        ).result()
-        LOGGER.debug(
-            f"Backfilled statistics for {self.entity_id} with algorithm {self._algorithm}"
+            following=datapoints[index + 1] if index + 1 < len(datapoints) else None,
         )
-        LOGGER.debug("Persisting attributes to storage")
-        self._save_attributes()
+        return missing_data + [datapoints[index]]
+
+    def _first_rebuildable_gap(self, datapoints: list[Datapoint]) -> int:
+        """Index of the first gap whose readings all survived compaction."""
+        if self._compacted_until is None:
+            return 1
+        boundary = checkpoint_index(datapoints, self._compacted_until)
+        if boundary is None:
+            return 1
+        # The gap after the boundary still depends on the readings before it
+        return min(boundary + context_readings(self._algorithm), len(datapoints))
+
+    async def _async_write_chunked(
+        self,
+        datapoints: list[Datapoint],
+        pacer: ChunkPacer,
+        progress: RebuildProgress,
+    ) -> None:
+        """Write datapoints in chunks sized to keep each loop slice short."""
+        position = 0
+        while position < len(datapoints):
+            chunk = datapoints[position : position + pacer.chunk_rows]
+            # Waiting on the recorder backlog does not block the loop, keep it untimed
+            await self._statistics.async_wait_ready()
+            started = time.perf_counter()
+            progress.rows_written += await self._async_write_rows(chunk)
+            pacer.record(time.perf_counter() - started, len(chunk))
+            position += len(chunk)
+            # Let other work run between chunks (and cancellation land)
+            await asyncio.sleep(0)
 
-    def reset_statistics(self) -> None:
-        """Reset the statistics for the sensor."""
+    def _publish_progress(self, progress: RebuildProgress, pacer: ChunkPacer) -> None:
+        progress.max_loop_block_ms = round(pacer.max_block_seconds * 1000, 2)
+        self.hass.bus.async_fire(EVENT_REBUILD_PROGRESS, progress.as_dict())
+
+    async def async_reset_statistics(
+        self,
+        device_cache: DeviceConsumptionCache | None = None,
+        since: datetime | None = None,
+    ) -> int:
+        """Reset the statistics for the sensor.
+
+        With `since`, the rebuild starts from the last reading at or before
+        it: earlier statistics are kept and only the hours after that reading
+        are rewritten (every one of them is, so no clear is needed). Hours
+        interpolated from readings that compaction dropped are always kept,
+        the rebuild starts after them.
+        Interpolation and device queries run in the executor, the rows are
+        written in paced chunks and progress is fired as
+        `utility_manual_tracking_rebuild_progress` events after every gap.
+        Returns the number of statistics rows written.
+        """
         if len(self._previous_reads) == 0:
             LOGGER.debug("No previous reads to reset")
-            return
+            return 0
 
-        LOGGER.debug(f"Resetting statistics for {self.entity_id}")
-        try:
-            reset_statistics(
-                self.hass,
-                self.unique_id,
-                self._algorithm,
-            )
-        except Exception:
+        datapoints = self.datapoints()
+        checkpoint = checkpoint_index(datapoints, since) if since is not None else None
+        compacted = self._first_rebuildable_gap(datapoints) - 1
+        if compacted > 0 and (checkpoint is None or checkpoint < compacted):
             LOGGER.warning(
-                "Failed to clear existing statistics for %s, proceeding with backfill",
-                self.entity_id,
-                exc_info=True,
+                f"Keeping the statistics of {self.entity_id} up to "
+                f"{datapoints[compacted].timestamp}, the readings they were "
+                "interpolated from were compacted"
+            )
+            checkpoint = compacted
+        if checkpoint is None:
+            LOGGER.debug(f"Resetting statistics for {self.entity_id}")
+            try:
+                self._statistics.clear(self.unique_id, self._algorithm)
+            except Exception:
+                LOGGER.warning(
+                    "Failed to clear existing statistics for %s, proceeding with backfill",
+                    self.entity_id,
+                    exc_info=True,
+                )
+            self._rollups.clear()
+        else:
+            LOGGER.debug(
+                f"Rebuilding statistics for {self.entity_id} after the reading of "
+                f"{datapoints[checkpoint].timestamp}"
             )
 
         # Backfill statistics with the previous reads
@@ -227,66 +630,252 @@ class UtilityManualTrackingSensor(SensorEntity):
         LOGGER.debug(
             f"Backfilling statistics for {self.entity_id} with algorithm {self._algorithm}"
         )
-        reads_seen = []
-        for read in self._previous_reads:
-            if len(reads_seen) > 0:
-                # Query device data for this specific pair
-                device_hourly_consumption = None
-                if self._algorithm == "device_aware" and self._known_device_entities:
-                    prev_dp = Datapoint.from_dict(reads_seen[-1])
-                    curr_dp = Datapoint.from_dict(read)
-                    device_hourly_consumption = self._query_device_consumption(
-                        prev_dp.timestamp, curr_dp.timestamp
-                    )
+        device_cache = device_cache or DeviceConsumptionCache()
+        first_gap = 1 if checkpoint is None else checkpoint + 1
+        progress = RebuildProgress(
+            self.entity_id, gaps_total=len(datapoints) - first_gap
+        )
+        pacer = ChunkPacer()
+        try:
+            # Fetch device data for the rebuilt span up front, gaps are then cache hits
+            await self.hass.async_add_executor_job(
+                self._device_consumption,
+                datapoints[first_gap - 1].timestamp,
+                datapoints[-1].timestamp,
+                device_cache,
+            )
+            # Same rows as the readings produced when they came in: the first
+            # reading alone, then every gap followed by its reading
+            if checkpoint is None:
+                await self._async_write_chunked(datapoints[:1], pacer, progress)
+            for index in range(first_gap, len(datapoints)):
+                rows = await self.hass.async_add_executor_job(
+                    self._interpolate_gap, datapoints, index, device_cache
+                )
+                await self._async_write_chunked(rows, pacer, progress)
+                progress.gaps_done = index - first_gap + 1
+                self._publish_progress(progress, pacer)
+        except asyncio.CancelledError:
+            progress.state = "cancelled"
+            self._publish_progress(progress, pacer)
+            LOGGER.warning(
+                f"Rebuild of {self.entity_id} cancelled after {progress.rows_written} rows, "
+                "run reset_meter_statistics again to complete it"
+            )
+            raise
+        except Exception:
+            progress.state = "failed"
+            self._publish_progress(progress, pacer)
+            raise
+        finally:
+            self._device_cache_bytes = device_cache.approximate_bytes()
+            self._invalidate_aggregates()
+            await self._async_save_attributes()
+
+        progress.state = "done"
+        self._publish_progress(progress, pacer)
+        return progress.rows_written
+
+    def _reinterpolate_device_gaps(
+        self, datapoints: list[Datapoint], changed_entities: list[str]
+    ) -> list[Datapoint]:
+        """Rows of the gaps where the changed devices reported consumption."""
+        changed_hours = self._query_device_consumption(
+            datapoints[0].timestamp, datapoints[-1].timestamp, changed_entities
+        )
+        first_gap = self._first_rebuildable_gap(datapoints)
+        gaps = [
+            index
+            for index in gaps_with_device_data(datapoints, changed_hours)
+            if index >= first_gap
+        ]
+        if not gaps:
+            return []
+
+        return self._interpolate_gaps(datapoints, gaps)
+
+    def _interpolate_gaps(
+        self, datapoints: list[Datapoint], gaps: list[int]
+    ) -> list[Datapoint]:
+        """Rows of the given gaps (sorted reading indices), readings included."""
+        device_cache = DeviceConsumptionCache()
+        # One device query spanning every gap
+        self._device_consumption(
+            datapoints[gaps[0] - 1].timestamp, datapoints[gaps[-1]].timestamp, device_cache
+        )
+        rows: list[Datapoint] = []
+        for index in gaps:
+            rows.extend(self._interpolate_gap(datapoints, index, device_cache))
+        return rows
+
+    async def async_update_known_devices(self, entities: list[str]) -> int:
+        """Apply a new set of known devices without rebuilding everything.
+
+        Only the gaps where an added or removed device reported consumption
+        are interpolated again and written; other hours are unaffected by the
+        change. Returns the number of statistics rows written.
+        """
+        async with self._write_lock:
+            changed = sorted(set(self._known_device_entities).symmetric_difference(entities))
+            self._known_device_entities = list(entities)
+            if not changed:
+                return 0
 
-                missing_data = interpolate(
-                    self._algorithm,
-                    [Datapoint.from_dict(read) for read in reads_seen],
-                    Datapoint.from_dict(read),
-                    device_hourly_consumption=device_hourly_consumption,
+            rows: list[Datapoint] = []
+            datapoints = self.datapoints()
+            if self._algorithm == "device_aware" and len(datapoints) > 1:
+                rows = await self.hass.async_add_executor_job(
+                    self._reinterpolate_device_gaps, datapoints, changed
                 )
+            rows_written = 0
+            if rows:
+                rows_written = await self._async_backfill(rows)
+            await self._async_save_attributes()
 
-                asyncio.run_coroutine_threadsafe(
-                    backfill_statistics(
-                        self.hass,
-                        self.unique_id,
-                        self._attr_name,
-                        self._attr_native_unit_of_measurement,
-                        self._algorithm,
-                        missing_data,
-                    ),
-                    self.hass.loop,
-                ).result()
-            reads_seen.append(read)
-
-        if len(reads_seen) == 0:
-            return
+        LOGGER.info(
+            f"Known devices of {self.entity_id} changed ({', '.join(changed)}), "
+            f"rewrote {rows_written} statistics rows"
+        )
+        self.async_write_ha_state()
+        return rows_written
+
+    def iter_export_records(
+        self, datapoints: list[Datapoint]
+    ) -> Iterator[dict[str, Any]]:
+        """Readings and the hourly rows between them, a gap at a time (blocking)."""
+        for index, reading in enumerate(datapoints):
+            if index == 0:
+                yield from gap_records(self.entity_id, None, [], reading)
+                continue
 
-        # Query device data for the last pair
-        device_hourly_consumption = None
-        if self._algorithm == "device_aware" and self._known_device_entities:
-            prev_dp = Datapoint.from_dict(reads_seen[-1])
-            device_hourly_consumption = self._query_device_consumption(
-                prev_dp.timestamp, self._last_updated
+            previous = datapoints[index - 1]
+            # Queried per gap so only one gap of device data is held at a time
+            device_hourly = self._device_consumption(
+                previous.timestamp, reading.timestamp, DeviceConsumptionCache()
+            )
+            missing_data = interpolate(
+                self._algorithm,
+                datapoints[:index],
+                reading,
+                device_hourly_consumption=device_hourly,
+                following=datapoints[index + 1] if index + 1 < len(datapoints) else None,
+            )
+            yield from gap_records(
+                self.entity_id, previous, missing_data, reading, device_hourly
             )
 
-        missing_data = interpolate(
-            self._algorithm,
-            [Datapoint.from_dict(read) for read in reads_seen],
-            Datapoint(self._last_read_value, self._last_updated),
-            device_hourly_consumption=device_hourly_consumption,
+    def _history_rows(
+        self, datapoints: list[Datapoint], first_gap: int = 1
+    ) -> list[Datapoint]:
+        """Rows the readings produce from `first_gap` on, as a rebuild would write them.
+
+        From the first gap, the first reading is included too.
+        """
+        device_cache = DeviceConsumptionCache()
+        self._device_consumption(
+            datapoints[first_gap - 1].timestamp, datapoints[-1].timestamp, device_cache
         )
-        asyncio.run_coroutine_threadsafe(
-            backfill_statistics(
-                self.hass,
-                self.unique_id,
-                self._attr_name,
-                self._attr_native_unit_of_measurement,
-                self._algorithm,
-                missing_data + [Datapoint(self._last_read_value, self._last_updated)],
+        rows = datapoints[:1] if first_gap == 1 else []
+        for index in range(first_gap, len(datapoints)):
+            rows.extend(self._interpolate_gap(datapoints, index, device_cache))
+        return rows
+
+    def _find_mismatched_hours(self, expected: dict[int, float]) -> list[int]:
+        """Compare the stored statistics page by page (recorder executor)."""
+        return find_mismatches(
+            expected,
+            self._statistics.iter_sum_pages(
+                get_statistics_id(self.unique_id, self._algorithm),
+                min(expected),
+                max(expected),
             ),
-            self.hass.loop,
-        ).result()
+        )
+
+    async def async_verify_statistics(self, repair: bool = True) -> dict[str, Any]:
+        """Check the stored statistics against the readings.
+
+        Only the hours that are missing or differ are rewritten, so the cost
+        of a repair follows the damage rather than the length of the history.
+        Hours interpolated from readings that compaction dropped are not
+        checked, the kept readings no longer tell what they should be.
+        """
+        async with self._write_lock:
+            datapoints = self.datapoints()
+            first_gap = self._first_rebuildable_gap(datapoints)
+            # Nothing left to check when every gap came from compacted readings
+            if not datapoints or (first_gap > 1 and first_gap >= len(datapoints)):
+                return {
+                    "checked_hours": 0,
+                    "mismatched_hours": 0,
+                    "ranges": [],
+                    "rows_written": 0,
+                }
+
+            rows = await self.hass.async_add_executor_job(
+                self._history_rows, datapoints, first_gap
+            )
+            expected = expected_sums(rows)
+            mismatched = await self._statistics.async_run(
+                self._find_mismatched_hours, expected
+            )
+
+            rows_written = 0
+            if repair and mismatched:
+                rows_written = await self._async_backfill(
+                    [Datapoint(expected[hour], hour_datetime(hour)) for hour in mismatched]
+                )
+                await self._async_save_attributes()
+
+        if mismatched:
+            LOGGER.warning(
+                f"Statistics of {self.entity_id} differ from the readings in "
+                f"{len(mismatched)} hours" + (", repaired" if repair else "")
+            )
+        return {
+            "checked_hours": len(expected),
+            "mismatched_hours": len(mismatched),
+            "ranges": [
+                {
+                    "start": hour_datetime(first).isoformat(),
+                    "end": hour_datetime(last).isoformat(),
+                    "hours": last - first + 1,
+                }
+                for first, last in group_ranges(mismatched)
+            ],
+            "rows_written": rows_written,
+        }
+
+    @callback
+    def async_start_rebuild(
+        self,
+        device_cache: DeviceConsumptionCache | None = None,
+        since: datetime | None = None,
+    ) -> asyncio.Task[int]:
+        """Rebuild the statistics in a tracked background task.
+
+        A rebuild already in progress is returned instead of starting another.
+        """
+        if self._rebuild_task is None or self._rebuild_task.done():
+            self._rebuild_task = self.hass.async_create_background_task(
+                self._async_rebuild(device_cache, since),
+                f"{DOMAIN} rebuild {self.entity_id}",
+            )
+        return self._rebuild_task
+
+    async def _async_rebuild(
+        self, device_cache: DeviceConsumptionCache | None, since: datetime | None
+    ) -> int:
+        # Readings submitted meanwhile wait and are applied as one batch afterwards
+        async with self._write_lock:
+            return await self.async_reset_statistics(device_cache, since)
+
+    @callback
+    def async_cancel_rebuild(self) -> bool:
+        """Cancel the running rebuild, returns whether there was one."""
+        if self._rebuild_task is None or self._rebuild_task.done():
+            return False
+        self._rebuild_task.cancel()
+        return True
 
     @property
     def extra_state_attributes(self) -> dict[str, any]:
@@ -295,17 +884,41 @@ class UtilityManualTrackingSensor(SensorEntity):
             "meter_name": self._attr_name,
             "last_updated": self._last_updated,
             "last_read": self._last_read_value,
-            "previous_reads": json.dumps(self._previous_reads),
+            "previous_reads": json.dumps(self._previous_reads[-self.MAX_PREVIOUS_READS :]),
             "algorithm": self._algorithm,
             "known_device_entities": json.dumps(self._known_device_entities),
+            **self._analytics_attributes(),
+        }
+
+    def _analytics_attributes(self) -> dict[str, float | None]:
+        """Forecast and anomaly score maintained incrementally on each reading."""
+        forecast = self._analytics.forecast()
+        zscore = self._analytics.anomaly_zscore
+        if forecast is None:
+            return {"anomaly_zscore": None}
+        return {
+            "forecast_daily_rate": round(forecast["daily_rate"], 3),
+            "forecast_monthly": round(forecast["monthly"], 2),
+            "forecast_annual": round(forecast["annual"], 1),
+            "forecast_confidence": round(forecast["confidence"], 2),
+            "anomaly_zscore": round(zscore, 2) if zscore is not None else None,
         }
 
     @property
     def native_value(self) -> float | None:
         """Return the state of the sensor."""
+        if self._extrapolation_fit is not None:
+            latest_datapoint = self._extrapolation_fit.evaluate(
+                datetime.now(timezone.utc)
+            )
+            return latest_datapoint.value if latest_datapoint else None
+
         latest_datapoint = extrapolate(
             self._algorithm,
-            [Datapoint.from_dict(read) for read in self._previous_reads]
+            [
+                Datapoint.from_dict(read)
+                for read in self._previous_reads[-self.MAX_PREVIOUS_READS :]
+            ]
             + [Datapoint(self._last_read_value, self._last_updated)],
             datetime.now(timezone.utc),
         )
@@ -313,12 +926,37 @@ class UtilityManualTrackingSensor(SensorEntity):
             return latest_datapoint.value
         return None
 
-    def _save_attributes(self) -> None:
-        attributes = self.extra_state_attributes
-        asyncio.run_coroutine_threadsafe(
-            self._store.async_save(attributes),
-            self.hass.loop,
-        ).result()
+    def memory_usage(self) -> dict[str, int]:
+        """Approximate bytes held per part of the meter's state."""
+        return {
+            "history": deep_sizeof(self._previous_reads),
+            "analytics": deep_sizeof(self._analytics),
+            "extrapolation_fit": deep_sizeof(self._extrapolation_fit),
+            "rollups": deep_sizeof(self._rollups),
+            "aggregates_cache": deep_sizeof(self.aggregates_cache),
+            "device_cache_last_rebuild": self._device_cache_bytes,
+            "store": len(json.dumps(self._storage_attributes(), default=str)),
+        }
+
+    def _storage_attributes(self) -> dict[str, Any]:
+        return {
+            **self.extra_state_attributes,
+            "analytics": self._analytics.as_dict(),
+            "extrapolation_fit": (
+                self._extrapolation_fit.as_dict()
+                if self._extrapolation_fit is not None
+                else None
+            ),
+            "rollups": self._rollups.as_dict(),
+            "history": self._previous_reads,
+            "uncompiled_hours": sorted(self._uncompiled_hours),
+            "compacted_until": (
+                self._compacted_until.isoformat() if self._compacted_until else None
+            ),
+        }
+
+    async def _async_save_attributes(self) -> None:
+        await self._store.async_save(self._storage_attributes())
         LOGGER.debug("Saved attributes to storage")
 
     async def _load_attributes(self) -> None:
@@ -327,10 +965,147 @@ class UtilityManualTrackingSensor(SensorEntity):
             LOGGER.debug("Loaded attributes from storage")
             self._last_updated = datetime.fromisoformat(attributes.get("last_updated"))
             self._last_read_value = attributes.get("last_read")
-            self._previous_reads = json.loads(attributes.get("previous_reads"))
+            # Stored before the history was kept apart from the attribute
+            self._previous_reads = attributes.get("history") or json.loads(
+                attributes.get("previous_reads")
+            )
             self._algorithm = attributes.get("algorithm")
             known_devices_str = attributes.get("known_device_entities")
             if known_devices_str:
                 self._known_device_entities = json.loads(known_devices_str)
+            datapoints = self.datapoints()
+            analytics = attributes.get("analytics")
+            if analytics:
+                self._analytics = MeterAnalytics.from_dict(analytics)
+            else:
+                # Stored before analytics existed, replay the readings we have
+                self._analytics = MeterAnalytics.from_datapoints(datapoints)
+            self._extrapolation_fit = extrapolation_fit(
+                self._algorithm, datapoints, attributes.get("extrapolation_fit")
+            )
+            # Stored before rollups existed: filled by the next statistics reset
+            if rollups := attributes.get("rollups"):
+                self._rollups = MeterRollups.from_dict(rollups)
+            # Refined on the first hourly statistics compiled after startup
+            self._uncompiled_hours = set(attributes.get("uncompiled_hours", []))
+            if compacted_until := attributes.get("compacted_until"):
+                self._compacted_until = datetime.fromisoformat(compacted_until)
         else:
             LOGGER.debug("No attributes found in storage")
+
+
+class VirtualMeterSensor(SensorEntity):
+    """Sum of other meters, kept up to date from the rows they write.
+
+    Member statistics are never read back from the recorder: each batch of
+    rows a member writes is dispatched here, and only the hours it touched
+    (and the open hours after them) are written again.
+    """
+
+    ALGORITHM = "virtual"
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        meter_name: str,
+        meter_unit: str,
+        meter_class: str,
+        member_entities: list[str],
+        statistics: StatisticsBackend | None = None,
+    ) -> None:
+        super().__init__()
+        self._attr_unique_id = meter_unique_id(meter_name, meter_class)
+        self._attr_name = meter_name
+        self._attr_device_class = meter_class
+        self._attr_native_unit_of_measurement = meter_unit
+        self._attr_state_class = SensorStateClass.TOTAL
+        self.entity_id = f"sensor.{self._attr_unique_id}"
+
+        self._member_entities: list[str] = member_entities
+        self._window = VirtualMeterWindow()
+        # Rows waiting for the writer by hour index, the latest sums of each hour
+        self._pending_rows: dict[int, Datapoint] = {}
+        self._window_changed = False
+        self._writer_task: asyncio.Task[None] | None = None
+        self._statistics = statistics or RecorderStatistics(hass)
+        self._store = Store[dict](
+            hass, 1, self._attr_unique_id, private=True, atomic_writes=True
+        )
+
+    @property
+    def member_entities(self) -> list[str]:
+        """Return the meters summed by this one."""
+        return self._member_entities
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, SIGNAL_METER_ROWS_WRITTEN, self._async_member_rows_written
+            )
+        )
+
+    @callback
+    def _async_member_rows_written(
+        self, entity_id: str, previous: Datapoint | None, rows: list[Datapoint]
+    ) -> None:
+        if entity_id not in self._member_entities:
+            return
+        # Updated right away so batches are added in the order they were written
+        for row in self._window.add_member_rows(entity_id, previous, rows):
+            self._pending_rows[hour_index(row.timestamp)] = row
+        self._window_changed = True
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = self.hass.async_create_task(self._async_write())
+
+    def memory_usage(self) -> dict[str, int]:
+        """Approximate bytes held per part of the meter's state."""
+        return {
+            "window": deep_sizeof(self._window),
+            "store": len(json.dumps({"window": self._window.as_dict()})),
+        }
+
+    async def _async_write(self) -> None:
+        """Write the pending rows and the window, one write at a time.
+
+        Rows are taken after waiting on the backend, so every write carries
+        the newest sums of its hours and a later write never precedes it.
+        """
+        while self._window_changed:
+            if self._pending_rows:
+                await self._statistics.async_wait_ready()
+            self._window_changed = False
+            rows = [self._pending_rows[hour] for hour in sorted(self._pending_rows)]
+            self._pending_rows = {}
+            if rows:
+                await self._statistics.async_write(
+                    self.unique_id,
+                    self._attr_name,
+                    self._attr_native_unit_of_measurement,
+                    self.ALGORITHM,
+                    rows,
+                )
+            await self._store.async_save({"window": self._window.as_dict()})
+            self.async_write_ha_state()
+
+    @property
+    def extra_state_attributes(self) -> dict[str, any]:
+        """Return the state attributes."""
+        return {
+            "meter_name": self._attr_name,
+            "member_entities": json.dumps(self._member_entities),
+            "open_hours": len(self._window.deltas),
+        }
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the state of the sensor."""
+        if not self._window.members:
+            return None
+        return self._window.total
+
+    async def _load_attributes(self) -> None:
+        attributes = await self._store.async_load()
+        if attributes:
+            LOGGER.debug("Loaded virtual meter window from storage")
+            self._window = VirtualMeterWindow.from_dict(attributes["window"])
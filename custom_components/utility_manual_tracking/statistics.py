@@ -1,13 +1,34 @@
+from datetime import datetime
+from typing import Any, Callable, Iterator, TypeVar
+
 from homeassistant.components.recorder import get_instance
 from homeassistant.components.recorder.models import StatisticMetaData, StatisticData
 from homeassistant.components.recorder.statistics import (
     async_add_external_statistics,
-    clear_statistics,
+    list_statistic_ids,
+    statistics_during_period,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 
+from custom_components.utility_manual_tracking.cleanup import batched
 from custom_components.utility_manual_tracking.consts import DOMAIN, LOGGER
 from custom_components.utility_manual_tracking.fitter import Datapoint
+from custom_components.utility_manual_tracking.rebuild import BacklogPacer
+from custom_components.utility_manual_tracking.statistics_backend import (
+    PAGE_HOURS,
+    StatisticsBackend,
+    get_statistics_id,
+)
+from custom_components.utility_manual_tracking.timebase import (
+    hour_datetime,
+    hour_index,
+    hour_start,
+)
+
+_T = TypeVar("_T")
+
+# Shared by every meter, the recorder queue is
+RECORDER_PACER = BacklogPacer()
 
 
 async def backfill_statistics(
@@ -17,7 +38,11 @@ async def backfill_statistics(
     meter_unit: str,
     algorithm: str,
     datapoints: list[Datapoint],
-) -> None:
+) -> int:
+    """Write datapoints as hourly statistics, returns the number of rows.
+
+    Call `async_wait_for_recorder` first, the write itself never waits.
+    """
     statistics_id: str = get_statistics_id(sensor_id, algorithm)
     metadata = StatisticMetaData(
         has_mean=False,
@@ -30,37 +55,171 @@ async def backfill_statistics(
 
     statistics: list[StatisticData] = []
     for datapoint in datapoints:
-        start_timestamp = datapoint.timestamp.replace(minute=0, second=0, microsecond=0)
         statistics.append(
             StatisticData(
                 sum=datapoint.value,
-                start=start_timestamp,
+                start=hour_start(datapoint.timestamp),
             )
         )
 
     LOGGER.debug(f"Writing statistics {statistics_id}: {len(statistics)} datapoints")
     async_add_external_statistics(hass, metadata, statistics)
+    return len(statistics)
+
 
+async def async_wait_for_recorder(hass: HomeAssistant) -> float:
+    """Wait while the recorder queue is backed up (see `RECORDER_PACER`).
+
+    Returns the seconds waited.
+    """
+    waited = await RECORDER_PACER.async_wait(lambda: get_instance(hass).backlog)
+    if waited:
+        LOGGER.debug(
+            f"Waited {waited:.2f}s for a recorder backlog of {RECORDER_PACER.backlog}"
+        )
+    return waited
 
-def get_statistics_id(sensor_id: str, algorithm: str) -> str:
-    """Get the statistics ID for a sensor."""
-    return f"{DOMAIN}:{sensor_id}_statistics_{algorithm}"
 
+def iter_statistics_pages(
+    hass: HomeAssistant,
+    statistics_id: str,
+    first_hour: int,
+    last_hour: int,
+    page_hours: int = PAGE_HOURS,
+) -> Iterator[list[dict[str, Any]]]:
+    """Yield the stored sums of hours `first_hour` to `last_hour` (inclusive), a page at a time.
+
+    Blocking, run it in the recorder executor.
+    """
+    for page_start in range(first_hour, last_hour + 1, page_hours):
+        page_end = min(page_start + page_hours, last_hour + 1)
+        stats = statistics_during_period(
+            hass,
+            hour_datetime(page_start),
+            hour_datetime(page_end),
+            {statistics_id},
+            "hour",
+            None,
+            {"sum"},
+        )
+        yield stats.get(statistics_id, [])
+
+
+def query_device_consumption(
+    hass: HomeAssistant,
+    entities: list[str],
+    unit: str,
+    start_time: datetime,
+    end_time: datetime,
+) -> dict[int, float]:
+    """Hourly `change` of device entities summed by hour index (see `timebase`).
+
+    Energy is converted to `unit`, only positive changes count. Blocking.
+    """
+    stats = statistics_during_period(
+        hass,
+        start_time,
+        end_time,
+        set(entities),
+        "hour",
+        {"energy": unit},
+        {"change"},
+    )
+
+    # Aggregate per-hour consumption across all devices
+    hourly_totals: dict[int, float] = {}
+    for rows in stats.values():
+        for row in rows:
+            # `start` is a datetime or a UNIX timestamp depending on HA version
+            hour_key = hour_index(row["start"])
+            change = row.get("change")
+            if change is not None and change > 0:
+                hourly_totals[hour_key] = hourly_totals.get(hour_key, 0.0) + change
+    return hourly_totals
 
+
+@callback
 def reset_statistics(
     hass: HomeAssistant,
     sensor_id: str,
     algorithm: str,
 ) -> None:
-    """Clear statistics for a sensor."""
+    """Clear statistics for a sensor.
+
+    The clear is queued on the recorder thread, ahead of any statistics
+    written afterwards.
+    """
     statistics_id = get_statistics_id(sensor_id, algorithm)
     LOGGER.debug(f"Clearing statistics {statistics_id}")
     try:
-        instance = get_instance(hass)
-        clear_statistics(instance, [statistics_id])
+        get_instance(hass).async_clear_statistics([statistics_id])
     except Exception:
         LOGGER.warning(
             "Failed to clear statistics %s, proceeding with backfill",
             statistics_id,
             exc_info=True,
         )
+
+
+async def async_list_domain_statistic_ids(hass: HomeAssistant) -> list[str]:
+    """IDs of every statistic this integration has written."""
+    statistic_ids = await get_instance(hass).async_add_executor_job(
+        list_statistic_ids, hass
+    )
+    return [
+        metadata["statistic_id"]
+        for metadata in statistic_ids
+        if metadata.get("source") == DOMAIN
+    ]
+
+
+@callback
+def clear_statistics_batched(hass: HomeAssistant, statistic_ids: list[str]) -> None:
+    """Clear statistics a batch at a time.
+
+    Every batch is its own recorder task, so one delete never holds the
+    database for all of them.
+    """
+    for batch in batched(statistic_ids):
+        LOGGER.debug(f"Clearing statistics {', '.join(batch)}")
+        get_instance(hass).async_clear_statistics(batch)
+
+
+class RecorderStatistics(StatisticsBackend):
+    """The Home Assistant recorder, the backend of every configured meter."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+
+    async def async_write(
+        self,
+        sensor_id: str,
+        meter_name: str,
+        meter_unit: str,
+        algorithm: str,
+        rows: list[Datapoint],
+    ) -> int:
+        return await backfill_statistics(
+            self.hass, sensor_id, meter_name, meter_unit, algorithm, rows
+        )
+
+    async def async_wait_ready(self) -> float:
+        return await async_wait_for_recorder(self.hass)
+
+    @callback
+    def clear(self, sensor_id: str, algorithm: str) -> None:
+        reset_statistics(self.hass, sensor_id, algorithm)
+
+    def iter_sum_pages(
+        self, statistic_id: str, first_hour: int, last_hour: int
+    ) -> Iterator[list[dict[str, Any]]]:
+        return iter_statistics_pages(self.hass, statistic_id, first_hour, last_hour)
+
+    def device_consumption(
+        self, entities: list[str], unit: str, start: datetime, end: datetime
+    ) -> dict[int, float]:
+        return query_device_consumption(self.hass, entities, unit, start, end)
+
+    async def async_run(self, target: Callable[..., _T], *args: Any) -> _T:
+        """Run a blocking read in the recorder executor."""
+        return await get_instance(self.hass).async_add_executor_job(target, *args)
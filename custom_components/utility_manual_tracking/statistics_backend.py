@@ -0,0 +1,279 @@
+"""Where meters write their statistics and read device consumption from.
+
+Meters only talk to a `StatisticsBackend`. In Home Assistant that is the
+recorder (`statistics.RecorderStatistics`); `MemoryStatistics` and
+`SQLiteStatistics` keep everything in a dict or a standalone SQLite file,
+for offline rebuilds, statistics computed outside Home Assistant and
+imported later, and deterministic performance tests.
+
+Statistics rows are hourly cumulative sums keyed by hour index (see
+`timebase`); device consumption is the hourly `change` of device entities.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import asyncio
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+import sqlite3
+import threading
+from typing import Any, TypeVar
+
+from custom_components.utility_manual_tracking.consts import DOMAIN, LOGGER
+from custom_components.utility_manual_tracking.fitter import Datapoint
+from custom_components.utility_manual_tracking.timebase import (
+    HOUR_SECONDS,
+    hour_index,
+    hours_starting_in,
+)
+
+# Hours of stored sums read back per page
+PAGE_HOURS = 30 * 24
+
+_T = TypeVar("_T")
+
+
+def get_statistics_id(sensor_id: str, algorithm: str) -> str:
+    """Get the statistics ID for a sensor."""
+    return f"{DOMAIN}:{sensor_id}_statistics_{algorithm}"
+
+
+class StatisticsBackend(ABC):
+    """Sink of meter statistics and source of device consumption."""
+
+    @abstractmethod
+    async def async_write(
+        self,
+        sensor_id: str,
+        meter_name: str,
+        meter_unit: str,
+        algorithm: str,
+        rows: list[Datapoint],
+    ) -> int:
+        """Write rows as hourly sums, a later row of an hour replacing earlier ones.
+
+        Returns the number of rows. Writers await `async_wait_ready` first.
+        """
+
+    async def async_wait_ready(self) -> float:
+        """Wait until a write will not pile onto a backlog, returns the seconds waited.
+
+        Kept apart from `async_write` so writers timing their writes leave it out.
+        """
+        return 0.0
+
+    @abstractmethod
+    def clear(self, sensor_id: str, algorithm: str) -> None:
+        """Drop every stored sum of a meter, safe to call from the event loop."""
+
+    @abstractmethod
+    def iter_sum_pages(
+        self, statistic_id: str, first_hour: int, last_hour: int
+    ) -> Iterator[list[dict[str, Any]]]:
+        """Stored rows (`start`, `sum`) from `first_hour` to `last_hour` (inclusive).
+
+        Pages are consumed one at a time. Blocking, see `async_run`.
+        """
+
+    @abstractmethod
+    def device_consumption(
+        self, entities: list[str], unit: str, start: datetime, end: datetime
+    ) -> dict[int, float]:
+        """Positive consumption summed over `entities` by hour index. Blocking.
+
+        Like the recorder, covers the hours starting from `start` up to before `end`.
+        """
+
+    async def async_run(self, target: Callable[..., _T], *args: Any) -> _T:
+        """Run a blocking read of this backend, inline unless overridden."""
+        return target(*args)
+
+
+class MemoryStatistics(StatisticsBackend):
+    """Statistics and device consumption held in dicts."""
+
+    def __init__(self) -> None:
+        # Statistic ID -> hour index -> sum
+        self.sums: dict[str, dict[int, float]] = {}
+        # Device entity ID -> hour index -> change
+        self.device_changes: dict[str, dict[int, float]] = {}
+        self.rows_written = 0
+
+    async def async_write(
+        self,
+        sensor_id: str,
+        meter_name: str,
+        meter_unit: str,
+        algorithm: str,
+        rows: list[Datapoint],
+    ) -> int:
+        sums = self.sums.setdefault(get_statistics_id(sensor_id, algorithm), {})
+        for row in rows:
+            sums[hour_index(row.timestamp)] = row.value
+        self.rows_written += len(rows)
+        return len(rows)
+
+    def clear(self, sensor_id: str, algorithm: str) -> None:
+        self.sums.pop(get_statistics_id(sensor_id, algorithm), None)
+
+    def iter_sum_pages(
+        self, statistic_id: str, first_hour: int, last_hour: int
+    ) -> Iterator[list[dict[str, Any]]]:
+        sums = self.sums.get(statistic_id, {})
+        for page_start in range(first_hour, last_hour + 1, PAGE_HOURS):
+            page_end = min(page_start + PAGE_HOURS, last_hour + 1)
+            yield [
+                {"start": hour * HOUR_SECONDS, "sum": sums[hour]}
+                for hour in range(page_start, page_end)
+                if hour in sums
+            ]
+
+    def device_consumption(
+        self, entities: list[str], unit: str, start: datetime, end: datetime
+    ) -> dict[int, float]:
+        hours = hours_starting_in(start, end)
+        hourly: dict[int, float] = {}
+        for entity_id in entities:
+            for hour, change in self.device_changes.get(entity_id, {}).items():
+                if hour in hours and change > 0:
+                    hourly[hour] = hourly.get(hour, 0.0) + change
+        return hourly
+
+
+class SQLiteStatistics(StatisticsBackend):
+    """Statistics and device consumption in a standalone SQLite file.
+
+    The `statistics_meta` table keeps the name and unit of every statistic,
+    what importing them into the recorder later needs. Writes, clears and
+    `async_run` reads go through one worker thread, in the order they were
+    made, so nothing commits on the event loop.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        # The worker thread and direct (blocking) callers share the connection
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="utility_manual_tracking_sqlite"
+        )
+        with self._lock, self._db:
+            self._db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS statistics_meta
+                    (statistic_id TEXT PRIMARY KEY, name TEXT, unit TEXT);
+                CREATE TABLE IF NOT EXISTS statistics
+                    (statistic_id TEXT, hour INTEGER, sum REAL,
+                     PRIMARY KEY (statistic_id, hour));
+                CREATE TABLE IF NOT EXISTS device_changes
+                    (entity_id TEXT, hour INTEGER, change REAL,
+                     PRIMARY KEY (entity_id, hour));
+                """
+            )
+        self.rows_written = 0
+
+    async def async_write(
+        self,
+        sensor_id: str,
+        meter_name: str,
+        meter_unit: str,
+        algorithm: str,
+        rows: list[Datapoint],
+    ) -> int:
+        await asyncio.get_running_loop().run_in_executor(
+            self._executor,
+            self._write,
+            get_statistics_id(sensor_id, algorithm),
+            f"{meter_name} - statistics ({algorithm})",
+            meter_unit,
+            rows,
+        )
+        self.rows_written += len(rows)
+        return len(rows)
+
+    def _write(
+        self, statistic_id: str, name: str, unit: str, rows: list[Datapoint]
+    ) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO statistics_meta VALUES (?, ?, ?)",
+                (statistic_id, name, unit),
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO statistics VALUES (?, ?, ?)",
+                [(statistic_id, hour_index(row.timestamp), row.value) for row in rows],
+            )
+
+    def clear(self, sensor_id: str, algorithm: str) -> None:
+        """Queue the delete on the worker thread, ahead of later writes."""
+        statistic_id = get_statistics_id(sensor_id, algorithm)
+        self._executor.submit(self._clear, statistic_id).add_done_callback(
+            lambda future: self._log_clear_failure(statistic_id, future)
+        )
+
+    def _clear(self, statistic_id: str) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM statistics WHERE statistic_id = ?", (statistic_id,)
+            )
+
+    @staticmethod
+    def _log_clear_failure(statistic_id: str, future: Future[None]) -> None:
+        if (err := future.exception()) is not None:
+            LOGGER.warning(
+                "Failed to clear statistics %s", statistic_id, exc_info=err
+            )
+
+    async def async_run(self, target: Callable[..., _T], *args: Any) -> _T:
+        """Run a blocking read on the worker thread, after the queued writes."""
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, target, *args
+        )
+
+    def iter_sum_pages(
+        self, statistic_id: str, first_hour: int, last_hour: int
+    ) -> Iterator[list[dict[str, Any]]]:
+        for page_start in range(first_hour, last_hour + 1, PAGE_HOURS):
+            page_end = min(page_start + PAGE_HOURS, last_hour + 1)
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT hour, sum FROM statistics WHERE statistic_id = ? "
+                    "AND hour >= ? AND hour < ? ORDER BY hour",
+                    (statistic_id, page_start, page_end),
+                ).fetchall()
+            yield [{"start": hour * HOUR_SECONDS, "sum": value} for hour, value in rows]
+
+    def device_consumption(
+        self, entities: list[str], unit: str, start: datetime, end: datetime
+    ) -> dict[int, float]:
+        placeholders = ", ".join("?" for _ in entities)
+        hours = hours_starting_in(start, end)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT hour, SUM(change) FROM device_changes "
+                f"WHERE entity_id IN ({placeholders}) AND hour >= ? AND hour < ? "
+                "AND change > 0 GROUP BY hour",
+                (*entities, hours.start, hours.stop),
+            ).fetchall()
+        return dict(rows)
+
+    def metadata(self) -> dict[str, tuple[str, str]]:
+        """Name and unit by statistic ID, for importing the statistics."""
+        with self._lock:
+            rows = self._db.execute("SELECT * FROM statistics_meta").fetchall()
+        return {statistic_id: (name, unit) for statistic_id, name, unit in rows}
+
+    def add_device_changes(self, entity_id: str, changes: dict[int, float]) -> None:
+        """Store the hourly consumption of a device entity."""
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO device_changes VALUES (?, ?, ?)",
+                [(entity_id, hour, change) for hour, change in changes.items()],
+            )
+
+    def close(self) -> None:
+        """Finish the queued writes and close the database file."""
+        self._executor.shutdown()
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,68 @@
+"""Integer hour time base.
+
+Hours are represented internally as epoch-hour indices (whole hours since
+1970-01-01 UTC): aligning a timestamp is an integer division, hour lookups
+hash an int and a run of hours is a plain `range`. Datetimes only appear at
+the Home Assistant boundary (recorder rows, statistics, readings).
+
+Naive datetimes are treated as UTC, and converted back to naive datetimes
+when used as the reference, so callers get the kind of datetime they passed.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+import math
+
+HOUR_SECONDS = 3600
+
+
+def _epoch_seconds(timestamp: datetime) -> float:
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+def hour_index(timestamp: datetime | float) -> int:
+    """Index of the hour a datetime (or UNIX timestamp) falls in."""
+    if isinstance(timestamp, datetime):
+        timestamp = _epoch_seconds(timestamp)
+    return int(timestamp // HOUR_SECONDS)
+
+
+def hour_datetime(index: int, like: datetime | None = None) -> datetime:
+    """Start of an hour as a UTC datetime (naive if `like` is naive)."""
+    start = datetime.fromtimestamp(index * HOUR_SECONDS, tz=timezone.utc)
+    if like is not None and like.tzinfo is None:
+        return start.replace(tzinfo=None)
+    return start
+
+
+def hour_start(timestamp: datetime) -> datetime:
+    """Start of the hour a datetime falls in."""
+    return hour_datetime(hour_index(timestamp), timestamp)
+
+
+def hours_between(start: datetime, end: datetime) -> int:
+    """How many whole-hour steps from `start` land strictly before `end`."""
+    return max(0, math.ceil((_epoch_seconds(end) - _epoch_seconds(start)) / HOUR_SECONDS) - 1)
+
+
+def hour_range(start: datetime, end: datetime) -> range:
+    """Indices of the hours stepped through strictly between two readings.
+
+    These are the hours of `start + 1h`, `start + 2h`, ... before `end`.
+    """
+    first = hour_index(start) + 1
+    return range(first, first + hours_between(start, end))
+
+
+def hours_starting_in(start: datetime, end: datetime) -> range:
+    """Indices of the hours starting at or after `start` and before `end`.
+
+    The hourly rows a recorder query from `start` to `end` returns.
+    """
+    return range(
+        math.ceil(_epoch_seconds(start) / HOUR_SECONDS),
+        math.ceil(_epoch_seconds(end) / HOUR_SECONDS),
+    )
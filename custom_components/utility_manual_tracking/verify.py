@@ -0,0 +1,54 @@
+"""Consistency checks between stored statistics and the readings."""
+
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from custom_components.utility_manual_tracking.fitter import Datapoint
+from custom_components.utility_manual_tracking.timebase import hour_index
+
+SUM_TOLERANCE = 1e-6
+
+
+def expected_sums(rows: Iterable[Datapoint]) -> dict[int, float]:
+    """Sums by hour index the readings produce, the latest row of an hour winning."""
+    return {hour_index(row.timestamp): row.value for row in rows}
+
+
+def find_mismatches(
+    expected: dict[int, float],
+    stored_pages: Iterable[list[dict[str, Any]]],
+    tolerance: float = SUM_TOLERANCE,
+) -> list[int]:
+    """Hours whose stored sum is missing or differs from the expected one.
+
+    `stored_pages` are recorder rows (`start`, `sum`) consumed one page at a
+    time; only the expected sums are held in memory.
+    """
+    unseen = set(expected)
+    mismatched: list[int] = []
+    for page in stored_pages:
+        for row in page:
+            # `start` is a datetime or a UNIX timestamp depending on HA version
+            start = hour_index(row["start"])
+            if start not in expected:
+                continue
+            unseen.discard(start)
+            stored = row.get("sum")
+            if stored is None or abs(stored - expected[start]) > tolerance * max(
+                1.0, abs(expected[start])
+            ):
+                mismatched.append(start)
+    mismatched.extend(unseen)
+    return sorted(mismatched)
+
+
+def group_ranges(hours: list[int]) -> list[tuple[int, int]]:
+    """Group sorted hour indices into contiguous (first, last) ranges."""
+    ranges: list[tuple[int, int]] = []
+    for hour in hours:
+        if ranges and hour - ranges[-1][1] == 1:
+            ranges[-1] = (ranges[-1][0], hour)
+        else:
+            ranges.append((hour, hour))
+    return ranges
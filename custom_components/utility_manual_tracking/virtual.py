@@ -0,0 +1,166 @@
+"""Incremental state of virtual meters summing other meters.
+
+A virtual meter's statistics sum is the running total of its members'
+hourly consumption. Members report the rows of each batch of readings they
+write; the consumption per hour (difference to the member's previous sum)
+is added to an open window of hourly deltas. Hours before the oldest
+member's latest hour can no longer change, so they are folded into a
+closed total and dropped from the window.
+
+Members also rewrite hours they wrote before (rebuilds, repairs, refined
+device data). The window keeps every member's sums over its open hours, so
+a rewritten hour is applied as the difference to the sum it replaces.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from custom_components.utility_manual_tracking.fitter import Datapoint
+from custom_components.utility_manual_tracking.timebase import (
+    hour_datetime,
+    hour_index,
+)
+
+
+class VirtualMeterWindow:
+    """Open window of summed member deltas by hour index."""
+
+    def __init__(self) -> None:
+        # Sum of every delta before `window_start`
+        self.closed_sum = 0.0
+        self.window_start: int | None = None
+        self.deltas: dict[int, float] = {}
+        # Member entity_id -> (hour index, sum) of its latest row
+        self.members: dict[str, tuple[int, float]] = {}
+        # Member entity_id -> hour index -> sum, over the open hours
+        self.member_sums: dict[str, dict[int, float]] = {}
+        self.total = 0.0
+
+    def add_member_rows(
+        self, entity_id: str, previous: Datapoint | None, rows: list[Datapoint]
+    ) -> list[Datapoint]:
+        """Add the rows a member just wrote, returns the rows to write.
+
+        `previous` is the member's reading before the batch (None for its
+        first one); a member's first row is only a baseline. Rows of hours
+        the member already wrote replace them (see `_rewrite`). Only hours
+        from the first one touched to the latest one in the window are
+        returned.
+        """
+        last = self.members.get(entity_id)
+        sums = self.member_sums.setdefault(entity_id, {})
+        if last is None and previous is not None:
+            last = (hour_index(previous.timestamp), previous.value)
+            sums[last[0]] = last[1]
+
+        touched: int | None = None
+        for row in rows:
+            hour = hour_index(row.timestamp)
+            if last is None:
+                last = (hour, row.value)
+                sums[hour] = row.value
+                continue
+            if hour < last[0]:
+                target = self._rewrite(entity_id, hour, row.value)
+                if target is not None:
+                    touched = target if touched is None else min(touched, target)
+                continue
+
+            target = self._target(hour)
+            delta = row.value - last[1]
+            self.deltas[target] = self.deltas.get(target, 0.0) + delta
+            self.total += delta
+            touched = target if touched is None else min(touched, target)
+            last = (hour, row.value)
+            sums[hour] = row.value
+        if last is not None:
+            self.members[entity_id] = last
+
+        if touched is None:
+            self._close()
+            return []
+
+        running = self.closed_sum + sum(
+            delta for hour, delta in self.deltas.items() if hour < touched
+        )
+        written: list[Datapoint] = []
+        for hour in range(touched, max(self.deltas) + 1):
+            running += self.deltas.get(hour, 0.0)
+            written.append(Datapoint(running, hour_datetime(hour)))
+        self._close()
+        return written
+
+    def _target(self, hour: int) -> int:
+        """Hour a change lands in: closed hours are final, late changes go to the window."""
+        return hour if self.window_start is None else max(hour, self.window_start)
+
+    def _rewrite(self, entity_id: str, hour: int, value: float) -> int | None:
+        """Replace a sum a member wrote before, returns the first hour it changed.
+
+        The member's consumption changes by the difference in that hour, and
+        by the opposite in the next hour it wrote, whose sum is unchanged.
+        """
+        sums = self.member_sums[entity_id]
+        if hour not in sums:
+            # Closed, the open hours do not depend on it
+            return None
+        difference = value - sums[hour]
+        sums[hour] = value
+        following = hour + 1 if hour + 1 in sums else min(h for h in sums if h > hour)
+        start, end = self._target(hour), self._target(following)
+        if difference == 0 or start == end:
+            return None
+        self.deltas[start] = self.deltas.get(start, 0.0) + difference
+        self.deltas[end] = self.deltas.get(end, 0.0) - difference
+        return start
+
+    def _close(self) -> None:
+        """Fold the hours no member can touch anymore into the closed sum."""
+        if not self.members:
+            return
+        oldest = min(hour for hour, _ in self.members.values())
+        # Never reopen closed hours, e.g. when a member with older readings joins
+        if self.window_start is None or oldest > self.window_start:
+            self.window_start = oldest
+        for hour in [hour for hour in self.deltas if hour < self.window_start]:
+            self.closed_sum += self.deltas.pop(hour)
+        # Rewriting a closed hour leaves the open ones unchanged, see `_rewrite`
+        for sums in self.member_sums.values():
+            for hour in [hour for hour in sums if hour < self.window_start]:
+                del sums[hour]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Convert to dict."""
+        return {
+            "closed_sum": self.closed_sum,
+            "window_start": self.window_start,
+            "deltas": [[hour, delta] for hour, delta in sorted(self.deltas.items())],
+            "members": {key: list(last) for key, last in self.members.items()},
+            "member_sums": {
+                key: [[hour, value] for hour, value in sorted(sums.items())]
+                for key, sums in self.member_sums.items()
+            },
+            "total": self.total,
+        }
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> VirtualMeterWindow:
+        """Create from dict."""
+        window = VirtualMeterWindow()
+        window.closed_sum = data["closed_sum"]
+        window.window_start = data["window_start"]
+        window.deltas = {int(hour): delta for hour, delta in data["deltas"]}
+        window.members = {
+            key: (int(hour), value) for key, (hour, value) in data["members"].items()
+        }
+        # Stored before rewrites were applied: only the latest sums are known
+        window.member_sums = {
+            key: {int(hour): value for hour, value in sums}
+            for key, sums in data.get(
+                "member_sums",
+                {key: [last] for key, last in data["members"].items()},
+            ).items()
+        }
+        window.total = data["total"]
+        return window
@@ -0,0 +1,118 @@
+"""Websocket API for the Utilities dashboard panel."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.statistics import statistics_during_period
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from custom_components.utility_manual_tracking.aggregates import (
+    compute_aggregates,
+    hourly_changes_from_rows,
+    hourly_heatmap,
+)
+from custom_components.utility_manual_tracking.consts import DOMAIN
+from custom_components.utility_manual_tracking.sensor import (
+    UtilityManualTrackingSensor,
+)
+from custom_components.utility_manual_tracking.statistics import get_statistics_id
+from custom_components.utility_manual_tracking.timebase import (
+    hour_datetime,
+    hour_index,
+)
+
+
+@callback
+def async_register_websocket_commands(hass: HomeAssistant) -> None:
+    """Register the websocket commands used by the dashboard panel."""
+    websocket_api.async_register_command(hass, ws_get_aggregates)
+
+
+def _load_heatmap(
+    hass: HomeAssistant, statistic_id: str, start: datetime
+) -> list[dict[str, float | int]]:
+    """Query the hourly statistic and build the heatmap (runs in the recorder executor)."""
+    stats = statistics_during_period(
+        hass,
+        start,
+        None,
+        {statistic_id},
+        "hour",
+        None,
+        {"change"},
+    )
+    return hourly_heatmap(
+        hourly_changes_from_rows(stats.get(statistic_id, [])),
+        dt_util.get_default_time_zone(),
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/aggregates",
+        vol.Required("entity_id"): str,
+        vol.Optional("days", default=365): vol.All(int, vol.Range(min=1, max=3660)),
+        vol.Optional("months", default=12): vol.All(int, vol.Range(min=1, max=120)),
+        vol.Optional("heatmap", default=False): bool,
+    }
+)
+@websocket_api.async_response
+async def ws_get_aggregates(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict
+) -> None:
+    """Return daily and monthly totals, the month total and optionally the heatmap.
+
+    Totals are read from the meter's rollups; only the hour x weekday heatmap
+    queries the hourly statistics. Results are cached on the sensor and only
+    recomputed after its statistics are written (or rebuilt), or once the
+    window moves on to the next hour.
+    """
+    sensor = hass.data.get(DOMAIN, {}).get(msg["entity_id"])
+    if not isinstance(sensor, UtilityManualTrackingSensor):
+        connection.send_error(
+            msg["id"],
+            websocket_api.ERR_NOT_FOUND,
+            f"Entity {msg['entity_id']} is not a UtilityManualTrackingSensor",
+        )
+        return
+
+    now = dt_util.utcnow()
+    tz = dt_util.get_default_time_zone()
+    statistic_id = get_statistics_id(sensor.unique_id, sensor.algorithm)
+    # The window starts `days` before the current hour, so it moves with it;
+    # the month total depends on the current month, so roll over with it too
+    start_hour = hour_index(now - timedelta(days=msg["days"]))
+    cache_key = (
+        start_hour,
+        now.astimezone(tz).strftime("%Y-%m"),
+        msg["months"],
+        msg["heatmap"],
+    )
+    # Keep a reference: statistics written mid-query swap the cache out,
+    # so the stale result computed here is dropped with the old dict.
+    cache = sensor.aggregates_cache
+    aggregates = cache.get(cache_key)
+    if aggregates is None:
+        start = hour_datetime(start_hour)
+        aggregates = compute_aggregates(sensor.rollups, start, msg["months"], tz, now)
+        if msg["heatmap"]:
+            aggregates["heatmap"] = await get_instance(hass).async_add_executor_job(
+                _load_heatmap, hass, statistic_id, start
+            )
+        cache[cache_key] = aggregates
+
+    connection.send_result(
+        msg["id"],
+        {
+            "entity_id": sensor.entity_id,
+            "statistic_id": statistic_id,
+            **aggregates,
+        },
+    )
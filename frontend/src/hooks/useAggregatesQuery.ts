@@ -0,0 +1,121 @@
+import { useState, useEffect, useMemo, useCallback } from "react";
+import { useHass } from "./useHass";
+import type { MeterAggregates } from "../types";
+
+interface CacheEntry {
+  data: MeterAggregates;
+  expiresAt: number;
+}
+
+// Module-level cache survives component unmount/remount
+const cache = new Map<string, CacheEntry>();
+// Deduplicate concurrent requests for the same cache key.
+const inflight = new Map<string, Promise<MeterAggregates>>();
+
+interface UseAggregatesQueryOptions {
+  /** Days of daily totals (and heatmap hours) to return */
+  days: number;
+  /** Months of monthly totals to return. Default: 12. */
+  months?: number;
+  /** Also return the hour x weekday heatmap. Default: false. */
+  heatmap?: boolean;
+  /** How long data stays fresh (ms). Default: 5 minutes. */
+  staleTime?: number;
+  /** Set false to skip fetching. Default: true. */
+  enabled?: boolean;
+}
+
+/**
+ * Daily/monthly totals of a meter, aggregated server-side by the
+ * `utility_manual_tracking/aggregates` websocket command.
+ */
+export function useAggregatesQuery(entityId: string, options: UseAggregatesQueryOptions) {
+  const hass = useHass();
+
+  const days = Math.min(Math.max(Math.ceil(options.days), 1), 3660);
+  const months = options.months ?? 12;
+  const heatmap = options.heatmap === true;
+  const staleTime = options.staleTime ?? 5 * 60 * 1000;
+  const enabled = options.enabled !== false;
+
+  const cacheKey = useMemo(
+    () => JSON.stringify([entityId, days, months, heatmap]),
+    [entityId, days, months, heatmap]
+  );
+
+  const [data, setData] = useState<MeterAggregates | null>(() => {
+    const cached = cache.get(cacheKey);
+    return cached && cached.expiresAt > Date.now() ? cached.data : null;
+  });
+  const [loading, setLoading] = useState(!data);
+  const [error, setError] = useState<Error | null>(null);
+
+  const fetchData = useCallback(async () => {
+    // Check cache first
+    const cached = cache.get(cacheKey);
+    if (cached && cached.expiresAt > Date.now()) {
+      setData(cached.data);
+      setLoading(false);
+      return;
+    }
+
+    setLoading(true);
+    try {
+      let promise = inflight.get(cacheKey);
+      if (!promise) {
+        promise = hass.connection.sendMessagePromise({
+          type: "utility_manual_tracking/aggregates",
+          entity_id: entityId,
+          days,
+          months,
+          heatmap,
+        }) as Promise<MeterAggregates>;
+        inflight.set(cacheKey, promise);
+      }
+
+      const result: MeterAggregates = await promise;
+
+      cache.set(cacheKey, {
+        data: result,
+        expiresAt: Date.now() + staleTime,
+      });
+      setData(result);
+      setError(null);
+    } catch (e) {
+      setError(e instanceof Error ? e : new Error(String(e)));
+    } finally {
+      inflight.delete(cacheKey);
+      setLoading(false);
+    }
+  }, [hass, cacheKey, entityId, days, months, heatmap, staleTime]);
+
+  useEffect(() => {
+    if (!enabled) return;
+
+    let cancelled = false;
+
+    (async () => {
+      await fetchData();
+      if (cancelled) return;
+    })();
+
+    // Refresh when stale time elapses
+    const interval = setInterval(() => {
+      // Invalidate cache so next fetch re-queries
+      cache.delete(cacheKey);
+      if (!cancelled) fetchData();
+    }, staleTime);
+
+    return () => {
+      cancelled = true;
+      clearInterval(interval);
+    };
+  }, [enabled, fetchData, cacheKey, staleTime]);
+
+  const refresh = useCallback(() => {
+    cache.delete(cacheKey);
+    fetchData();
+  }, [cacheKey, fetchData]);
+
+  return { data, loading: loading && !data, error, refresh };
+}
@@ -7,7 +7,7 @@
  *
  * Tab-based fetch strategy:
  *   - "situation": all overview-critical data
- *   - "electricity": adds hourly heatmap data (already fetched by useStatistics)
+ *   - "electricity": adds the hourly heatmap (served by the aggregates command)
  *   - "water": adds water monthly estimate
  *   - "settings": no extra fetching
  */
@@ -47,10 +47,10 @@ export interface DashboardData {
 
 export function useDashboardData(activeTab: TabId): DashboardData {
   const statsEnabled = activeTab !== "settings";
-  const includeHourly = activeTab === "electricity";
+  const includeHeatmap = activeTab === "electricity";
   const { data: elecData, loading: elecLoading, refresh: refreshElec } = useStatistics({
     enabled: statsEnabled,
-    includeHourly,
+    includeHeatmap,
   });
   const { breakdown, loading: deviceLoading, refresh: refreshBreakdown } = useDeviceBreakdown({
     enabled: statsEnabled,
@@ -96,6 +96,7 @@ export function useDashboardData(activeTab: TabId): DashboardData {
     const input: ComputeMetricsInput = {
       dailyStats,
       monthlyStats,
+      monthTotal: elecData?.monthTotal,
       deviceTotals,
       baseLoadTotal,
       waterDailyL: totalDaily,
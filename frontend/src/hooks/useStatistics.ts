@@ -1,26 +1,25 @@
 import { useMemo } from "react";
-import { useRecorderQuery } from "./useRecorderQuery";
+import { useAggregatesQuery } from "./useAggregatesQuery";
 import { useHass } from "./useHass";
 import { useTimeRange } from "./useTimeRange";
-import { statsToDaily } from "../utils/statistics";
 import { getFirstComparableReadingStartISO, maxISOStart } from "../utils/readingBaseline";
-import type { StatisticValue, DailyConsumption } from "../types";
-
-import { toISODate } from "../utils/dateUtils";
+import type { DailyConsumption, HeatmapCell } from "../types";
 
+const ELECTRICITY_ENTITY_ID = "sensor.utility_manual_tracking_electricity_meter_energy";
 const ELECTRICITY_STAT_ID =
   "utility_manual_tracking:utility_manual_tracking_electricity_meter_energy_statistics_device_aware";
 
-export { ELECTRICITY_STAT_ID };
+export { ELECTRICITY_ENTITY_ID, ELECTRICITY_STAT_ID };
 
 export interface ElectricityData {
-  hourlyStats: StatisticValue[];
+  heatmap: HeatmapCell[];
   dailyStats: DailyConsumption[];
   monthlyStats: DailyConsumption[];
+  monthTotal: number;
 }
 
 interface UseStatisticsOptions {
-  includeHourly?: boolean;
+  includeHeatmap?: boolean;
   enabled?: boolean;
 }
 
@@ -44,13 +43,10 @@ export function useStatistics(options: UseStatisticsOptions = {}): {
 } {
   const hass = useHass();
   const { resolved } = useTimeRange();
-  const includeHourly = options.includeHourly !== false;
+  const includeHeatmap = options.includeHeatmap !== false;
   const enabled = options.enabled !== false;
   const baselineStart = useMemo(
-    () =>
-      getFirstComparableReadingStartISO(
-        hass.states["sensor.utility_manual_tracking_electricity_meter_energy"]
-      ),
+    () => getFirstComparableReadingStartISO(hass.states[ELECTRICITY_ENTITY_ID]),
     [hass.states]
   );
   const effectiveRangeStart = useMemo(
@@ -58,69 +54,43 @@ export function useStatistics(options: UseStatisticsOptions = {}): {
     [resolved.start, baselineStart]
   );
 
-  // Hourly stats — uses time range from context
-  const hourlyQuery = useRecorderQuery([ELECTRICITY_STAT_ID], {
-    period: "hour",
-    startTime: effectiveRangeStart,
-    enabled: enabled && includeHourly,
-  });
-
-  // Daily stats — uses time range from context
-  const dailyQuery = useRecorderQuery([ELECTRICITY_STAT_ID], {
-    period: "day",
-    startTime: effectiveRangeStart,
-    enabled,
-  });
-
-  // Monthly stats — always last 365 days (for month-over-month comparison)
-  const monthlyStart = useMemo(() => {
-    const d = new Date();
-    d.setFullYear(d.getFullYear() - 1);
-    return d.toISOString();
-  }, []);
-  const monthlyEffectiveStart = useMemo(
-    () => maxISOStart(monthlyStart, baselineStart),
-    [monthlyStart, baselineStart]
+  // Daily totals and heatmap — from the time range start up to now, aggregated
+  // server-side from the meter's rollups; monthly totals always cover 12 months
+  const days = useMemo(
+    () => (Date.now() - new Date(effectiveRangeStart).getTime()) / 86_400_000,
+    [effectiveRangeStart]
   );
-  const monthlyEnd = useMemo(() => new Date().toISOString(), []);
-
-  const monthlyQuery = useRecorderQuery([ELECTRICITY_STAT_ID], {
-    period: "month",
-    startTime: monthlyEffectiveStart,
-    endTime: monthlyEnd,
-    staleTime: 30 * 60 * 1000, // Monthly data is slow-changing
+  const query = useAggregatesQuery(ELECTRICITY_ENTITY_ID, {
+    days,
+    months: 12,
+    heatmap: includeHeatmap,
     enabled,
   });
 
   const data = useMemo((): ElectricityData | null => {
-    if (!enabled) return null;
-    if (!dailyQuery.data && !(includeHourly && hourlyQuery.data)) return null;
-
-    const hourly = includeHourly ? (hourlyQuery.data?.[ELECTRICITY_STAT_ID] || []) : [];
-    const dailyRaw = dailyQuery.data?.[ELECTRICITY_STAT_ID] || [];
-
-    // When daily query returns empty but hourly has data, aggregate hourly → daily
-    const daily = dailyRaw.length > 0
-      ? dailyRaw.map((s) => ({ date: toISODate(s.start), value: s.change ?? 0 }))
-      : statsToDaily(hourly);
-
-    const monthly = (monthlyQuery.data?.[ELECTRICITY_STAT_ID] || []).map((s) => ({
-      date: toISODate(s.start),
-      value: s.change ?? 0,
-    }));
-
-    return { hourlyStats: hourly, dailyStats: daily, monthlyStats: monthly };
-  }, [enabled, includeHourly, hourlyQuery.data, dailyQuery.data, monthlyQuery.data]);
+    if (!enabled || !query.data) return null;
+
+    // The command returns days up to now, drop those after a past range's end
+    const end = new Date(resolved.end).getTime();
+    const daily = query.data.daily.filter(
+      (d) => new Date(`${d.date}T00:00:00`).getTime() < end
+    );
+
+    return {
+      heatmap: query.data.heatmap ?? [],
+      dailyStats: daily,
+      monthlyStats: query.data.monthly,
+      monthTotal: query.data.month_total,
+    };
+  }, [enabled, query.data, resolved.end]);
 
   return {
     data,
-    loading: enabled && (((includeHourly && hourlyQuery.loading) || dailyQuery.loading) && !data),
-    error: (includeHourly ? hourlyQuery.error : null) || dailyQuery.error || null,
+    loading: enabled && query.loading && !data,
+    error: query.error,
     refresh: () => {
       if (!enabled) return;
-      if (includeHourly) hourlyQuery.refresh();
-      dailyQuery.refresh();
-      monthlyQuery.refresh();
+      query.refresh();
     },
   };
 }
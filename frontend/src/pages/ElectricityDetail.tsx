@@ -15,7 +15,7 @@ import { ReadingTimeline } from "../components/ReadingTimeline";
 import { DayDetailPanel } from "../components/DayDetailPanel";
 import { Card } from "../components/ui/Card";
 import { SkeletonElectricityPage } from "../components/ui/Skeleton";
-import { statsToHourlyHeatmap, dailyAverage } from "../utils/statistics";
+import { dailyAverage } from "../utils/statistics";
 import { forecast } from "../utils/forecast";
 import { dailyCost, monthlyCost, annualProjection } from "../utils/cost";
 
@@ -29,11 +29,10 @@ export function ElectricityDetail() {
   const [drillDay, setDrillDay] = useState<string | null>(null);
 
   const dailyStats = elecData?.dailyStats ?? [];
-  const hourlyStats = elecData?.hourlyStats ?? [];
   const monthlyStats = elecData?.monthlyStats ?? [];
 
   const elecForecast = useMemo(() => forecast(dailyStats), [dailyStats]);
-  const heatmapData = useMemo(() => statsToHourlyHeatmap(hourlyStats), [hourlyStats]);
+  const heatmapData = elecData?.heatmap ?? [];
 
   const totalConsumption = useMemo(
     () => dailyStats.reduce((s, d) => s + d.value, 0),
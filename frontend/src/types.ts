@@ -39,6 +39,23 @@ export interface StatisticValue {
 
 export type StatisticsResult = Record<string, StatisticValue[]>;
 
+export interface HeatmapCell {
+  dayOfWeek: number;
+  hour: number;
+  value: number;
+}
+
+/** Result of the `utility_manual_tracking/aggregates` websocket command. */
+export interface MeterAggregates {
+  entity_id: string;
+  statistic_id: string;
+  daily: DailyConsumption[];
+  monthly: DailyConsumption[];
+  month_total: number;
+  /** Only present when requested with `heatmap: true` */
+  heatmap?: HeatmapCell[];
+}
+
 // Water meter types
 
 export interface WaterMeterData {
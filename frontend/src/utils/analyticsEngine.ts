@@ -107,6 +107,8 @@ export function computeMonthlyPoints(
 export interface ComputeMetricsInput {
   dailyStats: DailyConsumption[];
   monthlyStats: DailyConsumption[];
+  /** Current month total from the aggregates command, else summed from dailyStats */
+  monthTotal?: number;
   deviceTotals: DeviceConsumption[];
   baseLoadTotal: number;
   waterDailyL: number;
@@ -125,6 +127,7 @@ export function computeMetricsSync(input: ComputeMetricsInput): DashboardMetrics
   const {
     dailyStats,
     monthlyStats,
+    monthTotal,
     deviceTotals,
     baseLoadTotal,
     waterDailyL,
@@ -133,7 +136,7 @@ export function computeMetricsSync(input: ComputeMetricsInput): DashboardMetrics
   } = input;
 
   const elecForecast = forecast(dailyStats);
-  const elecMonthTotal = currentMonthTotal(dailyStats);
+  const elecMonthTotal = monthTotal ?? currentMonthTotal(dailyStats);
 
   const deviceTotal = deviceTotals.reduce((s, d) => s + d.value, 0) + baseLoadTotal;
   const effectiveMonthTotal = elecMonthTotal > 0 ? elecMonthTotal : deviceTotal;
@@ -1,16 +1,41 @@
-import { defineConfig } from "vite";
+import { readFileSync, writeFileSync } from "node:fs";
+import { resolve } from "node:path";
+import { brotliCompressSync, gzipSync, constants } from "node:zlib";
+import { defineConfig, type Plugin } from "vite";
 import react from "@vitejs/plugin-react";
 
+const OUT_DIR = "../custom_components/utility_manual_tracking/frontend";
+const BUNDLE = "utility-dashboard-panel.js";
+
+// Write .gz/.br next to the bundle; the integration serves them when accepted.
+function precompress(): Plugin {
+  return {
+    name: "precompress-bundle",
+    apply: "build",
+    closeBundle() {
+      const path = resolve(__dirname, OUT_DIR, BUNDLE);
+      const source = readFileSync(path);
+      writeFileSync(`${path}.gz`, gzipSync(source, { level: 9 }));
+      writeFileSync(
+        `${path}.br`,
+        brotliCompressSync(source, {
+          params: { [constants.BROTLI_PARAM_QUALITY]: 11 },
+        })
+      );
+    },
+  };
+}
+
 export default defineConfig({
-  plugins: [react()],
+  plugins: [react(), precompress()],
   build: {
     lib: {
       entry: "src/main.tsx",
       formats: ["iife"],
       name: "UtilityDashboard",
-      fileName: () => "utility-dashboard-panel.js",
+      fileName: () => BUNDLE,
     },
-    outDir: "../custom_components/utility_manual_tracking/frontend",
+    outDir: OUT_DIR,
     emptyOutDir: false,
     cssCodeSplit: false,
     rollupOptions: {
@@ -0,0 +1,293 @@
+"""Drive the integration with a simulated fleet of meters.
+
+Readings are submitted through `handle_update_meter_value` and rebuilds
+started through `handle_reset_meter_statistics`, against a real
+`HomeAssistant` core. Meters write to the in-memory statistics backend (or
+the SQLite one with `--sqlite`) instead of the recorder, `Store` is replaced
+by an in-memory stand-in and known-device statistics are synthesized per
+hour, so nothing but `homeassistant` (see requirements.txt) is needed.
+
+Example:
+
+    python scripts/simulate_load.py --meters 500 --years 3 --devices 20
+
+Reports throughput, p50/p99 update latency, event loop blocking and peak RSS.
+The fleet is rebuilt twice; the second rebuild shows how much of it the
+interpolation memo (sized for the fleet like the integration does, or
+`--memo-mb`) still holds.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from contextlib import ExitStack
+from datetime import datetime, timedelta, timezone
+import json
+import os
+import resource
+import statistics as stats_math
+import sys
+import tempfile
+import time
+from typing import Any
+from unittest.mock import patch
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from homeassistant.core import HomeAssistant, ServiceCall  # noqa: E402
+
+from custom_components.utility_manual_tracking import action  # noqa: E402
+from custom_components.utility_manual_tracking.algorithms import (  # noqa: E402
+    INTERPOLATION_MEMO,
+)
+from custom_components.utility_manual_tracking.consts import DOMAIN  # noqa: E402
+from custom_components.utility_manual_tracking.memo import (  # noqa: E402
+    meter_budget_bytes,
+)
+from custom_components.utility_manual_tracking.sensor import (  # noqa: E402
+    UtilityManualTrackingSensor,
+)
+from custom_components.utility_manual_tracking.statistics_backend import (  # noqa: E402
+    MemoryStatistics,
+    SQLiteStatistics,
+)
+from custom_components.utility_manual_tracking.timebase import (  # noqa: E402
+    hours_starting_in,
+)
+
+DEVICE_PREFIX = "sensor.sim_device_"
+
+
+def _device_change(statistic_id: str, hour: int) -> float:
+    """Deterministic pseudo-random device consumption, mostly idle."""
+    seed = zlib.crc32(f"{statistic_id}:{hour}".encode())
+    return (seed % 1000) / 10000 if seed % 4 == 0 else 0.0
+
+
+class SimulatedDevices:
+    """Device consumption synthesized per entity and hour, so any span can be queried."""
+
+    def device_consumption(
+        self, entities: list[str], unit: str, start: datetime, end: datetime
+    ) -> dict[int, float]:
+        hourly: dict[int, float] = {}
+        for hour in hours_starting_in(start, end):
+            total = sum(_device_change(entity_id, hour) for entity_id in entities)
+            if total > 0:
+                hourly[hour] = total
+        return hourly
+
+
+class SimulatedMemoryStatistics(SimulatedDevices, MemoryStatistics):
+    pass
+
+
+class SimulatedSQLiteStatistics(SimulatedDevices, SQLiteStatistics):
+    pass
+
+
+class StoreStandIn:
+    """In-memory `Store`, serializing like the real one to track sizes."""
+
+    saved_bytes: dict[str, int] = {}
+
+    def __init__(self, hass: HomeAssistant, version: int, key: str, **kwargs: Any) -> None:
+        self._key = key
+        self._data: str | None = None
+
+    def __class_getitem__(cls, item: Any) -> type[StoreStandIn]:
+        return cls
+
+    async def async_load(self) -> Any:
+        return json.loads(self._data) if self._data is not None else None
+
+    async def async_save(self, data: Any) -> None:
+        self._data = json.dumps(data, default=str)
+        StoreStandIn.saved_bytes[self._key] = len(self._data)
+
+
+class LoopMonitor:
+    """Measure how late the event loop wakes a short periodic sleep."""
+
+    def __init__(self, interval: float = 0.005) -> None:
+        self.interval = interval
+        self.max_block = 0.0
+        self.total_block = 0.0
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            late = time.perf_counter() - started - self.interval
+            if late > 0.001:
+                self.max_block = max(self.max_block, late)
+                self.total_block += late
+
+
+class _Referenced:
+    def __init__(self, entity_ids: list[str]) -> None:
+        self.referenced = set(entity_ids)
+
+
+def _hit_rate(before: dict[str, Any], after: dict[str, Any]) -> float | None:
+    hits = after["hits"] - before["hits"]
+    lookups = hits + after["misses"] - before["misses"]
+    return round(hits / lookups, 3) if lookups else None
+
+
+def _percentile(values: list[float], percentile: float) -> float:
+    if not values:
+        return 0.0
+    return stats_math.quantiles(values, n=100, method="inclusive")[percentile - 1]
+
+
+async def simulate(args: argparse.Namespace) -> dict[str, Any]:
+    recorder = (
+        SimulatedSQLiteStatistics(args.sqlite)
+        if args.sqlite
+        else SimulatedMemoryStatistics()
+    )
+    INTERPOLATION_MEMO.resize(
+        int(args.memo_mb * 1024 * 1024)
+        if args.memo_mb is not None
+        else meter_budget_bytes(args.meters)
+    )
+    with tempfile.TemporaryDirectory() as config_dir, ExitStack() as stack:
+        hass = HomeAssistant(config_dir)
+        hass.data[DOMAIN] = {}
+        for target, replacement in [
+            ("custom_components.utility_manual_tracking.sensor.Store", StoreStandIn),
+            # Meters are not in the entity registry, targets are plain entity IDs
+            (
+                "custom_components.utility_manual_tracking.action.service.async_extract_referenced_entity_ids",
+                lambda hass, call: _Referenced(call.data["entity_id"]),
+            ),
+        ]:
+            stack.enter_context(patch(target, replacement))
+
+        sensors: list[UtilityManualTrackingSensor] = []
+        for meter in range(args.meters):
+            sensor = UtilityManualTrackingSensor(
+                hass,
+                f"Sim meter {meter}",
+                "kWh",
+                "energy",
+                args.algorithm,
+                [f"{DEVICE_PREFIX}{meter}_{device}" for device in range(args.devices)],
+                statistics=recorder,
+            )
+            sensor.hass = hass
+            hass.data[DOMAIN][sensor.entity_id] = sensor
+            sensors.append(sensor)
+
+        monitor = LoopMonitor()
+        monitor.start()
+
+        # Readings every `interval_days`, at a different hour for every meter
+        start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        start -= timedelta(days=365 * args.years)
+        steps = int(365 * args.years / args.interval_days)
+        latencies: list[float] = []
+
+        async def update(sensor: UtilityManualTrackingSensor, step: int, offset: int) -> None:
+            read_at = start + timedelta(days=step * args.interval_days, hours=offset % 24)
+            call = ServiceCall(
+                hass,
+                DOMAIN,
+                "update_meter_value",
+                {
+                    "entity_id": [sensor.entity_id],
+                    "value": step * 10.0 + offset % 7,
+                    # Service dates are local time, like the UI sends them
+                    "date": read_at.astimezone().strftime(action.DATE_FORMAT),
+                },
+            )
+            started = time.perf_counter()
+            await action.handle_update_meter_value(call)
+            latencies.append(time.perf_counter() - started)
+
+        updates_started = time.perf_counter()
+        for step in range(steps):
+            await asyncio.gather(
+                *(update(sensor, step, offset) for offset, sensor in enumerate(sensors))
+            )
+        updates_elapsed = time.perf_counter() - updates_started
+        update_block = (monitor.max_block, monitor.total_block)
+
+        async def rebuild_fleet() -> dict[str, Any]:
+            monitor.max_block = monitor.total_block = 0.0
+            rows_before = recorder.rows_written
+            memo_before = INTERPOLATION_MEMO.stats()
+            started = time.perf_counter()
+            await action.handle_reset_meter_statistics(
+                ServiceCall(
+                    hass,
+                    DOMAIN,
+                    "reset_meter_statistics",
+                    {"entity_id": [sensor.entity_id for sensor in sensors]},
+                )
+            )
+            await asyncio.gather(*(sensor.async_start_rebuild() for sensor in sensors))
+            return {
+                "seconds": round(time.perf_counter() - started, 2),
+                "rows_written": recorder.rows_written - rows_before,
+                "loop_block_max_ms": round(monitor.max_block * 1000, 2),
+                "loop_block_total_s": round(monitor.total_block, 3),
+                "memo_hit_rate": _hit_rate(memo_before, INTERPOLATION_MEMO.stats()),
+            }
+
+        reset = await rebuild_fleet()
+        repeat = await rebuild_fleet()
+        await monitor.stop()
+        await hass.async_block_till_done()
+
+    readings = len(latencies)
+    return {
+        "meters": args.meters,
+        "readings": readings,
+        "updates_per_second": round(readings / updates_elapsed, 1),
+        "update_latency_p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "update_latency_p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "update_loop_block_max_ms": round(update_block[0] * 1000, 2),
+        "update_loop_block_total_s": round(update_block[1], 3),
+        **{f"reset_{key}": value for key, value in reset.items()},
+        **{f"repeat_reset_{key}": value for key, value in repeat.items()},
+        "interpolation_memo": INTERPOLATION_MEMO.stats(),
+        "store_bytes_per_meter": round(
+            sum(StoreStandIn.saved_bytes.values()) / max(1, len(StoreStandIn.saved_bytes))
+        ),
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--meters", type=int, default=500)
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--devices", type=int, default=20, help="known devices per meter")
+    parser.add_argument("--interval-days", type=float, default=7, help="days between readings")
+    parser.add_argument("--algorithm", default="device_aware")
+    parser.add_argument("--sqlite", help="keep statistics in this SQLite file instead of memory")
+    parser.add_argument(
+        "--memo-mb",
+        type=float,
+        help="interpolation memo budget, sized for --meters by default",
+    )
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(simulate(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
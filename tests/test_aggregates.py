@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta, timezone
+
+from custom_components.utility_manual_tracking.aggregates import (
+    HourlyChange,
+    compute_aggregates,
+    hourly_changes_from_rows,
+    hourly_heatmap,
+)
+from custom_components.utility_manual_tracking.fitter import Datapoint
+from custom_components.utility_manual_tracking.rollups import MeterRollups
+
+CET = timezone(timedelta(hours=1))
+
+
+def test_hourly_changes_from_rows_accepts_timestamps_and_datetimes():
+    """Recorder rows may carry `start` as a datetime or a UNIX timestamp."""
+    rows = [
+        {"start": datetime(2023, 10, 1, 0, 0, tzinfo=timezone.utc), "change": 1.5},
+        {"start": datetime(2023, 10, 1, 1, 0, tzinfo=timezone.utc).timestamp(), "change": None},
+    ]
+
+    changes = hourly_changes_from_rows(rows)
+
+    assert changes == [
+        HourlyChange(datetime(2023, 10, 1, 0, 0, tzinfo=timezone.utc), 1.5),
+        HourlyChange(datetime(2023, 10, 1, 1, 0, tzinfo=timezone.utc), 0.0),
+    ]
+
+
+def test_hourly_heatmap_averages_cells():
+    """Each (weekday, hour) cell is the mean of its hours, Sunday being 0."""
+    changes = [
+        # Both are Sundays at 10:00 UTC
+        HourlyChange(datetime(2023, 10, 1, 10, 0, tzinfo=timezone.utc), 1.0),
+        HourlyChange(datetime(2023, 10, 8, 10, 0, tzinfo=timezone.utc), 3.0),
+        # Monday 11:00 UTC
+        HourlyChange(datetime(2023, 10, 2, 11, 0, tzinfo=timezone.utc), 4.0),
+    ]
+
+    assert hourly_heatmap(changes, timezone.utc) == [
+        {"dayOfWeek": 0, "hour": 10, "value": 2.0},
+        {"dayOfWeek": 1, "hour": 11, "value": 4.0},
+    ]
+
+
+def test_compute_aggregates_reads_rollups():
+    """Daily totals start on the local day of `start`, monthly ones go back `months`."""
+    rollups = MeterRollups()
+    rollups.add_rows(
+        [
+            Datapoint(0.0, datetime(2023, 8, 31, 12, 0, tzinfo=timezone.utc)),
+            Datapoint(4.0, datetime(2023, 9, 30, 12, 0, tzinfo=timezone.utc)),
+            # 23:00 UTC is already 1 October in CET
+            Datapoint(5.0, datetime(2023, 9, 30, 23, 0, tzinfo=timezone.utc)),
+            Datapoint(7.5, datetime(2023, 10, 2, 5, 0, tzinfo=timezone.utc)),
+        ],
+        CET,
+    )
+
+    result = compute_aggregates(
+        rollups,
+        datetime(2023, 9, 30, 23, 30, tzinfo=timezone.utc),
+        2,
+        CET,
+        datetime(2023, 10, 15, tzinfo=timezone.utc),
+    )
+
+    assert result == {
+        "daily": [
+            {"date": "2023-10-01", "value": 1.0},
+            {"date": "2023-10-02", "value": 2.5},
+        ],
+        "monthly": [
+            {"date": "2023-09-01", "value": 4.0},
+            {"date": "2023-10-01", "value": 3.5},
+        ],
+        "month_total": 3.5,
+    }
+
+
+def test_compute_aggregates_empty():
+    """No statistics yield empty aggregates."""
+    now = datetime(2023, 10, 15, tzinfo=timezone.utc)
+
+    result = compute_aggregates(MeterRollups(), now, 12, timezone.utc, now)
+
+    assert result == {"daily": [], "monthly": [], "month_total": 0.0}
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+from custom_components.utility_manual_tracking.analytics import MeterAnalytics
+from custom_components.utility_manual_tracking.fitter import Datapoint
+
+
+def _daily_readings(rates: list[float]) -> list[Datapoint]:
+    """Build one reading per day consuming `rates[i]` on day i."""
+    start = datetime(2023, 10, 1, 0, 0)
+    readings = [Datapoint(0.0, start)]
+    for i, rate in enumerate(rates):
+        readings.append(Datapoint(readings[-1].value + rate, start + timedelta(days=i + 1)))
+    return readings
+
+
+def test_forecast_no_readings():
+    """Without any gap there is nothing to forecast."""
+    assert MeterAnalytics().forecast() is None
+    assert MeterAnalytics().anomaly_zscore is None
+
+
+def test_forecast_constant_rate():
+    """A steady consumption forecasts the same daily rate."""
+    analytics = MeterAnalytics.from_datapoints(_daily_readings([10.0] * 5))
+    forecast = analytics.forecast()
+
+    assert abs(forecast["daily_rate"] - 10.0) < 1e-9
+    assert abs(forecast["monthly"] - 304.4) < 1e-9
+    assert abs(forecast["trend_per_day"]) < 1e-9
+
+
+def test_forecast_follows_trend():
+    """An increasing consumption is projected along the regression line."""
+    analytics = MeterAnalytics.from_datapoints(_daily_readings([1.0, 2.0, 3.0, 4.0]))
+    forecast = analytics.forecast()
+
+    assert abs(forecast["daily_rate"] - 4.0) < 1e-9
+    assert abs(forecast["trend_per_day"] - 1.0) < 1e-9
+    assert abs(forecast["confidence"] - 1.0) < 1e-9
+
+
+def test_anomaly_zscore_flags_spike():
+    """A spike after a noisy but stable history gets a high z-score."""
+    analytics = MeterAnalytics.from_datapoints(
+        _daily_readings([10.0, 11.0, 9.0, 10.0, 11.0, 9.0, 10.0, 40.0])
+    )
+
+    assert analytics.anomaly_zscore > 3
+
+
+def test_anomaly_zscore_needs_history():
+    """No score until the window holds enough samples."""
+    analytics = MeterAnalytics.from_datapoints(_daily_readings([10.0, 11.0, 40.0]))
+
+    assert analytics.anomaly_zscore is None
+
+
+def test_window_is_bounded():
+    """Old rates leave the window and the sums with it."""
+    rates = [100.0] * 10 + [5.0] * MeterAnalytics.WINDOW_SIZE
+    analytics = MeterAnalytics.from_datapoints(_daily_readings(rates))
+
+    assert abs(analytics.forecast()["daily_rate"] - 5.0) < 1e-6
+
+
+def test_analytics_serializable():
+    """The state round-trips through its dict form."""
+    analytics = MeterAnalytics.from_datapoints(_daily_readings([1.0, 2.0, 3.0]))
+    restored = MeterAnalytics.from_dict(analytics.as_dict())
+
+    assert restored.forecast() == analytics.forecast()
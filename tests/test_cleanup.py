@@ -0,0 +1,34 @@
+from custom_components.utility_manual_tracking.cleanup import (
+    batched,
+    orphaned_statistic_ids,
+)
+from custom_components.utility_manual_tracking.statistics_backend import (
+    get_statistics_id,
+)
+
+
+def test_orphaned_statistic_ids():
+    live = {get_statistics_id("utility_manual_tracking_power_energy", "device_aware")}
+    existing = [
+        get_statistics_id("utility_manual_tracking_power_energy", "linear"),
+        get_statistics_id("utility_manual_tracking_power_energy", "device_aware"),
+        get_statistics_id("utility_manual_tracking_old_name_energy", "linear"),
+        # Written by another integration
+        "sensor.power",
+        "other_integration:power",
+    ]
+
+    assert orphaned_statistic_ids(existing, live) == [
+        get_statistics_id("utility_manual_tracking_old_name_energy", "linear"),
+        get_statistics_id("utility_manual_tracking_power_energy", "linear"),
+    ]
+
+
+def test_batched():
+    items = [str(index) for index in range(45)]
+
+    batches = list(batched(items, 20))
+
+    assert [len(batch) for batch in batches] == [20, 20, 5]
+    assert [item for batch in batches for item in batch] == items
+    assert list(batched([], 20)) == []
@@ -0,0 +1,147 @@
+from datetime import datetime
+import threading
+
+from custom_components.utility_manual_tracking.device_data import (
+    DeviceConsumptionCache,
+    gaps_with_device_data,
+    uncompiled_hours,
+)
+from custom_components.utility_manual_tracking.fitter import Datapoint
+from custom_components.utility_manual_tracking.memory import deep_sizeof
+from custom_components.utility_manual_tracking.timebase import hour_index
+
+
+class _Query:
+    def __init__(self) -> None:
+        self.calls: list[tuple[datetime, datetime]] = []
+
+    def __call__(self, start: datetime, end: datetime) -> dict[datetime, float]:
+        self.calls.append((start, end))
+        return {start: 1.0}
+
+
+def test_cache_answers_spans_inside_fetched_span():
+    """A gap inside an already fetched span does not query again."""
+    cache = DeviceConsumptionCache()
+    query = _Query()
+
+    cache.hourly_consumption(["sensor.a"], "kWh", datetime(2023, 10, 1), datetime(2023, 10, 10), query)
+    cache.hourly_consumption(["sensor.a"], "kWh", datetime(2023, 10, 2), datetime(2023, 10, 3), query)
+
+    assert query.calls == [(datetime(2023, 10, 1), datetime(2023, 10, 10))]
+    assert cache.queries == 1
+    assert cache.hits == 1
+
+
+def test_cache_is_shared_by_device_set_and_unit():
+    """Meters with the same devices share entries, other units or devices do not."""
+    cache = DeviceConsumptionCache()
+    query = _Query()
+    start, end = datetime(2023, 10, 1), datetime(2023, 10, 2)
+
+    cache.hourly_consumption(["sensor.a", "sensor.b"], "kWh", start, end, query)
+    cache.hourly_consumption(["sensor.b", "sensor.a"], "kWh", start, end, query)
+    cache.hourly_consumption(["sensor.a", "sensor.b"], "Wh", start, end, query)
+    cache.hourly_consumption(["sensor.a"], "kWh", start, end, query)
+
+    assert cache.queries == 3
+
+
+def test_cache_widens_span_on_miss():
+    """A request outside the cached span refetches the union of both spans."""
+    cache = DeviceConsumptionCache()
+    query = _Query()
+
+    cache.hourly_consumption(["sensor.a"], "kWh", datetime(2023, 10, 5), datetime(2023, 10, 6), query)
+    cache.hourly_consumption(["sensor.a"], "kWh", datetime(2023, 10, 1), datetime(2023, 10, 2), query)
+    cache.hourly_consumption(["sensor.a"], "kWh", datetime(2023, 10, 3), datetime(2023, 10, 4), query)
+
+    assert query.calls[-1] == (datetime(2023, 10, 1), datetime(2023, 10, 6))
+    assert cache.queries == 2
+
+
+def test_cache_bytes_follow_stored_entries():
+    """The byte count is kept up to date as entries are stored and replaced."""
+    cache = DeviceConsumptionCache()
+    start = datetime(2023, 10, 1)
+
+    assert cache.approximate_bytes() == 0
+    cache.hourly_consumption(
+        ["sensor.a"], "kWh", start, start, lambda first, last: {1: 1.0}
+    )
+    small = cache.approximate_bytes()
+    cache.hourly_consumption(
+        ["sensor.a"],
+        "kWh",
+        datetime(2023, 9, 1),
+        start,
+        lambda first, last: {hour: 1.0 for hour in range(1000)},
+    )
+
+    assert small > 0
+    # The replaced entry no longer counts
+    assert cache.approximate_bytes() == deep_sizeof({hour: 1.0 for hour in range(1000)})
+
+
+def test_cache_is_safe_to_size_during_parallel_fetches():
+    """Sizing the cache while other threads store entries never fails."""
+    cache = DeviceConsumptionCache()
+    start = datetime(2023, 10, 1)
+    errors: list[Exception] = []
+
+    def fetch(device: int) -> None:
+        try:
+            for offset in range(50):
+                cache.hourly_consumption(
+                    [f"sensor.{device}_{offset}"],
+                    "kWh",
+                    start,
+                    start,
+                    lambda first, last: {hour: 1.0 for hour in range(100)},
+                )
+        except Exception as err:  # noqa: BLE001 - reported below
+            errors.append(err)
+
+    threads = [threading.Thread(target=fetch, args=(device,)) for device in range(4)]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        cache.approximate_bytes()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert cache.queries == 200
+    assert cache.approximate_bytes() == 200 * deep_sizeof(
+        {hour: 1.0 for hour in range(100)}
+    )
+
+
+def test_gaps_with_device_data():
+    """Only gaps whose interpolated hours hold device data are selected."""
+    datapoints = [
+        Datapoint(0, datetime(2023, 10, 1, 0, 30)),
+        Datapoint(5, datetime(2023, 10, 1, 4, 30)),
+        Datapoint(9, datetime(2023, 10, 1, 8, 30)),
+        Datapoint(12, datetime(2023, 10, 1, 12, 30)),
+    ]
+
+    hours = [hour_index(datetime(2023, 10, 1, 5)), hour_index(datetime(2023, 10, 1, 2))]
+    assert gaps_with_device_data(datapoints, hours) == [1, 2]
+    # The reading's own hour holds the reading, not an interpolated value
+    assert gaps_with_device_data(datapoints, [hour_index(datetime(2023, 10, 1, 4))]) == []
+    assert gaps_with_device_data(datapoints, [hour_index(datetime(2023, 10, 2))]) == []
+    assert gaps_with_device_data(datapoints, []) == []
+
+
+def test_uncompiled_hours_are_the_last_ones_before_now():
+    """Only hours the recorder may not have compiled yet are reported."""
+    previous = Datapoint(0, datetime(2023, 10, 1, 0, 30))
+    reading = Datapoint(5, datetime(2023, 10, 1, 9, 30))
+
+    # At 09:40 hour 8 may not be compiled yet, hour 9 certainly is not
+    hours = uncompiled_hours(previous, reading, datetime(2023, 10, 1, 9, 40))
+    assert hours == [hour_index(datetime(2023, 10, 1, 8))]
+
+    # A reading entered long after the fact has every hour compiled
+    assert uncompiled_hours(previous, reading, datetime(2023, 10, 2, 12)) == []
@@ -0,0 +1,67 @@
+import csv
+from datetime import datetime
+import json
+
+from custom_components.utility_manual_tracking.export import (
+    FORMAT_CSV,
+    FORMAT_JSONL,
+    gap_records,
+    write_records,
+)
+from custom_components.utility_manual_tracking.fitter import Datapoint
+from custom_components.utility_manual_tracking.timebase import hour_index
+
+
+def test_gap_records_split_device_and_base():
+    previous = Datapoint(10, datetime(2023, 10, 1, 0))
+    interpolated = [
+        Datapoint(13, datetime(2023, 10, 1, 1)),
+        Datapoint(14, datetime(2023, 10, 1, 2)),
+    ]
+    reading = Datapoint(15, datetime(2023, 10, 1, 3))
+    device = {hour_index(datetime(2023, 10, 1, 1)): 2.0}
+
+    records = list(gap_records("sensor.meter", previous, interpolated, reading, device))
+
+    assert [(r["kind"], r["value"], r["device"], r["base"]) for r in records] == [
+        ("interpolated", 13, 2.0, 1.0),
+        ("interpolated", 14, 0.0, 1.0),
+        ("reading", 15, None, None),
+    ]
+
+
+def test_gap_records_without_device_data():
+    reading = Datapoint(15, datetime(2023, 10, 1, 3))
+
+    records = list(
+        gap_records(
+            "sensor.meter",
+            Datapoint(10, datetime(2023, 10, 1, 1)),
+            [Datapoint(12, datetime(2023, 10, 1, 2))],
+            reading,
+        )
+    )
+
+    assert records[0]["device"] is None and records[0]["base"] is None
+    assert records[1]["timestamp"] == reading.timestamp.isoformat()
+
+
+def test_write_records_consumes_a_generator(tmp_path):
+    """Records can come from a generator and are written as CSV or JSON lines."""
+
+    def records():
+        for hour in range(3):
+            yield from gap_records(
+                "sensor.meter", None, [], Datapoint(hour, datetime(2023, 10, 1, hour))
+            )
+
+    csv_path = tmp_path / "export.csv"
+    assert write_records(records(), str(csv_path), FORMAT_CSV) == 3
+    with open(csv_path, encoding="utf-8") as file:
+        rows = list(csv.DictReader(file))
+    assert [row["value"] for row in rows] == ["0", "1", "2"]
+
+    jsonl_path = tmp_path / "export.jsonl"
+    assert write_records(records(), str(jsonl_path), FORMAT_JSONL) == 3
+    with open(jsonl_path, encoding="utf-8") as file:
+        assert json.loads(file.readline())["kind"] == "reading"
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+
+from custom_components.utility_manual_tracking.algorithms import (
+    extrapolate,
+    extrapolation_fit,
+    interpolate,
+)
+from custom_components.utility_manual_tracking.fitter import Datapoint
+from custom_components.utility_manual_tracking.least_squares_fitter import (
+    LeastSquaresExtrapolate,
+    LeastSquaresFit,
+)
+
+
+def test_least_squares_interpolate_is_linear():
+    """Statistics between readings are filled linearly."""
+    old_datapoints = [Datapoint(1, datetime(2023, 10, 1, 0, 0))]
+    new_datapoint = Datapoint(4, datetime(2023, 10, 1, 3, 0))
+
+    missing_datapoints = interpolate("least_squares", old_datapoints, new_datapoint)
+
+    assert [d.value for d in missing_datapoints] == [2, 3]
+
+
+def test_least_squares_extrapolate_uses_all_readings():
+    """The slope comes from the whole history, anchored at the last reading."""
+    datapoints = [
+        Datapoint(0, datetime(2023, 10, 1, 0, 0)),
+        Datapoint(10, datetime(2023, 10, 1, 1, 0)),
+        Datapoint(20, datetime(2023, 10, 1, 2, 0)),
+        # Noisy last reading, a two-point slope would be 40/hr
+        Datapoint(60, datetime(2023, 10, 1, 3, 0)),
+    ]
+    now = datetime(2023, 10, 1, 4, 0)
+
+    extrapolated = LeastSquaresExtrapolate().guesstimate(datapoints, now)
+
+    # Least-squares slope of the 4 points is 19/hr
+    assert abs(extrapolated.value - 79) < 1e-9
+    assert extrapolated.timestamp == now
+
+
+def test_least_squares_extrapolate_no_datapoints():
+    """Extrapolation with no data returns None."""
+    assert LeastSquaresExtrapolate().guesstimate([], datetime(2023, 10, 1)) is None
+
+
+def test_least_squares_extrapolate_one_datapoint():
+    """Extrapolation with one datapoint returns that value."""
+    now = datetime(2023, 10, 1, 4, 0)
+    extrapolated = LeastSquaresExtrapolate().guesstimate(
+        [Datapoint(5, datetime(2023, 10, 1, 0, 0))], now
+    )
+
+    assert extrapolated.value == 5
+
+
+def test_least_squares_fit_is_incremental():
+    """Adding readings one by one matches fitting them all at once."""
+    start = datetime(2023, 10, 1, 0, 0)
+    datapoints = [Datapoint(i * i, start + timedelta(hours=i)) for i in range(6)]
+    now = start + timedelta(hours=8)
+
+    fit = LeastSquaresFit()
+    for datapoint in datapoints:
+        fit.add(datapoint)
+
+    expected = LeastSquaresExtrapolate().guesstimate(datapoints, now)
+    assert abs(fit.evaluate(now).value - expected.value) < 1e-9
+
+
+def test_least_squares_decay_favours_recent_readings():
+    """With decay, the slope follows recent consumption."""
+    start = datetime(2023, 10, 1, 0, 0)
+    # 1/hr for 10 hours then 10/hr for 10 hours
+    values = [float(i) for i in range(11)] + [10.0 + 10 * i for i in range(1, 11)]
+    datapoints = [Datapoint(v, start + timedelta(hours=i)) for i, v in enumerate(values)]
+
+    plain = LeastSquaresExtrapolate().fit(datapoints)
+    decayed = LeastSquaresExtrapolate(half_life=timedelta(hours=2)).fit(datapoints)
+
+    assert decayed.slope_per_hour > plain.slope_per_hour
+    assert abs(decayed.slope_per_hour - 10) < 1
+
+
+def test_least_squares_fit_serializable():
+    """The fit round-trips through its dict form."""
+    start = datetime(2023, 10, 1, 0, 0)
+    fit = LeastSquaresFit(half_life_hours=24)
+    fit.add(Datapoint(1, start))
+    fit.add(Datapoint(3, start + timedelta(hours=1)))
+
+    restored = LeastSquaresFit.from_dict(fit.as_dict())
+    now = start + timedelta(hours=5)
+
+    assert restored.evaluate(now) == fit.evaluate(now)
+
+
+def test_extrapolation_fit_only_for_incremental_algorithms():
+    """Only incremental algorithms get a fit, others go through `extrapolate`."""
+    datapoints = [Datapoint(1, datetime(2023, 10, 1, 0, 0))]
+
+    assert extrapolation_fit("linear", datapoints) is None
+    assert isinstance(extrapolation_fit("least_squares", datapoints), LeastSquaresFit)
+    assert extrapolate("least_squares", datapoints, datetime(2023, 10, 1, 4)).value == 1
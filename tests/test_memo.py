@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+
+from custom_components.utility_manual_tracking.algorithms import (
+    INTERPOLATION_MEMO,
+    interpolate,
+)
+from custom_components.utility_manual_tracking.fitter import Datapoint
+from custom_components.utility_manual_tracking.memo import (
+    BUDGET_BYTES_PER_METER,
+    DEFAULT_BUDGET_BYTES,
+    InterpolationMemo,
+    device_digest,
+    meter_budget_bytes,
+)
+from custom_components.utility_manual_tracking.timebase import hour_index
+
+
+def _rows(start: datetime, count: int) -> list[Datapoint]:
+    return [
+        Datapoint(float(step), start + timedelta(hours=step)) for step in range(count)
+    ]
+
+
+def test_memo_round_trip():
+    memo = InterpolationMemo()
+    rows = _rows(datetime(2023, 1, 1, 0, 30), 5)
+
+    assert memo.get("gap") is None
+    memo.put("gap", rows)
+
+    assert memo.get("gap") == rows
+    assert (memo.hits, memo.misses) == (1, 1)
+
+
+def test_memo_skips_irregular_rows():
+    memo = InterpolationMemo()
+    rows = _rows(datetime(2023, 1, 1), 3)
+    rows[2] = Datapoint(2.0, datetime(2023, 1, 1, 5))
+
+    memo.put("gap", rows)
+
+    assert memo.get("gap") is None
+
+
+def test_memo_evicts_least_recently_used():
+    memo = InterpolationMemo()
+    memo.put("first", _rows(datetime(2023, 1, 1), 100))
+    memo.budget_bytes = memo.stats()["bytes"] * 2
+    memo.put("second", _rows(datetime(2023, 1, 1), 100))
+    memo.get("first")
+
+    memo.put("third", _rows(datetime(2023, 1, 1), 100))
+
+    assert memo.get("second") is None
+    assert memo.get("first") is not None
+    assert memo.stats()["evictions"] == 1
+    assert memo.stats()["bytes"] <= memo.budget_bytes
+
+
+def test_memo_resize_evicts_to_the_new_budget():
+    memo = InterpolationMemo()
+    for index in range(4):
+        memo.put(index, _rows(datetime(2023, 1, 1), 100))
+    per_gap = memo.stats()["bytes"] // 4
+
+    memo.resize(per_gap * 2)
+
+    assert memo.stats()["entries"] == 2
+    assert memo.get(0) is None
+    assert memo.get(3) is not None
+
+
+def test_budget_grows_with_the_fleet():
+    """A two-year meter's gaps fit in its share of the budget."""
+    memo = InterpolationMemo(BUDGET_BYTES_PER_METER)
+    start = datetime(2023, 1, 1)
+    # Weekly readings over two years, about 17,500 hourly rows
+    for week in range(104):
+        memo.put(week, _rows(start + timedelta(weeks=week), 7 * 24 - 1))
+
+    assert memo.stats()["evictions"] == 0
+    assert meter_budget_bytes(1) == DEFAULT_BUDGET_BYTES
+    assert meter_budget_bytes(100) > memo.stats()["bytes"] * 100
+
+
+def test_device_digest_only_covers_the_gap():
+    hours = range(10, 13)
+    device = {10: 0.5, 11: 0.0, 12: 1.0}
+
+    assert device_digest(None, hours) is None
+    assert device_digest(device, hours) == device_digest({**device, 20: 3.0}, hours)
+    assert device_digest(device, hours) != device_digest({**device, 11: 0.1}, hours)
+
+
+def test_repeated_interpolation_is_a_hit():
+    INTERPOLATION_MEMO.clear()
+    old = [Datapoint(0.0, datetime(2023, 1, 1))]
+    new = Datapoint(10.0, datetime(2023, 1, 1, 10))
+    hits = INTERPOLATION_MEMO.hits
+
+    first = interpolate("linear", old, new)
+    second = interpolate("linear", old, new)
+
+    assert second == first
+    assert INTERPOLATION_MEMO.hits == hits + 1
+
+
+def test_device_data_change_is_a_miss():
+    INTERPOLATION_MEMO.clear()
+    start = datetime(2023, 1, 1)
+    old = [Datapoint(0.0, start)]
+    new = Datapoint(10.0, start + timedelta(hours=4))
+    device = {hour_index(start) + 1: 2.0}
+
+    before = interpolate("device_aware", old, new, device)
+    after = interpolate("device_aware", old, new, {hour_index(start) + 2: 2.0})
+
+    assert before[0].value - old[0].value > after[0].value - old[0].value
+    assert interpolate("device_aware", old, new, device) == before
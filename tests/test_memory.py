@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+import tracemalloc
+from typing import Any, Callable
+
+from custom_components.utility_manual_tracking.device_data import (
+    DeviceConsumptionCache,
+)
+from custom_components.utility_manual_tracking.fitter import Datapoint
+from custom_components.utility_manual_tracking.memory import deep_sizeof
+from custom_components.utility_manual_tracking.rollups import MeterRollups
+
+COUNT = 10000
+# Budgets in bytes, a regression past one of them means a layout change
+BYTES_PER_READING = 320
+BYTES_PER_DEVICE_HOUR = 128
+BYTES_PER_ROLLUP_DAY = 256
+
+
+def _allocated_per_item(build: Callable[[], Any], count: int = COUNT) -> float:
+    """Bytes still allocated after `build` ran, per item built."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        kept = build()  # noqa: F841 - kept alive until measured
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    return sum(stat.size_diff for stat in after.compare_to(before, "filename")) / count
+
+
+def test_memory_per_reading():
+    """Readings are held as `Datapoint.as_dict()` entries, like the sensor history."""
+    start = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+    def build() -> list[dict[str, float | str]]:
+        return [
+            Datapoint(float(index), start + timedelta(hours=index)).as_dict()
+            for index in range(COUNT)
+        ]
+
+    per_reading = _allocated_per_item(build)
+
+    assert per_reading < BYTES_PER_READING
+    assert deep_sizeof(build()) < COUNT * BYTES_PER_READING
+
+
+def test_memory_per_cached_device_hour():
+    cache = DeviceConsumptionCache()
+    start = datetime(2023, 1, 1)
+
+    per_hour = _allocated_per_item(
+        lambda: cache.hourly_consumption(
+            ["sensor.device"],
+            "kWh",
+            start,
+            start,
+            lambda first, last: {hour: hour * 0.001 for hour in range(COUNT)},
+        )
+    )
+
+    assert per_hour < BYTES_PER_DEVICE_HOUR
+    assert cache.approximate_bytes() < COUNT * BYTES_PER_DEVICE_HOUR
+
+
+def test_memory_per_rollup_day():
+    days = 1000
+    start = datetime(2023, 1, 1, tzinfo=timezone.utc)
+    rows = [
+        Datapoint(float(hour), start + timedelta(hours=hour)) for hour in range(days * 24)
+    ]
+    rollups = MeterRollups()
+
+    per_day = _allocated_per_item(lambda: rollups.add_rows(rows, timezone.utc), days)
+
+    assert per_day < BYTES_PER_ROLLUP_DAY
+
+
+def test_deep_sizeof_counts_shared_objects_once():
+    shared = [1.5] * 100
+    single = deep_sizeof({"a": shared})
+
+    assert deep_sizeof({"a": shared, "b": shared}) < single + 200
+    assert deep_sizeof(Datapoint(1.0, datetime(2023, 1, 1))) > deep_sizeof(1.0)
@@ -0,0 +1,40 @@
+from custom_components.utility_manual_tracking.panel import (
+    PANEL_URL,
+    accepted_encodings,
+    load_panel_bundle,
+)
+
+
+def test_panel_bundle_url_follows_content(tmp_path):
+    """The hashed URL changes with the bundle content."""
+    bundle_file = tmp_path / "bundle.js"
+    bundle_file.write_text("console.log(1);")
+    first = load_panel_bundle(tmp_path, "bundle.js")
+
+    bundle_file.write_text("console.log(2);")
+    second = load_panel_bundle(tmp_path, "bundle.js")
+
+    assert first.url == f"{PANEL_URL}/{first.digest}/bundle.js"
+    assert first.digest != second.digest
+    assert first.variants == {}
+
+
+def test_panel_bundle_finds_precompressed_variants(tmp_path):
+    """Precompressed siblings of the bundle are picked up."""
+    (tmp_path / "bundle.js").write_text("console.log(1);")
+    (tmp_path / "bundle.js.gz").write_bytes(b"gz")
+    (tmp_path / "bundle.js.br").write_bytes(b"br")
+
+    bundle = load_panel_bundle(tmp_path, "bundle.js")
+
+    assert bundle.variants == {
+        "br": tmp_path / "bundle.js.br",
+        "gzip": tmp_path / "bundle.js.gz",
+    }
+
+
+def test_accepted_encodings():
+    """Encodings are parsed case-insensitively and q=0 excludes them."""
+    assert accepted_encodings("gzip, deflate, br") == {"gzip", "deflate", "br"}
+    assert accepted_encodings("GZIP;q=0.5, br;q=0") == {"gzip"}
+    assert accepted_encodings("") == set()
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+import random
+
+from custom_components.utility_manual_tracking.algorithms import (
+    extrapolate,
+    interpolate,
+    looks_ahead,
+)
+from custom_components.utility_manual_tracking.fitter import Datapoint
+from custom_components.utility_manual_tracking.pchip_fitter import (
+    hermite,
+    pchip_slopes,
+)
+
+
+def _readings(values: list[float], hours: list[int]) -> list[Datapoint]:
+    start = datetime(2023, 10, 1)
+    return [
+        Datapoint(value, start + timedelta(hours=hour))
+        for value, hour in zip(values, hours)
+    ]
+
+
+def test_pchip_two_readings_is_linear():
+    """With only two readings the curve is the straight line between them."""
+    old, new = _readings([1, 5], [0, 4])
+
+    missing_datapoints = interpolate("pchip", [old], new)
+
+    assert [datapoint.value for datapoint in missing_datapoints] == [2, 3, 4]
+    assert missing_datapoints[0].timestamp == datetime(2023, 10, 1, 1)
+
+
+def test_pchip_no_old_datapoints():
+    (new,) = _readings([5], [4])
+
+    assert interpolate("pchip", [], new) == []
+
+
+def test_pchip_is_monotone():
+    """Every gap stays within its readings and never decreases."""
+    generator = random.Random(7)
+    hours = [0]
+    values = [0.0]
+    for _ in range(40):
+        hours.append(hours[-1] + generator.randint(2, 200))
+        # Includes idle gaps, where the meter did not move
+        values.append(values[-1] + generator.choice([0, 0.1, 5, 40]))
+    readings = _readings(values, hours)
+
+    for index in range(1, len(readings)):
+        following = readings[index + 1] if index + 1 < len(readings) else None
+        rows = interpolate("pchip", readings[:index], readings[index], following=following)
+        series = [readings[index - 1].value] + [row.value for row in rows]
+        series.append(readings[index].value)
+        assert all(b >= a - 1e-9 for a, b in zip(series, series[1:]))
+
+
+def test_pchip_slope_is_continuous_at_readings():
+    """Both gaps meet a reading with the same slope, unlike linear."""
+    readings = _readings([0, 10, 50], [0, 10, 20])
+    slopes = pchip_slopes(readings)
+    seconds = timedelta(hours=1).total_seconds()
+
+    before = hermite(readings[0], readings[1], (slopes[0], slopes[1]), 10 * seconds - 1)
+    after = hermite(readings[1], readings[2], (slopes[1], slopes[2]), 1)
+
+    assert abs((readings[1].value - before) - (after - readings[1].value)) < 1e-6
+
+
+def test_pchip_window_matches_whole_history():
+    """A gap only depends on its neighbours, so a window fits like the full pass."""
+    readings = _readings([0, 3, 4, 20, 21, 40], [0, 5, 12, 14, 30, 33])
+    slopes = pchip_slopes(readings)
+    seconds = timedelta(hours=1).total_seconds()
+
+    rows = interpolate("pchip", readings[:3], readings[3], following=readings[4])
+
+    expected = [
+        hermite(readings[2], readings[3], (slopes[2], slopes[3]), seconds)
+    ]
+    assert [row.value for row in rows] == expected
+
+
+def test_pchip_following_reading_refits_gap():
+    old = _readings([0, 10], [0, 10])
+    new, following = _readings([20, 100], [20, 21])
+
+    appended = interpolate("pchip", old, new)
+    refit = interpolate("pchip", old, new, following=following)
+
+    assert looks_ahead("pchip") and not looks_ahead("linear")
+    assert refit != appended
+    assert interpolate("linear", old, new, following=following) == interpolate(
+        "linear", old, new
+    )
+
+
+def test_pchip_extrapolates_linearly():
+    readings = _readings([1, 2], [0, 1])
+
+    extrapolated = extrapolate("pchip", readings, datetime(2023, 10, 1, 3))
+
+    assert extrapolated.value == 4
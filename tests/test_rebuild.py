@@ -0,0 +1,111 @@
+import asyncio
+from datetime import datetime
+
+from custom_components.utility_manual_tracking.fitter import Datapoint
+from custom_components.utility_manual_tracking.rebuild import (
+    BacklogPacer,
+    ChunkPacer,
+    RebuildProgress,
+    checkpoint_index,
+)
+
+
+def test_pacer_shrinks_chunks_over_budget():
+    """A chunk holding the loop too long makes the next one smaller."""
+    pacer = ChunkPacer(budget_seconds=0.02, chunk_rows=1000)
+    pacer.record(0.08, 1000)
+
+    assert pacer.chunk_rows == 200
+    assert pacer.max_block_seconds == 0.08
+
+
+def test_pacer_grows_chunks_under_budget():
+    """Fast full chunks double the chunk size up to the maximum."""
+    pacer = ChunkPacer(budget_seconds=0.02, chunk_rows=1000, max_rows=3000)
+    pacer.record(0.001, 1000)
+    pacer.record(0.001, 2000)
+
+    assert pacer.chunk_rows == 3000
+
+
+def test_pacer_ignores_short_tail_chunks():
+    """A partial last chunk says nothing about the chunk size."""
+    pacer = ChunkPacer(chunk_rows=1000)
+    pacer.record(0.0001, 10)
+
+    assert pacer.chunk_rows == 1000
+
+
+def test_pacer_keeps_minimum_chunk():
+    """Chunks never shrink below the minimum."""
+    pacer = ChunkPacer(budget_seconds=0.01, chunk_rows=100, min_rows=24)
+    pacer.record(10.0, 100)
+
+    assert pacer.chunk_rows == 24
+
+
+def test_rebuild_progress_as_dict():
+    """Progress is published as a plain dict."""
+    progress = RebuildProgress("sensor.meter", gaps_total=3, gaps_done=1, rows_written=10)
+
+    assert progress.as_dict() == {
+        "entity_id": "sensor.meter",
+        "gaps_total": 3,
+        "gaps_done": 1,
+        "rows_written": 10,
+        "state": "running",
+        "max_loop_block_ms": 0.0,
+    }
+
+
+def test_checkpoint_index():
+    """The rebuild restarts from the last reading at or before `since`."""
+    datapoints = [
+        Datapoint(0, datetime(2024, 1, 1)),
+        Datapoint(5, datetime(2024, 1, 8)),
+        Datapoint(9, datetime(2024, 1, 15)),
+    ]
+
+    assert checkpoint_index(datapoints, datetime(2024, 1, 10)) == 1
+    assert checkpoint_index(datapoints, datetime(2024, 1, 8)) == 1
+    assert checkpoint_index(datapoints, datetime(2024, 2, 1)) == 2
+    assert checkpoint_index(datapoints, datetime(2023, 12, 31)) is None
+
+
+def test_backlog_pacer_backs_off_and_recovers():
+    """The delay doubles while backed up and halves back to zero after."""
+    pacer = BacklogPacer(threshold=100, min_delay=0.1, max_delay=0.3)
+
+    assert pacer.record(10) == 0
+    assert [pacer.record(500) for _ in range(3)] == [0.1, 0.2, 0.3]
+    # Between half the threshold and the threshold the pace is kept
+    assert pacer.record(80) == 0.3
+    assert [pacer.record(10) for _ in range(2)] == [0.15, 0]
+
+
+def test_backlog_pacer_waits_until_drained():
+    """A write waits for the backlog to drop under the threshold."""
+    pacer = BacklogPacer(threshold=100, min_delay=0.001, max_delay=0.004)
+    backlogs = iter([300, 200, 10])
+
+    waited = asyncio.run(pacer.async_wait(lambda: next(backlogs)))
+
+    # Once drained the write still goes at the (halved) pace
+    assert abs(waited - (0.001 + 0.002 + 0.001)) < 1e-9
+    assert pacer.as_dict()["backlog"] == 10
+    assert pacer.as_dict()["delay_seconds"] == 0.001
+
+
+def test_backlog_pacer_gives_up_after_max_wait():
+    pacer = BacklogPacer(threshold=100, min_delay=0.001, max_delay=0.001, max_wait=0.003)
+
+    waited = asyncio.run(pacer.async_wait(lambda: 1000))
+
+    assert waited >= 0.003
+    assert pacer.waited_seconds == waited
+
+
+def test_backlog_pacer_idle_recorder_does_not_wait():
+    pacer = BacklogPacer()
+
+    assert asyncio.run(pacer.async_wait(lambda: 0)) == 0
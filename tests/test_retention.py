@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta, timezone
+
+from custom_components.utility_manual_tracking.fitter import Datapoint
+from custom_components.utility_manual_tracking.retention import (
+    RetentionPolicy,
+    compact,
+    compaction_boundary,
+)
+
+NOW = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+
+
+def _hourly(days: int) -> list[Datapoint]:
+    """Hourly readings over the last `days` days, oldest first."""
+    hours = days * 24
+    return [
+        Datapoint(float(index), NOW - timedelta(hours=hours - index))
+        for index in range(hours + 1)
+    ]
+
+
+def test_recent_readings_are_all_kept():
+    datapoints = _hourly(5)
+
+    assert compact(datapoints, NOW, RetentionPolicy(full_days=10), timezone.utc) == datapoints
+
+
+def test_older_readings_keep_daily_then_weekly_anchors():
+    datapoints = _hourly(120)
+    policy = RetentionPolicy(full_days=10, daily_days=30)
+
+    kept = compact(datapoints, NOW, policy, timezone.utc)
+
+    recent = [dp for dp in kept if NOW - dp.timestamp <= timedelta(days=10)]
+    daily = [
+        dp for dp in kept if timedelta(days=10) < NOW - dp.timestamp <= timedelta(days=40)
+    ]
+    weekly = [dp for dp in kept if NOW - dp.timestamp > timedelta(days=40)]
+    assert len(recent) == 10 * 24 + 1
+    # One anchor per day, the last reading of that day
+    assert len({dp.timestamp.date() for dp in daily}) == len(daily)
+    assert all(dp.timestamp.hour == 23 for dp in daily[:-1])
+    assert len({dp.timestamp.isocalendar()[:2] for dp in weekly}) == len(weekly)
+    assert len(kept) < len(datapoints) / 10
+
+
+def test_latest_reading_is_always_kept():
+    datapoints = _hourly(60)[:-100]
+
+    kept = compact(datapoints, NOW, RetentionPolicy(full_days=1, daily_days=1), timezone.utc)
+
+    assert kept[-1] == datapoints[-1]
+
+
+def test_compaction_boundary_follows_last_dropped_reading():
+    datapoints = _hourly(20)
+    kept = compact(datapoints, NOW, RetentionPolicy(full_days=5, daily_days=30), timezone.utc)
+
+    boundary = compaction_boundary(datapoints, kept)
+
+    dropped = [dp for dp in datapoints if dp not in kept]
+    assert boundary == min(dp.timestamp for dp in kept if dp.timestamp > dropped[-1].timestamp)
+    assert compaction_boundary(datapoints, datapoints) is None
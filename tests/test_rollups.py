@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta, timezone
+
+from custom_components.utility_manual_tracking.fitter import Datapoint
+from custom_components.utility_manual_tracking.rollups import MeterRollups
+
+
+def _hourly(start: datetime, values: list[float]) -> list[Datapoint]:
+    return [
+        Datapoint(value, start + timedelta(hours=offset))
+        for offset, value in enumerate(values)
+    ]
+
+
+def test_daily_and_monthly_totals():
+    """Totals are differences of the last sum of consecutive periods."""
+    rollups = MeterRollups()
+    # 30 Sep 22:00 to 1 Oct 02:00 UTC, one unit per hour
+    rollups.add_rows(
+        _hourly(datetime(2023, 9, 30, 22, tzinfo=timezone.utc), [10, 11, 12, 13, 14]),
+        timezone.utc,
+    )
+
+    assert rollups.totals("daily") == [
+        {"period": "2023-09-30", "value": 1},
+        {"period": "2023-10-01", "value": 3},
+    ]
+    assert rollups.totals("monthly") == [
+        {"period": "2023-09", "value": 1},
+        {"period": "2023-10", "value": 3},
+    ]
+
+
+def test_local_time_zone_shifts_day_boundary():
+    rollups = MeterRollups()
+    rollups.add_rows(
+        _hourly(datetime(2023, 9, 30, 22, tzinfo=timezone.utc), [10, 11, 12, 13, 14]),
+        timezone(timedelta(hours=2)),
+    )
+
+    # 22:00 UTC is already 1 Oct at UTC+2
+    assert rollups.totals("daily") == [{"period": "2023-10-01", "value": 4}]
+
+
+def test_incremental_batches_and_rewrites():
+    """Later batches extend periods, rewritten hours replace earlier sums."""
+    start = datetime(2023, 10, 1, 0, tzinfo=timezone.utc)
+    rollups = MeterRollups()
+    rollups.add_rows(_hourly(start, [0, 1, 2]), timezone.utc)
+    rollups.add_rows(_hourly(start + timedelta(hours=23), [5, 8]), timezone.utc)
+    # A repair of an older hour does not move the end of the day back
+    rollups.add_rows([Datapoint(1.5, start + timedelta(hours=1))], timezone.utc)
+
+    assert rollups.totals("daily") == [
+        {"period": "2023-10-01", "value": 5},
+        {"period": "2023-10-02", "value": 3},
+    ]
+    assert rollups.totals("daily", start="2023-10-02") == [
+        {"period": "2023-10-02", "value": 3}
+    ]
+
+
+def test_roundtrip_and_clear():
+    rollups = MeterRollups()
+    rollups.add_rows(
+        _hourly(datetime(2023, 10, 1, tzinfo=timezone.utc), [1, 2, 4]), timezone.utc
+    )
+
+    restored = MeterRollups.from_dict(rollups.as_dict())
+    assert restored.totals("daily") == rollups.totals("daily")
+    assert restored.totals("monthly") == rollups.totals("monthly")
+
+    restored.clear()
+    assert restored.totals("daily") == []
@@ -0,0 +1,400 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import json
+from typing import Any
+
+import pytest
+
+from custom_components.utility_manual_tracking import sensor
+from custom_components.utility_manual_tracking.fitter import Datapoint
+from custom_components.utility_manual_tracking.retention import RetentionPolicy
+from custom_components.utility_manual_tracking.statistics_backend import (
+    MemoryStatistics,
+)
+from custom_components.utility_manual_tracking.timebase import hour_index
+from custom_components.utility_manual_tracking.virtual import VirtualMeterWindow
+
+NOW = datetime(2024, 1, 10, 12, tzinfo=timezone.utc)
+
+
+class _Bus:
+    def __init__(self) -> None:
+        self.events: list[tuple[str, Any]] = []
+
+    def async_fire(self, event_type: str, event_data: Any = None) -> None:
+        self.events.append((event_type, event_data))
+
+
+class _Hass:
+    """Just enough of Home Assistant to run a meter: tasks, executor jobs, events."""
+
+    def __init__(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.bus = _Bus()
+        self.data: dict[str, Any] = {}
+        self.executor_jobs = 0
+
+    def async_create_task(self, target: Any, name: str | None = None) -> asyncio.Task:
+        return self.loop.create_task(target)
+
+    def async_create_background_task(self, target: Any, name: str) -> asyncio.Task:
+        return self.loop.create_task(target)
+
+    async def async_add_executor_job(self, target: Any, *args: Any) -> Any:
+        self.executor_jobs += 1
+        return target(*args)
+
+
+class _Store:
+    """In-memory `Store`, serializing every save like the real one."""
+
+    def __init__(self, hass: Any, version: int, key: str, **kwargs: Any) -> None:
+        self.saves: list[str] = []
+
+    def __class_getitem__(cls, item: Any) -> type["_Store"]:
+        return cls
+
+    async def async_load(self) -> dict[str, Any] | None:
+        return json.loads(self.saves[-1]) if self.saves else None
+
+    async def async_save(self, data: dict[str, Any]) -> None:
+        self.saves.append(json.dumps(data, default=str))
+
+
+@pytest.fixture
+def make_meter(monkeypatch):
+    """Build meters writing to `MemoryStatistics`, call inside the event loop."""
+    monkeypatch.setattr(sensor, "Store", _Store)
+    monkeypatch.setattr(sensor.dt_util, "utcnow", lambda: NOW)
+    monkeypatch.setattr(sensor.dt_util, "get_default_time_zone", lambda: timezone.utc)
+    monkeypatch.setattr(sensor, "async_dispatcher_send", lambda *args: None)
+
+    def _make_meter(
+        algorithm: str = "linear",
+        statistics: MemoryStatistics | None = None,
+        retention: RetentionPolicy | None = None,
+        name: str = "Meter",
+        known_devices: list[str] | None = None,
+    ) -> sensor.UtilityManualTrackingSensor:
+        hass = _Hass()
+        meter = sensor.UtilityManualTrackingSensor(
+            hass,
+            name,
+            "kWh",
+            "energy",
+            algorithm,
+            known_devices,
+            retention=retention,
+            statistics=statistics or MemoryStatistics(),
+        )
+        meter.hass = hass
+        meter.async_write_ha_state = lambda: None
+        return meter
+
+    return _make_meter
+
+
+def _three_hourly(days: int) -> list[tuple[float, datetime]]:
+    """Readings every 3 hours over the last `days` days, at an uneven rate."""
+    readings = []
+    value = 0.0
+    for index in range(days * 8 + 1):
+        value += 1 + index % 5
+        readings.append((value, NOW - timedelta(hours=3 * (days * 8 - index))))
+    return readings
+
+
+@pytest.mark.parametrize("algorithm", ["linear", "pchip"])
+def test_compacted_statistics_survive_verify_and_reset(make_meter, algorithm):
+    """Hours interpolated from compacted readings are neither repaired nor rebuilt."""
+
+    async def run() -> None:
+        statistics = MemoryStatistics()
+        meter = make_meter(algorithm, statistics, RetentionPolicy(2, 10))
+        await asyncio.gather(
+            *(meter.async_submit_reading(*reading) for reading in _three_hourly(8))
+        )
+        written = dict(statistics.sums[sensor.get_statistics_id(meter.unique_id, algorithm)])
+
+        await meter._async_compact()
+        assert len(meter.datapoints()) < 8 * 8 + 1
+        assert meter._storage_attributes()["compacted_until"] is not None
+
+        result = await meter.async_verify_statistics()
+        assert result["checked_hours"] > 0
+        assert result["mismatched_hours"] == 0
+        assert result["rows_written"] == 0
+
+        await meter.async_reset_statistics()
+        stored = statistics.sums[sensor.get_statistics_id(meter.unique_id, algorithm)]
+        assert stored == pytest.approx(written)
+
+    asyncio.run(run())
+
+
+def test_compaction_boundary_is_restored(make_meter):
+    """The boundary is stored with the history and loaded back."""
+
+    async def run() -> None:
+        meter = make_meter(retention=RetentionPolicy(2, 10))
+        await asyncio.gather(
+            *(meter.async_submit_reading(*reading) for reading in _three_hourly(8))
+        )
+        await meter._async_compact()
+
+        restored = make_meter()
+        restored._store = meter._store
+        await restored._load_attributes()
+
+        assert restored._compacted_until == meter._compacted_until
+        assert restored.datapoints() == meter.datapoints()
+
+    asyncio.run(run())
+
+
+class _BackedUpStatistics(MemoryStatistics):
+    """A backend whose queue is always behind, every write waits for it."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.waits = 0
+
+    async def async_wait_ready(self) -> float:
+        self.waits += 1
+        await asyncio.sleep(0.03)
+        return 0.03
+
+
+def test_backlog_waits_are_not_timed_as_loop_blocking(make_meter):
+    """Chunks keep their size and the reported block leaves out backlog waits."""
+
+    async def run() -> None:
+        statistics = _BackedUpStatistics()
+        meter = make_meter(statistics=statistics)
+        await asyncio.gather(
+            *(meter.async_submit_reading(*reading) for reading in _three_hourly(8))
+        )
+
+        await meter.async_reset_statistics()
+
+        progress = [data for _, data in meter.hass.bus.events]
+        assert progress[-1]["state"] == "done"
+        assert progress[-1]["max_loop_block_ms"] < 30
+        # Once for the batch of readings, then once per chunk: the first
+        # reading and every gap
+        assert statistics.waits == 1 + 1 + 8 * 8
+
+    asyncio.run(run())
+
+
+def test_rewritten_member_hours_reach_virtual_meters(make_meter, monkeypatch):
+    """Rows a member rewrites (here for a new known device) update the virtual sums."""
+    window = VirtualMeterWindow()
+    virtual_sums: dict[int, float] = {}
+
+    def _dispatch(hass, signal, entity_id, previous, rows):
+        for row in window.add_member_rows(entity_id, previous, rows):
+            virtual_sums[hour_index(row.timestamp)] = row.value
+
+    monkeypatch.setattr(sensor, "async_dispatcher_send", _dispatch)
+
+    async def run() -> None:
+        statistics = MemoryStatistics()
+        statistics.device_changes["sensor.washer"] = {
+            hour_index(NOW) - hours: 0.5 for hours in range(1, 48, 5)
+        }
+        member = make_meter("device_aware", statistics, name="Member")
+        # A second member with older readings keeps the window open
+        other = make_meter(name="Other")
+        await other.async_submit_reading(0.0, NOW - timedelta(days=3))
+        await other.async_submit_reading(2.0, NOW - timedelta(days=2))
+        for reading in _three_hourly(3):
+            await member.async_submit_reading(*reading)
+        before = dict(virtual_sums)
+
+        assert await member.async_update_known_devices(["sensor.washer"]) > 0
+
+        stored = statistics.sums[sensor.get_statistics_id(member.unique_id, "device_aware")]
+        first = min(stored)
+        changed = 0
+        for hour in range(window.window_start, hour_index(NOW) + 1):
+            assert virtual_sums[hour] == pytest.approx(stored[hour] - stored[first] + 2.0)
+            changed += virtual_sums[hour] != pytest.approx(before[hour])
+        assert changed > 0
+
+    asyncio.run(run())
+
+
+class _SlowStatistics(MemoryStatistics):
+    """Records every write, each taking a little while."""
+
+    def __init__(self, delay: float = 0.01) -> None:
+        super().__init__()
+        self.delay = delay
+        self.writes: list[list[Any]] = []
+
+    async def async_write(self, sensor_id, meter_name, meter_unit, algorithm, rows):
+        self.writes.append(rows)
+        await asyncio.sleep(self.delay)
+        return await super().async_write(sensor_id, meter_name, meter_unit, algorithm, rows)
+
+
+def _at(hours: float) -> datetime:
+    return NOW + timedelta(hours=hours)
+
+
+def test_concurrent_readings_are_applied_in_one_batch(make_meter):
+    """One interpolation pass, statistics write and store save for the batch."""
+
+    async def run() -> None:
+        statistics = _SlowStatistics()
+        meter = make_meter(statistics=statistics)
+        await meter.async_submit_reading(0.0, _at(0))
+        statistics.writes.clear()
+        saves = len(meter._store.saves)
+
+        await asyncio.gather(
+            *(meter.async_submit_reading(float(step), _at(step)) for step in (3, 1, 2))
+        )
+
+        assert len(statistics.writes) == 1
+        assert len(meter._store.saves) == saves + 1
+        assert [dp.value for dp in meter.datapoints()] == [0.0, 1.0, 2.0, 3.0]
+
+    asyncio.run(run())
+
+
+def test_readings_during_a_write_are_coalesced(make_meter):
+    """Readings arriving while a batch is written form the next batch together."""
+
+    async def run() -> None:
+        statistics = _SlowStatistics(delay=0.05)
+        meter = make_meter(statistics=statistics)
+        first = asyncio.ensure_future(meter.async_submit_reading(0.0, _at(0)))
+        await asyncio.sleep(0.01)
+        assert len(statistics.writes) == 1
+
+        await asyncio.gather(
+            first,
+            meter.async_submit_reading(1.0, _at(1)),
+            meter.async_submit_reading(2.0, _at(2)),
+        )
+
+        assert len(statistics.writes) == 2
+        assert [row.value for row in statistics.writes[1]] == [1.0, 2.0]
+
+    asyncio.run(run())
+
+
+def test_duplicate_readings_are_applied_once(make_meter):
+    """A double-submitted reading is neither an error nor a second reading."""
+
+    async def run() -> None:
+        statistics = _SlowStatistics()
+        meter = make_meter(statistics=statistics)
+        await asyncio.gather(
+            meter.async_submit_reading(0.0, _at(0)),
+            meter.async_submit_reading(0.0, _at(0)),
+        )
+        # Resubmitting the latest reading later changes nothing either
+        await meter.async_submit_reading(0.0, _at(0))
+
+        assert meter.datapoints() == [Datapoint(0.0, _at(0))]
+        assert len(statistics.writes) == 1
+
+    asyncio.run(run())
+
+
+def test_out_of_order_reading_fails_alone(make_meter):
+    """An earlier reading is rejected without failing the rest of its batch."""
+
+    async def run() -> None:
+        meter = make_meter()
+        await meter.async_submit_reading(0.0, _at(5))
+
+        results = await asyncio.gather(
+            meter.async_submit_reading(1.0, _at(1)),
+            meter.async_submit_reading(2.0, _at(8)),
+            return_exceptions=True,
+        )
+
+        assert isinstance(results[0], ValueError)
+        assert results[1] is None
+        assert [dp.value for dp in meter.datapoints()] == [0.0, 2.0]
+
+    asyncio.run(run())
+
+
+def test_readings_wait_for_a_running_rebuild(make_meter):
+    """A reading submitted during a rebuild is written after the rebuild's rows."""
+
+    async def run() -> None:
+        statistics = _SlowStatistics()
+        meter = make_meter(statistics=statistics)
+        for step in range(4):
+            await meter.async_submit_reading(float(step), _at(step * 24))
+        statistics.writes.clear()
+
+        rebuild = meter.async_start_rebuild()
+        await asyncio.sleep(0.005)
+        assert not rebuild.done()
+        await meter.async_submit_reading(10.0, _at(4 * 24))
+
+        assert rebuild.done()
+        reading_write = statistics.writes[-1]
+        assert reading_write[-1] == Datapoint(10.0, _at(4 * 24))
+        # Every write before it belongs to the rebuild, up to the previous last reading
+        assert all(row.timestamp <= _at(3 * 24) for rows in statistics.writes[:-1] for row in rows)
+        assert statistics.writes[-2][-1] == Datapoint(3.0, _at(3 * 24))
+
+    asyncio.run(run())
+
+
+class _UnevenBacklogStatistics(MemoryStatistics):
+    """The first write waits longest, later ones go right through."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.delays = [0.05]
+        self.writes = 0
+
+    async def async_wait_ready(self) -> float:
+        delay = self.delays.pop(0) if self.delays else 0.0
+        await asyncio.sleep(delay)
+        return delay
+
+    async def async_write(self, sensor_id, meter_name, meter_unit, algorithm, rows):
+        self.writes += 1
+        return await super().async_write(sensor_id, meter_name, meter_unit, algorithm, rows)
+
+
+def test_virtual_meter_writes_keep_the_newest_sums(make_meter):
+    """Batches arriving while a write waits on the backlog never leave stale sums."""
+
+    async def run() -> None:
+        statistics = _UnevenBacklogStatistics()
+        hass = _Hass()
+        virtual = sensor.VirtualMeterSensor(
+            hass, "Total", "kWh", "energy", ["sensor.a", "sensor.b"], statistics
+        )
+        virtual.hass = hass
+        virtual.async_write_ha_state = lambda: None
+
+        start = NOW - timedelta(hours=4)
+        virtual._async_member_rows_written("sensor.a", None, [Datapoint(0.0, start)])
+        virtual._async_member_rows_written("sensor.b", None, [Datapoint(0.0, start)])
+        for value in (1.0, 2.0, 3.0):
+            virtual._async_member_rows_written(
+                "sensor.a", None, [Datapoint(value, start + timedelta(hours=1))]
+            )
+            await asyncio.sleep(0.01)
+        await virtual._writer_task
+
+        stored = statistics.sums[
+            sensor.get_statistics_id(virtual.unique_id, virtual.ALGORITHM)
+        ]
+        assert stored[hour_index(start) + 1] == 3.0
+        # Batches that arrived during the wait went out in the same write
+        assert statistics.writes == 1
+
+    asyncio.run(run())
@@ -0,0 +1,186 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import threading
+
+import pytest
+
+from custom_components.utility_manual_tracking.fitter import Datapoint
+from custom_components.utility_manual_tracking.statistics_backend import (
+    PAGE_HOURS,
+    MemoryStatistics,
+    SQLiteStatistics,
+    StatisticsBackend,
+    get_statistics_id,
+)
+from custom_components.utility_manual_tracking.timebase import hour_index
+from custom_components.utility_manual_tracking.verify import (
+    expected_sums,
+    find_mismatches,
+)
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+STATISTIC_ID = get_statistics_id("meter", "linear")
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path) -> StatisticsBackend:
+    if request.param == "memory":
+        return MemoryStatistics()
+    backend = SQLiteStatistics(str(tmp_path / "statistics.db"))
+    request.addfinalizer(backend.close)
+    return backend
+
+
+def _write(backend: StatisticsBackend, rows: list[Datapoint]) -> int:
+    return asyncio.run(backend.async_write("meter", "Meter", "kWh", "linear", rows))
+
+
+def _read(backend: StatisticsBackend, first: int, last: int) -> dict[int, float]:
+    return {
+        hour_index(row["start"]): row["sum"]
+        for page in backend.iter_sum_pages(STATISTIC_ID, first, last)
+        for row in page
+    }
+
+
+def _stored(backend: StatisticsBackend, first: int, last: int) -> dict[int, float]:
+    """Stored sums, read the way meters do (after any queued writes)."""
+    return asyncio.run(backend.async_run(_read, backend, first, last))
+
+
+def test_write_replaces_hours(backend):
+    first = hour_index(START)
+    rows = [Datapoint(float(step), START + timedelta(hours=step)) for step in range(5)]
+
+    assert _write(backend, rows) == 5
+    # A later write of an hour wins, also within the hour
+    _write(backend, [Datapoint(9.0, START + timedelta(hours=2, minutes=30))])
+
+    assert _stored(backend, first, first + 4) == {
+        first: 0.0,
+        first + 1: 1.0,
+        first + 2: 9.0,
+        first + 3: 3.0,
+        first + 4: 4.0,
+    }
+    assert _stored(backend, first + 1, first + 2) == {first + 1: 1.0, first + 2: 9.0}
+
+
+def test_sums_are_paged(backend):
+    first = hour_index(START)
+    rows = [
+        Datapoint(float(step), START + timedelta(hours=step))
+        for step in range(PAGE_HOURS + 10)
+    ]
+    _write(backend, rows)
+
+    pages = list(backend.iter_sum_pages(STATISTIC_ID, first, first + PAGE_HOURS + 9))
+
+    assert [len(page) for page in pages] == [PAGE_HOURS, 10]
+
+
+def test_clear(backend):
+    _write(backend, [Datapoint(1.0, START)])
+
+    backend.clear("meter", "linear")
+
+    assert _stored(backend, hour_index(START), hour_index(START)) == {}
+
+
+def test_verify_against_backend(backend):
+    """Stored sums read back from a backend feed the consistency check."""
+    rows = [Datapoint(float(step), START + timedelta(hours=step)) for step in range(6)]
+    _write(backend, rows[:3] + rows[4:])
+    expected = expected_sums(rows)
+
+    mismatched = find_mismatches(
+        expected, backend.iter_sum_pages(STATISTIC_ID, min(expected), max(expected))
+    )
+
+    assert mismatched == [hour_index(START) + 3]
+
+
+def test_device_consumption(backend):
+    first = hour_index(START)
+    changes = {
+        "sensor.washer": {first: 0.5, first + 1: 1.0, first + 5: 2.0},
+        "sensor.dryer": {first + 1: 0.25, first + 2: -0.1},
+    }
+    for entity_id, hourly in changes.items():
+        if isinstance(backend, MemoryStatistics):
+            backend.device_changes[entity_id] = hourly
+        else:
+            backend.add_device_changes(entity_id, hourly)
+
+    hourly = backend.device_consumption(
+        ["sensor.washer", "sensor.dryer"], "kWh", START, START + timedelta(hours=5)
+    )
+
+    # Negative changes and hours from `end` on are left out
+    assert hourly == {first: 0.5, first + 1: 1.25}
+
+
+def test_device_consumption_matches_recorder_range(backend):
+    """Hours starting within the span count, like rows the recorder returns."""
+    first = hour_index(START)
+    changes = {first + hour: 1.0 + hour for hour in range(12)}
+    if isinstance(backend, MemoryStatistics):
+        backend.device_changes["sensor.washer"] = changes
+    else:
+        backend.add_device_changes("sensor.washer", changes)
+
+    hourly = backend.device_consumption(
+        ["sensor.washer"],
+        "kWh",
+        START + timedelta(hours=8, minutes=30),
+        START + timedelta(hours=10, minutes=45),
+    )
+
+    assert hourly == {first + 9: 10.0, first + 10: 11.0}
+
+
+def test_sqlite_writes_off_the_event_loop_in_order(tmp_path):
+    """Clears and writes commit on the worker thread, in the order they were made."""
+    backend = SQLiteStatistics(str(tmp_path / "statistics.db"))
+    commit_threads: set[int] = set()
+    write = backend._write
+
+    def _tracked_write(*args):
+        commit_threads.add(threading.get_ident())
+        write(*args)
+
+    backend._write = _tracked_write
+
+    async def run() -> dict[int, float]:
+        await backend.async_write("meter", "Meter", "kWh", "linear", [Datapoint(1.0, START)])
+        backend.clear("meter", "linear")
+        await backend.async_write(
+            "meter", "Meter", "kWh", "linear", [Datapoint(2.0, START + timedelta(hours=1))]
+        )
+        return await backend.async_run(
+            _read, backend, hour_index(START), hour_index(START) + 1
+        )
+
+    try:
+        assert asyncio.run(run()) == {hour_index(START) + 1: 2.0}
+        assert threading.get_ident() not in commit_threads
+    finally:
+        backend.close()
+
+
+def test_sqlite_keeps_metadata_for_import(tmp_path):
+    path = str(tmp_path / "statistics.db")
+    backend = SQLiteStatistics(path)
+    _write(backend, [Datapoint(1.0, START)])
+    backend.close()
+
+    reopened = SQLiteStatistics(path)
+    try:
+        assert _stored(reopened, hour_index(START), hour_index(START)) == {
+            hour_index(START): 1.0
+        }
+        assert reopened.metadata() == {
+            STATISTIC_ID: ("Meter - statistics (linear)", "kWh")
+        }
+    finally:
+        reopened.close()
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone
+
+from custom_components.utility_manual_tracking.timebase import (
+    hour_datetime,
+    hour_index,
+    hour_range,
+    hour_start,
+    hours_between,
+    hours_starting_in,
+)
+
+
+def test_hour_index_roundtrip():
+    """Datetimes, naive datetimes and timestamps map to the same hour."""
+    aware = datetime(2023, 10, 1, 5, 42, 17, tzinfo=timezone.utc)
+    naive = datetime(2023, 10, 1, 5, 42, 17)
+
+    assert hour_index(aware) == hour_index(naive) == hour_index(aware.timestamp())
+    assert hour_datetime(hour_index(aware)) == datetime(2023, 10, 1, 5, tzinfo=timezone.utc)
+    assert hour_datetime(hour_index(naive), naive) == datetime(2023, 10, 1, 5)
+
+
+def test_hour_index_other_timezone():
+    """Aware datetimes in other zones land in the same UTC hour."""
+    cet = timezone(timedelta(hours=2))
+    local = datetime(2023, 10, 1, 7, 30, tzinfo=cet)
+
+    assert hour_index(local) == hour_index(datetime(2023, 10, 1, 5, 30, tzinfo=timezone.utc))
+
+
+def test_hour_start():
+    assert hour_start(datetime(2023, 10, 1, 5, 59, 59)) == datetime(2023, 10, 1, 5)
+    assert hour_start(datetime(2023, 10, 1, 5, tzinfo=timezone.utc)) == datetime(
+        2023, 10, 1, 5, tzinfo=timezone.utc
+    )
+
+
+def test_hours_between_matches_hourly_stepping():
+    """Same count as stepping one hour at a time while strictly before the end."""
+    start = datetime(2023, 10, 1, 0, 20)
+    for minutes in [0, 30, 60, 61, 120, 150, 24 * 60]:
+        end = start + timedelta(minutes=minutes)
+        steps = 0
+        current = start + timedelta(hours=1)
+        while current < end:
+            steps += 1
+            current += timedelta(hours=1)
+
+        assert hours_between(start, end) == steps
+        assert len(hour_range(start, end)) == steps
+
+
+def test_hour_range():
+    """Steps land at 01:20 and 02:20; 03:20 is past the end."""
+    start = datetime(2023, 10, 1, 0, 20, tzinfo=timezone.utc)
+    end = datetime(2023, 10, 1, 3, 10, tzinfo=timezone.utc)
+
+    assert [hour_datetime(h) for h in hour_range(start, end)] == [
+        datetime(2023, 10, 1, 1, tzinfo=timezone.utc),
+        datetime(2023, 10, 1, 2, tzinfo=timezone.utc),
+    ]
+
+
+def test_hours_starting_in_matches_recorder_range():
+    """Rows start at 09:00 and 10:00; 08:00 started before 08:30."""
+    start = datetime(2023, 10, 1, 8, 30, tzinfo=timezone.utc)
+    end = datetime(2023, 10, 1, 10, 45, tzinfo=timezone.utc)
+
+    assert [hour_datetime(h) for h in hours_starting_in(start, end)] == [
+        datetime(2023, 10, 1, 9, tzinfo=timezone.utc),
+        datetime(2023, 10, 1, 10, tzinfo=timezone.utc),
+    ]
+    # Whole hours: `start` included, `end` left out
+    assert list(hours_starting_in(hour_datetime(5), hour_datetime(7))) == [5, 6]
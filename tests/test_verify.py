@@ -0,0 +1,49 @@
+from datetime import datetime, timezone
+
+from custom_components.utility_manual_tracking.fitter import Datapoint
+from custom_components.utility_manual_tracking.timebase import hour_index
+from custom_components.utility_manual_tracking.verify import (
+    expected_sums,
+    find_mismatches,
+    group_ranges,
+)
+
+
+def _hour(hour: int) -> datetime:
+    return datetime(2023, 10, 1, hour, 0, tzinfo=timezone.utc)
+
+
+def test_expected_sums_latest_row_of_hour_wins():
+    """Two rows in the same hour keep the later one, like the recorder."""
+    rows = [
+        Datapoint(1, _hour(0)),
+        Datapoint(2, datetime(2023, 10, 1, 1, 10, tzinfo=timezone.utc)),
+        Datapoint(3, datetime(2023, 10, 1, 1, 50, tzinfo=timezone.utc)),
+    ]
+
+    assert expected_sums(rows) == {hour_index(_hour(0)): 1, hour_index(_hour(1)): 3}
+
+
+def test_find_mismatches_across_pages():
+    """Differing and missing hours are reported, matching ones are not."""
+    expected = {hour_index(_hour(h)): float(h) for h in range(6)}
+    pages = [
+        [{"start": _hour(0), "sum": 0.0}, {"start": _hour(1), "sum": 5.0}],
+        # Timestamps as the recorder may return them, hour 3 missing
+        [{"start": _hour(2).timestamp(), "sum": 2.0}, {"start": _hour(4).timestamp(), "sum": None}],
+        [{"start": _hour(5), "sum": 5.0 + 1e-9}, {"start": _hour(9), "sum": 1.0}],
+    ]
+
+    assert find_mismatches(expected, pages) == [
+        hour_index(_hour(1)),
+        hour_index(_hour(3)),
+        hour_index(_hour(4)),
+    ]
+
+
+def test_group_ranges():
+    """Consecutive hours are merged into ranges."""
+    hours = [1001, 1002, 1003, 1007, 1009, 1010]
+
+    assert group_ranges(hours) == [(1001, 1003), (1007, 1007), (1009, 1010)]
+    assert group_ranges([]) == []
@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta, timezone
+
+from custom_components.utility_manual_tracking.fitter import Datapoint
+from custom_components.utility_manual_tracking.timebase import hour_index
+from custom_components.utility_manual_tracking.virtual import VirtualMeterWindow
+
+START = datetime(2023, 10, 1, tzinfo=timezone.utc)
+
+
+def _rows(first_hour: int, values: list[float]) -> list[Datapoint]:
+    return [
+        Datapoint(value, START + timedelta(hours=first_hour + offset))
+        for offset, value in enumerate(values)
+    ]
+
+
+def _sums(rows: list[Datapoint]) -> list[tuple[int, float]]:
+    return [(hour_index(row.timestamp) - hour_index(START), row.value) for row in rows]
+
+
+def test_first_rows_are_a_baseline():
+    window = VirtualMeterWindow()
+
+    assert window.add_member_rows("sensor.a", None, _rows(0, [100])) == []
+    assert window.total == 0
+
+
+def test_members_are_summed_by_hour():
+    window = VirtualMeterWindow()
+    window.add_member_rows("sensor.a", None, _rows(0, [100]))
+    window.add_member_rows("sensor.b", None, _rows(0, [50]))
+
+    written = window.add_member_rows("sensor.a", None, _rows(1, [101, 103]))
+    assert _sums(written) == [(1, 1), (2, 3)]
+
+    # b's gap overlaps hours already written, those and the later ones are rewritten
+    written = window.add_member_rows("sensor.b", None, _rows(1, [52, 53, 55]))
+    assert _sums(written) == [(1, 3), (2, 6), (3, 8)]
+    assert window.total == 8
+
+
+def test_hours_close_behind_the_oldest_member():
+    window = VirtualMeterWindow()
+    window.add_member_rows("sensor.a", None, _rows(0, [0]))
+    window.add_member_rows("sensor.b", None, _rows(0, [0]))
+    window.add_member_rows("sensor.a", None, _rows(1, [1, 2, 3]))
+    window.add_member_rows("sensor.b", None, _rows(1, [1, 2]))
+
+    # Hours before b's latest hour (2) can no longer change
+    assert window.window_start == hour_index(START) + 2
+    assert min(window.deltas) == window.window_start
+    assert window.closed_sum == 2
+
+    # A later write only touches the open hours
+    written = window.add_member_rows("sensor.b", None, _rows(3, [4]))
+    assert _sums(written) == [(3, 7)]
+
+
+def test_previous_reading_seeds_a_new_member():
+    window = VirtualMeterWindow()
+    previous = Datapoint(10, START)
+
+    written = window.add_member_rows("sensor.a", previous, _rows(1, [12]))
+    assert _sums(written) == [(1, 2)]
+
+
+def test_roundtrip():
+    window = VirtualMeterWindow()
+    window.add_member_rows("sensor.a", None, _rows(0, [0, 1, 2]))
+    restored = VirtualMeterWindow.from_dict(window.as_dict())
+
+    assert restored.add_member_rows("sensor.a", None, _rows(3, [5])) == (
+        window.add_member_rows("sensor.a", None, _rows(3, [5]))
+    )
+
+
+def test_rewritten_hours_apply_the_difference():
+    """A member rewriting open hours shifts the virtual sums by the difference."""
+    window = VirtualMeterWindow()
+    window.add_member_rows("sensor.a", None, _rows(0, [0]))
+    window.add_member_rows("sensor.b", None, _rows(0, [0]))
+    window.add_member_rows("sensor.b", None, _rows(1, [1]))
+    window.add_member_rows("sensor.a", None, _rows(1, [1, 2, 3]))
+
+    # Hour 2 of a is rebuilt, its hour 3 (and the total) is unchanged
+    written = window.add_member_rows("sensor.a", None, _rows(2, [2.5]))
+    assert _sums(written) == [(2, 3.5), (3, 4)]
+    assert window.total == 4
+
+    # Re-fit hours before the latest one come with new hours in one batch
+    written = window.add_member_rows("sensor.a", None, _rows(2, [2, 3.5, 5]))
+    assert _sums(written) == [(2, 3), (3, 4.5), (4, 6)]
+    assert window.total == 6
+
+
+def test_rewritten_closed_hours_leave_the_window_alone():
+    """Closed hours are final; the open sums only follow the open hours."""
+    window = VirtualMeterWindow()
+    window.add_member_rows("sensor.a", None, _rows(0, [0]))
+    window.add_member_rows("sensor.b", None, _rows(0, [0]))
+    window.add_member_rows("sensor.a", None, _rows(1, [1, 2, 3, 4]))
+    window.add_member_rows("sensor.b", None, _rows(1, [1, 2]))
+    assert window.window_start == hour_index(START) + 2
+
+    assert window.add_member_rows("sensor.a", None, _rows(1, [1.5])) == []
+
+    # A full rebuild of a: only the open hours 2.. are written again
+    written = window.add_member_rows("sensor.a", None, _rows(0, [0, 0.5, 1, 3, 4]))
+    assert _sums(written) == [(2, 3), (3, 5), (4, 6)]
+    assert window.total == 6
+
+
+def test_roundtrip_keeps_member_sums():
+    window = VirtualMeterWindow()
+    window.add_member_rows("sensor.a", None, _rows(0, [0, 1, 2]))
+    restored = VirtualMeterWindow.from_dict(window.as_dict())
+
+    assert restored.add_member_rows("sensor.a", None, _rows(1, [1.5])) == (
+        window.add_member_rows("sensor.a", None, _rows(1, [1.5]))
+    )
+
+
+def test_window_stored_without_member_sums_still_loads():
+    window = VirtualMeterWindow()
+    window.add_member_rows("sensor.a", None, _rows(0, [0, 1, 2]))
+    data = window.as_dict()
+    del data["member_sums"]
+
+    restored = VirtualMeterWindow.from_dict(data)
+
+    # Only the latest sum is known, earlier rewrites are skipped
+    assert restored.add_member_rows("sensor.a", None, _rows(1, [1.5])) == []
+    assert _sums(restored.add_member_rows("sensor.a", None, _rows(3, [4]))) == [(3, 4)]